@@ -0,0 +1,89 @@
+"""
+Shared LLM clients for Movi
+Connection-pooled HTTP clients and cached ChatOpenAI instances reused across requests
+"""
+import os
+from functools import lru_cache
+from typing import Any, Dict, Optional
+import httpx
+from langchain_core.language_models.chat_models import BaseChatModel
+from langchain_openai import ChatOpenAI
+from Agents.telemetry import llm_callbacks
+
+# Connection pool sizing for OpenAI traffic (per worker)
+HTTP_MAX_CONNECTIONS = int(os.getenv("MOVI_HTTP_MAX_CONNECTIONS", "100"))
+HTTP_MAX_KEEPALIVE_CONNECTIONS = int(os.getenv("MOVI_HTTP_MAX_KEEPALIVE", "20"))
+HTTP_TIMEOUT_SECONDS = float(os.getenv("MOVI_HTTP_TIMEOUT", "60"))
+
+# "openai" or "fake" (deterministic offline model for evals/benchmarks, see Agents.fake_llm)
+LLM_BACKEND = os.getenv("MOVI_LLM_BACKEND", "openai").lower()
+# Append every live reply to this JSONL file for offline replay (MOVI_FAKE_LLM_RECORDINGS)
+LLM_RECORD_FILE = os.getenv("MOVI_LLM_RECORD_FILE", "")
+
+
+def _pool_limits() -> httpx.Limits:
+    return httpx.Limits(
+        max_connections=HTTP_MAX_CONNECTIONS,
+        max_keepalive_connections=HTTP_MAX_KEEPALIVE_CONNECTIONS,
+    )
+
+
+@lru_cache(maxsize=1)
+def get_http_client() -> httpx.Client:
+    """Shared synchronous HTTP client (keep-alive pool) for blocking OpenAI calls."""
+    return httpx.Client(limits=_pool_limits(), timeout=HTTP_TIMEOUT_SECONDS)
+
+
+@lru_cache(maxsize=1)
+def get_async_http_client() -> httpx.AsyncClient:
+    """Shared asynchronous HTTP client (keep-alive pool) for ainvoke/astream calls."""
+    return httpx.AsyncClient(limits=_pool_limits(), timeout=HTTP_TIMEOUT_SECONDS)
+
+
+def create_chat_model(
+    model: str = "gpt-4o-mini",
+    temperature: float = 0,
+    model_kwargs: Optional[Dict[str, Any]] = None,
+) -> BaseChatModel:
+    """
+    Build a ChatOpenAI instance wired to the shared connection pools.
+
+    Args:
+        model: OpenAI model name
+        temperature: Sampling temperature
+        model_kwargs: Extra request parameters passed through to OpenAI
+
+    Returns:
+        ChatOpenAI using the pooled sync and async HTTP clients, reporting
+        latency and token usage (streamed calls included) to Agents.telemetry;
+        a FakeChatModel when MOVI_LLM_BACKEND=fake
+    """
+    callbacks = llm_callbacks()
+    if LLM_BACKEND == "fake":
+        from Agents.fake_llm import create_fake_chat_model
+        fake_model: BaseChatModel = create_fake_chat_model(model=model, callbacks=callbacks)
+        return fake_model
+    if LLM_RECORD_FILE:
+        from Agents.fake_llm import ResponseRecorder
+        callbacks = callbacks + [ResponseRecorder(LLM_RECORD_FILE)]
+
+    return ChatOpenAI(
+        model=model,
+        temperature=temperature,
+        model_kwargs=model_kwargs or {},
+        http_client=get_http_client(),
+        http_async_client=get_async_http_client(),
+        stream_usage=True,
+        callbacks=callbacks,
+    )
+
+
+@lru_cache(maxsize=8)
+def get_chat_model(model: str = "gpt-4o-mini", temperature: float = 0) -> BaseChatModel:
+    """
+    Cached ChatOpenAI per (model, temperature).
+
+    Use this instead of constructing ChatOpenAI inside request handlers or nodes,
+    so every call shares one client and one connection pool.
+    """
+    return create_chat_model(model=model, temperature=temperature)
@@ -0,0 +1,134 @@
+"""
+HITL Confirmation Messages for Movi
+Renders confirmation alerts from consequence_data with a template, with an
+optional async LLM rewrite that is cached per consequence.
+"""
+import asyncio
+import os
+from typing import Any, Dict, Optional, Tuple
+from Agents.clients import get_chat_model
+from utils.cache import LRUCache, record_cache
+from utils.phrases import CONFIRMATION_QUESTION
+
+CONFIRMATION_LLM_REWRITE = os.getenv("MOVI_CONFIRMATION_LLM_REWRITE", "false").lower() == "true"
+CONFIRMATION_LLM_MODEL = os.getenv("MOVI_CONFIRMATION_LLM_MODEL", "gpt-4o-mini")
+CONFIRMATION_LLM_TIMEOUT = float(os.getenv("MOVI_CONFIRMATION_LLM_TIMEOUT", "3"))
+CONFIRMATION_CACHE_SIZE = int(os.getenv("MOVI_CONFIRMATION_CACHE_SIZE", "256"))
+
+# What each high-impact tool does, phrased to follow "You are about to ..."
+ACTION_DESCRIPTIONS = {
+    "remove_vehicle_from_trip": "remove the assigned vehicle and driver from trip",
+    "delete_trip": "delete trip",
+    "delete_deployment": "delete the deployment for trip",
+    "update_trip": "update trip",
+    "update_route": "update route",
+    "update_route_status": "change the status of route",
+}
+
+# Rewritten alerts keyed by (tool_name, affected_entity, details)
+rewrite_cache: LRUCache[str] = LRUCache(CONFIRMATION_CACHE_SIZE)
+
+
+def _step_prefix(consequence_data: Dict[str, Any]) -> str:
+    """'Step 2 of 3: ' for multi-step plans, empty otherwise."""
+    if consequence_data.get("total_steps"):
+        return f"Step {consequence_data.get('step')} of {consequence_data['total_steps']}: "
+    return ""
+
+
+def render_confirmation(consequence_data: Optional[Dict[str, Any]]) -> str:
+    """
+    Build the confirmation alert for an interrupt payload without any LLM call.
+
+    Args:
+        consequence_data: Interrupt payload from consequence_node
+
+    Returns:
+        Confirmation message ending with the yes/no question
+    """
+    consequence_data = consequence_data or {}
+    tool_name = consequence_data.get("tool_name", "this action")
+    prefix = _step_prefix(consequence_data)
+
+    if not consequence_data.get("has_consequences"):
+        # Fallback for tools without specific consequences
+        return f"{prefix}You are about to execute: {tool_name}\n\n{CONFIRMATION_QUESTION}"
+
+    action = ACTION_DESCRIPTIONS.get(tool_name, f"run {tool_name} on")
+    affected_entity = consequence_data.get("affected_entity", "")
+    details = consequence_data.get("details", "")
+
+    return (
+        f"{prefix}You are about to {action} '{affected_entity}'.\n\n"
+        f"{details}\n\n"
+        f"{CONFIRMATION_QUESTION}"
+    )
+
+
+def _cache_key(consequence_data: Dict[str, Any]) -> Tuple[str, str, str]:
+    return (
+        str(consequence_data.get("tool_name", "")),
+        str(consequence_data.get("affected_entity", "")),
+        str(consequence_data.get("details", "")),
+    )
+
+
+async def arender_confirmation(
+    consequence_data: Optional[Dict[str, Any]],
+    rewrite: Optional[bool] = None
+) -> str:
+    """
+    Confirmation alert with an optional LLM rewrite for a more natural tone.
+
+    The template is returned immediately unless rewriting is enabled
+    (MOVI_CONFIRMATION_LLM_REWRITE). Rewrites use the shared client, are cached
+    per consequence, and fall back to the template on error or timeout.
+
+    Args:
+        consequence_data: Interrupt payload from consequence_node
+        rewrite: Override for MOVI_CONFIRMATION_LLM_REWRITE
+
+    Returns:
+        Confirmation message
+    """
+    template = render_confirmation(consequence_data)
+    if not (CONFIRMATION_LLM_REWRITE if rewrite is None else rewrite):
+        return template
+    if not consequence_data or not consequence_data.get("has_consequences"):
+        return template
+
+    key = _cache_key(consequence_data)
+    cached: Optional[str] = rewrite_cache.get(key)
+    record_cache("confirmation", cached is not None)
+    if cached is not None:
+        return _step_prefix(consequence_data) + cached
+
+    tool_name, affected_entity, details = key
+    prompt = f"""You are a helpful assistant generating a confirmation alert for a user action.
+
+The user is about to: {tool_name}
+Affected entity: {affected_entity}
+
+Consequences:
+{details}
+
+Generate a clear, concise, and friendly confirmation message that:
+1. Explains what will happen if they proceed
+2. Highlights the key consequences
+3. Asks if they want to continue
+
+Keep it under 3-4 sentences. Be direct but respectful."""
+
+    try:
+        llm = get_chat_model(CONFIRMATION_LLM_MODEL, temperature=0.3)
+        response = await asyncio.wait_for(llm.ainvoke(prompt), timeout=CONFIRMATION_LLM_TIMEOUT)
+    except Exception as e:
+        print(f"⚠️  Confirmation rewrite failed, using template: {str(e)}")
+        return template
+    # Content blocks or an empty reply: keep the template
+    if not isinstance(response.content, str) or not response.content.strip():
+        return template
+    message = str(response.content)
+
+    rewrite_cache.put(key, message)
+    return _step_prefix(consequence_data) + message
@@ -0,0 +1,207 @@
+"""
+Fake Chat Model for Offline Runs
+Deterministic stand-in for ChatOpenAI (scripted, recorded or heuristic replies with simulated latency),
+plus a recorder that captures live replies for later replay
+"""
+import asyncio
+import hashlib
+import json
+import os
+import re
+import threading
+import time
+from typing import Any, AsyncIterator, Dict, Iterator, List, Optional
+from uuid import UUID
+from langchain_core.callbacks import BaseCallbackHandler
+from langchain_core.language_models.chat_models import BaseChatModel
+from langchain_core.messages import AIMessage, AIMessageChunk, BaseMessage
+from langchain_core.messages.ai import UsageMetadata
+from langchain_core.outputs import ChatGeneration, ChatGenerationChunk, ChatResult, LLMResult
+from pydantic import PrivateAttr
+
+# Simulated model time per call and per streamed chunk
+FAKE_LLM_LATENCY_MS = float(os.getenv("MOVI_FAKE_LLM_LATENCY_MS", "0"))
+FAKE_LLM_TOKEN_DELAY_MS = float(os.getenv("MOVI_FAKE_LLM_TOKEN_DELAY_MS", "0"))
+# JSONL of {"prompt_hash", "response"} written by ResponseRecorder
+FAKE_LLM_RECORDINGS = os.getenv("MOVI_FAKE_LLM_RECORDINGS", "")
+
+DEFAULT_RESPONSE = "Done. Here is the information you asked for."
+
+# "- get_all_vehicles: description" lines of the intent prompt
+_TOOL_LINE = re.compile(r"^- (\w+):", re.MULTILINE)
+_WORD = re.compile(r"[a-z]+")
+
+
+def prompt_hash(messages: List[BaseMessage]) -> str:
+    """Stable hash of a prompt (message roles and contents)."""
+    payload = json.dumps([[m.type, m.content] for m in messages], sort_keys=True, default=str)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+def load_recordings(path: str) -> Dict[str, str]:
+    """Prompt hash → reply from a ResponseRecorder JSONL file."""
+    recordings = {}
+    with open(path, "r", encoding="utf-8") as f:
+        for line in f:
+            if line.strip():
+                record = json.loads(line)
+                recordings[record["prompt_hash"]] = record["response"]
+    return recordings
+
+
+def _singular(word: str) -> str:
+    return word[:-1] if word.endswith("s") and len(word) > 3 else word
+
+
+def heuristic_intent(messages: List[BaseMessage]) -> str:
+    """
+    Intent classifier reply without a model: pick the listed tool whose
+    name shares the most words with the user's message.
+    """
+    system = str(messages[0].content) if messages else ""
+    user = next((str(m.content) for m in reversed(messages) if m.type == "human"), "")
+    words = {_singular(w) for w in _WORD.findall(user.lower())}
+
+    best, best_score = None, 0
+    for tool in _TOOL_LINE.findall(system):
+        score = len(words & {_singular(part) for part in tool.split("_")})
+        if score > best_score:
+            best, best_score = tool, score
+    return json.dumps({"intent": "fake", "tool_name": best, "entities": {}})
+
+
+class FakeChatModel(BaseChatModel):
+    """
+    Deterministic chat model.
+
+    Reply resolution, first match wins:
+        1. `recordings` (prompt hash → reply, see ResponseRecorder)
+        2. `script[node]`, replies for that graph node used in order (last one repeats)
+        3. a keyword heuristic for the intent classifier, DEFAULT_RESPONSE otherwise
+
+    Every call sleeps `latency_ms` (async calls without blocking the loop);
+    streaming yields one chunk per word, `token_delay_ms` apart. Usage
+    metadata counts words, so token accounting works offline.
+    """
+
+    model_name: str = "fake-llm"
+    latency_ms: float = FAKE_LLM_LATENCY_MS
+    token_delay_ms: float = FAKE_LLM_TOKEN_DELAY_MS
+    script: Dict[str, List[str]] = {}
+    recordings: Dict[str, str] = {}
+    calls: int = 0
+    # Next script index per node
+    _positions: Dict[str, int] = PrivateAttr(default_factory=dict)
+
+    @property
+    def _llm_type(self) -> str:
+        return "movi-fake"
+
+    @property
+    def _identifying_params(self) -> Dict[str, Any]:
+        return {"model_name": self.model_name}
+
+    def _node(self, run_manager: Any, messages: List[BaseMessage]) -> str:
+        node = (getattr(run_manager, "metadata", None) or {}).get("langgraph_node")
+        if node:
+            return str(node)
+        system = str(messages[0].content) if messages else ""
+        return "intent" if "intent classifier" in system else "response"
+
+    def reply(self, messages: List[BaseMessage], run_manager: Any = None) -> str:
+        """The reply for this prompt (see class docstring)."""
+        self.calls += 1
+        recorded = self.recordings.get(prompt_hash(messages)) if self.recordings else None
+        if recorded is not None:
+            return recorded
+        node = self._node(run_manager, messages)
+        replies = self.script.get(node)
+        if replies:
+            index = self._positions.get(node, 0)
+            self._positions[node] = index + 1
+            return replies[min(index, len(replies) - 1)]
+        if node == "intent":
+            return heuristic_intent(messages)
+        return DEFAULT_RESPONSE
+
+    @staticmethod
+    def _usage(messages: List[BaseMessage], text: str) -> UsageMetadata:
+        prompt = sum(len(str(m.content).split()) for m in messages)
+        completion = len(text.split())
+        return UsageMetadata(input_tokens=prompt, output_tokens=completion, total_tokens=prompt + completion)
+
+    def _generate(self, messages: List[BaseMessage], stop: Optional[List[str]] = None, run_manager: Any = None, **kwargs: Any) -> ChatResult:
+        time.sleep(self.latency_ms / 1000)
+        text = self.reply(messages, run_manager)
+        message = AIMessage(content=text, usage_metadata=self._usage(messages, text))
+        return ChatResult(generations=[ChatGeneration(message=message)])
+
+    async def _agenerate(self, messages: List[BaseMessage], stop: Optional[List[str]] = None, run_manager: Any = None, **kwargs: Any) -> ChatResult:
+        await asyncio.sleep(self.latency_ms / 1000)
+        text = self.reply(messages, run_manager)
+        message = AIMessage(content=text, usage_metadata=self._usage(messages, text))
+        return ChatResult(generations=[ChatGeneration(message=message)])
+
+    def _chunks(self, messages: List[BaseMessage], text: str) -> List[ChatGenerationChunk]:
+        words = re.findall(r"\S+\s*", text) or [text]
+        chunks = [ChatGenerationChunk(message=AIMessageChunk(content=word)) for word in words]
+        # Usage on the last chunk, like OpenAI with stream_usage
+        chunks[-1] = ChatGenerationChunk(message=AIMessageChunk(
+            content=chunks[-1].message.content, usage_metadata=self._usage(messages, text)
+        ))
+        return chunks
+
+    def _stream(self, messages: List[BaseMessage], stop: Optional[List[str]] = None, run_manager: Any = None, **kwargs: Any) -> Iterator[ChatGenerationChunk]:
+        time.sleep(self.latency_ms / 1000)
+        for chunk in self._chunks(messages, self.reply(messages, run_manager)):
+            if run_manager:
+                run_manager.on_llm_new_token(chunk.message.content, chunk=chunk)
+            yield chunk
+            time.sleep(self.token_delay_ms / 1000)
+
+    async def _astream(self, messages: List[BaseMessage], stop: Optional[List[str]] = None, run_manager: Any = None, **kwargs: Any) -> AsyncIterator[ChatGenerationChunk]:
+        await asyncio.sleep(self.latency_ms / 1000)
+        for chunk in self._chunks(messages, self.reply(messages, run_manager)):
+            if run_manager:
+                await run_manager.on_llm_new_token(chunk.message.content, chunk=chunk)
+            yield chunk
+            await asyncio.sleep(self.token_delay_ms / 1000)
+
+
+def create_fake_chat_model(model: str = "fake-llm", **kwargs: Any) -> FakeChatModel:
+    """FakeChatModel configured from the MOVI_FAKE_LLM_* environment."""
+    recordings = load_recordings(FAKE_LLM_RECORDINGS) if FAKE_LLM_RECORDINGS else {}
+    return FakeChatModel(model_name=model, recordings=recordings, **kwargs)
+
+
+class ResponseRecorder(BaseCallbackHandler):
+    """
+    Appends {"prompt_hash", "response"} for every live chat model call to a
+    JSONL file, so a run against OpenAI can be replayed offline with
+    MOVI_FAKE_LLM_RECORDINGS.
+    """
+
+    run_inline = True
+
+    def __init__(self, path: str):
+        self.path = path
+        self._prompts: Dict[UUID, str] = {}
+        self._lock = threading.Lock()
+
+    def on_chat_model_start(
+        self,
+        serialized: Dict[str, Any],
+        messages: List[List[BaseMessage]],
+        *,
+        run_id: UUID,
+        **kwargs: Any,
+    ) -> None:
+        self._prompts[run_id] = prompt_hash(messages[0])
+
+    def on_llm_end(self, response: LLMResult, *, run_id: UUID, **kwargs: Any) -> None:
+        key = self._prompts.pop(run_id, None)
+        if key is None:
+            return
+        text = response.generations[0][0].text if response.generations and response.generations[0] else ""
+        with self._lock, open(self.path, "a", encoding="utf-8") as f:
+            f.write(json.dumps({"prompt_hash": key, "response": text}) + "\n")
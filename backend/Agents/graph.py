@@ -2,8 +2,19 @@ import os
 from typing import Any, List, Optional
 from langchain_openai import ChatOpenAI
 from langchain_core.tools import BaseTool
-from Agents.nodes import intent_node, response_node, consequence_node, tool_call_node
+from langchain_core.runnables import RunnableConfig, RunnableLambda
+from Agents.clients import create_chat_model
+from Agents.nodes import (
+    intent_node,
+    aintent_node,
+    response_node,
+    aresponse_node,
+    consequence_node,
+    tool_call_node,
+    atool_call_node,
+)
 from Agents.tools import ALL_TOOLS
+from Agents.telemetry import timed_node
 from langgraph.graph import StateGraph, END
 from langgraph.checkpoint.memory import MemorySaver
 from Agents.state import MoviState
@@ -39,11 +50,33 @@ def build_movi_graph(llm: ChatOpenAI, ALL_TOOLS: List[BaseTool]) -> Any:
 
     graph = StateGraph(MoviState)
 
-    # 1. Add nodes
-    graph.add_node("intent", lambda s: intent_node(s, llm, ALL_TOOLS))
-    graph.add_node("consequence", consequence_node)
-    graph.add_node("tool_call", lambda s: tool_call_node(s, ALL_TOOLS))
-    graph.add_node("response", lambda s: response_node(s, llm))
+    # Async callables for ainvoke/astream_events (native ainvoke, no event-loop blocking)
+    async def _aintent(s: MoviState, config: RunnableConfig) -> MoviState:
+        return await aintent_node(s, llm, ALL_TOOLS, config)
+
+    async def _atool_call(s: MoviState, config: RunnableConfig) -> MoviState:
+        return await atool_call_node(s, ALL_TOOLS, config)
+
+    async def _aresponse(s: MoviState, config: RunnableConfig) -> MoviState:
+        return await aresponse_node(s, llm, config)
+
+    # 1. Add nodes (sync func for invoke, async func for ainvoke/astream)
+    # consequence_node stays sync: interrupt() relies on context propagation that
+    # async nodes only get on Python 3.11+, and LangGraph runs it in an executor.
+    # Every node is wrapped with timed_node for local wall-time/interrupt metrics.
+    graph.add_node("intent", RunnableLambda(
+        timed_node("intent", lambda s: intent_node(s, llm, ALL_TOOLS)),
+        afunc=timed_node("intent", _aintent)
+    ))
+    graph.add_node("consequence", timed_node("consequence", consequence_node))
+    graph.add_node("tool_call", RunnableLambda(
+        timed_node("tool_call", lambda s: tool_call_node(s, ALL_TOOLS)),
+        afunc=timed_node("tool_call", _atool_call)
+    ))
+    graph.add_node("response", RunnableLambda(
+        timed_node("response", lambda s: response_node(s, llm)),
+        afunc=timed_node("response", _aresponse)
+    ))
 
     # 2. Entry → Intent
     graph.set_entry_point("intent")
@@ -67,8 +100,8 @@ def build_movi_graph(llm: ChatOpenAI, ALL_TOOLS: List[BaseTool]) -> Any:
     checkpointer = MemorySaver()
     return graph.compile(checkpointer=checkpointer)
 
-# Initialize LLM with tracing metadata
-llm = ChatOpenAI(
+# Initialize LLM with tracing metadata (shared connection-pooled HTTP clients)
+llm = create_chat_model(
     model="gpt-4o-mini",
     temperature=0,
     model_kwargs={
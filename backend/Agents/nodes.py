@@ -2,78 +2,47 @@ from typing import List, Dict, Any, Optional, Union
 from langchain_core.messages import SystemMessage, HumanMessage, AIMessage, BaseMessage
 from langchain_openai import ChatOpenAI
 from langchain_core.tools import BaseTool
+from langchain_core.runnables import RunnableConfig
 from langgraph.types import interrupt, Command
+import asyncio
+import contextvars
 import json
-from Agents.tools import ALL_TOOLS, get_tools_for_page
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+from Agents.vision import analyze_image, aanalyze_image, needs_visual_reasoning
+from Agents.tools import ALL_TOOLS, READ_ONLY_TOOLS, get_tools_for_page
 from database import SessionLocal
 from database import get_db
 from Agents.state import MoviState
+from Agents.telemetry import record_tool
+from Agents.session_locks import track_work
+from utils.db_routing import routed
 
-def intent_node(state: MoviState, llm: ChatOpenAI, ALL_TOOLS: List[BaseTool]) -> MoviState:
-    """
-    First Node: Intent Classification
 
-    Inputs in state:
-        - user_msg
-        - current_page
-        - messages (history)
+def _apply_image_analysis(state: MoviState, user_msg: str, image_description: Any) -> str:
+    """Store the image analysis in state and append it to the user message."""
+    # Store the text description and clear the base64 (save memory)
+    state["image_content"] = image_description
+    state["image_base64"] = None  # Clear base64 after processing
 
-    Outputs added to state:
-        - intent
-        - tool_name
-        - entities
-        - messages (updated)
+    # Append image analysis to user message
+    return f"{user_msg}\n\n[Image Analysis: {image_description}]"
+
+
+def _build_intent_messages(
+    state: MoviState,
+    user_msg: str,
+    messages: List[BaseMessage],
+    has_image: bool
+) -> List[BaseMessage]:
     """
+    Append the user message to history and build the intent classifier prompt.
 
-    user_msg = state["user_msg"]
+    Returns:
+        Messages to send to the LLM (system prompt + history)
+    """
     current_page = state["current_page"]
-    image_base64 = state.get("image_base64")  # Optional image input
-
-    # Initialize history if missing
-    messages = state.get("messages", [])
-    if messages is None:
-        messages = []
-    
-    # ---- Image Analysis (if provided) ----
-    if image_base64:
-        # Use GPT-4o (full model) for better vision and OCR capabilities
-        vision_llm = ChatOpenAI(model="gpt-4o", temperature=0)
-        
-        vision_message = HumanMessage(
-            content=[
-                {
-                    "type": "text", 
-                    "text": """Analyze this image carefully and extract ALL text and information visible.
-
-Pay special attention to:
-1. ANY highlighted, circled, or marked items (these are MOST IMPORTANT)
-2. Trip names, IDs, and identifiers
-3. Status indicators (SCHEDULED, IN-PROGRESS, UNKNOWN, etc.)
-4. Booking percentages
-5. Times and schedules
-6. Any arrows or visual emphasis
-
-Provide a detailed description focusing on what the user wants to highlight or draw attention to. If there are circles, arrows, or highlighting, mention those items FIRST and PROMINENTLY."""
-                },
-                {
-                    "type": "image_url",
-                    "image_url": {"url": f"data:image/jpeg;base64,{image_base64}"}
-                }
-            ]
-        )
-        
-        # Call vision-capable LLM (gpt-4o for better OCR)
-        vision_response = vision_llm.invoke([vision_message])
-        image_description = vision_response.content
-        
-        # Store the text description and clear the base64 (save memory)
-        state["image_content"] = image_description
-        state["image_base64"] = None  # Clear base64 after processing
-        
-        # Append image analysis to user message
-        user_msg = f"{user_msg}\n\n[Image Analysis: {image_description}]"
-    else:
-        state["image_content"] = None
 
     # 1. Add user message to chat history
     messages.append(HumanMessage(content=user_msg))
@@ -88,7 +57,7 @@ Provide a detailed description focusing on what the user wants to highlight or d
     ])
 
     # 3. System prompt for LLM - conditionally include image instructions
-    if image_base64 or state.get("image_content"):
+    if has_image or state.get("image_content"):
         # Include image-specific instructions only when image is present
         system_prompt = f"""
 You are Movi's intent classifier.
@@ -116,6 +85,10 @@ Respond ONLY with JSON:
   "entities": {{ ... }}
 }}
 
+If the user asks for several actions in one message, also include every step in order:
+
+  "tool_calls": [{{"tool_name": "...", "entities": {{ ... }}}}, ...]
+
 Current Page: {current_page}
 
 Available Tools:
@@ -144,6 +117,10 @@ Respond ONLY with JSON:
   "entities": {{ ... }}
 }}
 
+If the user asks for several actions in one message, also include every step in order:
+
+  "tool_calls": [{{"tool_name": "...", "entities": {{ ... }}}}, ...]
+
 Current Page: {current_page}
 
 Available Tools:
@@ -151,14 +128,39 @@ Available Tools:
 """
 
     # 4. LLM input
-    llm_messages = [
+    return [
         SystemMessage(content=system_prompt),
         *messages
     ]
 
-    # 5. Call the LLM
-    llm_response = llm.invoke(llm_messages)
 
+def _parse_tool_calls(parsed: Dict[str, Any]) -> List[Dict[str, Any]]:
+    """
+    Normalize the classifier output into an ordered list of tool calls.
+    Falls back to the single tool_name/entities pair when no plan is given.
+    """
+    raw_calls = parsed.get("tool_calls")
+    tool_calls: List[Dict[str, Any]] = []
+
+    if isinstance(raw_calls, list):
+        for call in raw_calls:
+            if isinstance(call, dict) and call.get("tool_name"):
+                tool_calls.append({
+                    "tool_name": call["tool_name"],
+                    "entities": call.get("entities") or {}
+                })
+
+    if not tool_calls and parsed.get("tool_name"):
+        tool_calls.append({
+            "tool_name": parsed["tool_name"],
+            "entities": parsed.get("entities") or {}
+        })
+
+    return tool_calls
+
+
+def _apply_intent_response(state: MoviState, llm_response: Any, messages: List[BaseMessage]) -> MoviState:
+    """Parse the classifier output and write intent, tool_name and entities to state."""
     # 6. Parse safely
     try:
         parsed = json.loads(str(llm_response.content))
@@ -169,6 +171,12 @@ Available Tools:
     state["intent"] = parsed.get("intent")
     state["tool_name"] = parsed.get("tool_name")
     state["entities"] = parsed.get("entities", {})
+    state["tool_calls"] = _parse_tool_calls(parsed)
+
+    # Keep tool_name/entities in sync with the first planned step
+    if state["tool_calls"]:
+        state["tool_name"] = state["tool_calls"][0]["tool_name"]
+        state["entities"] = state["tool_calls"][0]["entities"]
 
     # 8. Update chat history
     messages.append(AIMessage(content=llm_response.content))
@@ -177,6 +185,80 @@ Available Tools:
     return state
 
 
+def intent_node(state: MoviState, llm: ChatOpenAI, ALL_TOOLS: List[BaseTool]) -> MoviState:
+    """
+    First Node: Intent Classification
+
+    Inputs in state:
+        - user_msg
+        - current_page
+        - messages (history)
+
+    Outputs added to state:
+        - intent
+        - tool_name
+        - entities
+        - messages (updated)
+    """
+
+    user_msg = state["user_msg"]
+    image_base64 = state.get("image_base64")  # Optional image input
+
+    # Initialize history if missing
+    messages = state.get("messages", [])
+    if messages is None:
+        messages = []
+    
+    # ---- Image Analysis (if provided) ----
+    if image_base64:
+        # Local OCR first; shared vision client (gpt-4o) on a downscaled image
+        # when OCR is not confident or the user refers to circled/highlighted items.
+        # Identical screenshots reuse the cached analysis.
+        image_description = analyze_image(image_base64, allow_ocr=not needs_visual_reasoning(user_msg))
+        user_msg = _apply_image_analysis(state, user_msg, image_description)
+    else:
+        state["image_content"] = None
+
+    llm_messages = _build_intent_messages(state, user_msg, messages, bool(image_base64))
+
+    # 5. Call the LLM
+    llm_response = llm.invoke(llm_messages)
+
+    return _apply_intent_response(state, llm_response, messages)
+
+
+async def aintent_node(
+    state: MoviState,
+    llm: ChatOpenAI,
+    ALL_TOOLS: List[BaseTool],
+    config: Optional[RunnableConfig] = None
+) -> MoviState:
+    """
+    Async variant of intent_node used when the graph is driven with
+    ainvoke/astream_events. Uses ainvoke so the event loop is never blocked.
+    """
+
+    user_msg = state["user_msg"]
+    image_base64 = state.get("image_base64")
+
+    messages = state.get("messages", [])
+    if messages is None:
+        messages = []
+
+    if image_base64:
+        image_description = await aanalyze_image(
+            image_base64, config=config, allow_ocr=not needs_visual_reasoning(user_msg)
+        )
+        user_msg = _apply_image_analysis(state, user_msg, image_description)
+    else:
+        state["image_content"] = None
+
+    llm_messages = _build_intent_messages(state, user_msg, messages, bool(image_base64))
+    llm_response = await llm.ainvoke(llm_messages, config)
+
+    return _apply_intent_response(state, llm_response, messages)
+
+
 
 from sqlalchemy.orm import Session
 
@@ -198,32 +280,26 @@ HIGH_IMPACT_TOOLS = {
     "delete_deployment",
 }
 
+CANCELLED_RESULT = "Action cancelled by user."
 
-def consequence_node(state: MoviState) -> MoviState:
-    """
-    Second Node: Consequence Checker with LangGraph Interrupt
-
-    Reads:
-        state.tool_name
-        state.entities
 
-    Uses LangGraph's interrupt() to pause execution and wait for human approval.
-    For ANY tool in HIGH_IMPACT_TOOLS, this will trigger interrupt().
-    Fetches actual consequences from database and stores them in state for AI to generate alert.
+def _plan_steps(state: MoviState) -> List[Dict[str, Any]]:
     """
+    Ordered tool calls for this turn.
+    Uses state.tool_calls when present, otherwise the single tool_name/entities pair.
+    """
+    tool_calls = state.get("tool_calls")
+    if tool_calls is not None:
+        return list(tool_calls)
 
-    tool_name: Optional[str] = state.get("tool_name")
-    entities: Dict[str, Any] = state.get("entities", {})
-
-    # ---- 1. Default: no consequences ----
-    state["consequences"] = None
-    state["awaiting_confirmation"] = False
+    tool_name = state.get("tool_name")
+    if not tool_name:
+        return []
+    return [{"tool_name": tool_name, "entities": state.get("entities") or {}}]
 
-    # ---- 2. If tool is NOT high-impact → done ----
-    if tool_name not in HIGH_IMPACT_TOOLS:
-        return state
 
-    # ---- 3. Tool IS high-impact → Fetch consequence details from DB ----
+def _fetch_consequences(tool_name: str, entities: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+    """Fetch consequence details for a high-impact tool call from the database."""
     db: Session = SessionLocal()
     consequence_data = None
     
@@ -252,36 +328,208 @@ def consequence_node(state: MoviState) -> MoviState:
                         "tool_name": tool_name,
                         "affected_entity": route_name
                     }
-        
-        db.close()
-    except Exception as e:
-        db.close()
+    except Exception:
         consequence_data = None
+    finally:
+        db.close()
 
-    # ---- 4. Store consequences in state for AI to process ----
-    state["consequences"] = consequence_data
-    
-    # ---- 5. ALWAYS trigger HITL interrupt for high-impact tools ----
-    is_approved = interrupt(consequence_data or {
-        "type": "confirmation_required",
-        "tool_name": tool_name,
-        "entities": entities
-    })
-
-    # When resumed with Command(resume=True/False), execution continues here
-    # If user rejected, cancel the tool
-    if not is_approved:
-        state["tool_name"] = None
-        state["tool_result"] = "Action cancelled by user."
-        state["consequences"] = None
+    return consequence_data
+
+
+def consequence_node(state: MoviState) -> MoviState:
+    """
+    Second Node: Consequence Checker with LangGraph Interrupt
+
+    Reads:
+        state.tool_calls (or state.tool_name / state.entities)
+
+    Uses LangGraph's interrupt() to pause execution and wait for human approval.
+    For ANY step in HIGH_IMPACT_TOOLS, this will trigger interrupt() - once per step,
+    so a multi-step plan asks for approval of each high-impact action separately.
+    Fetches actual consequences from database and stores them in state for AI to generate alert.
+    """
+
+    steps = _plan_steps(state)
+
+    # ---- 1. Default: no consequences ----
+    state["consequences"] = None
+    state["awaiting_confirmation"] = False
+
+    # ---- 2. If no step is high-impact → done ----
+    if not any(step["tool_name"] in HIGH_IMPACT_TOOLS for step in steps):
         return state
 
-    # If approved, continue with the tool execution
+    reviewed_steps: List[Dict[str, Any]] = []
+
+    for index, step in enumerate(steps):
+        tool_name = step["tool_name"]
+        entities = step.get("entities") or {}
+
+        if tool_name not in HIGH_IMPACT_TOOLS:
+            reviewed_steps.append(step)
+            continue
+
+        # ---- 3. Step IS high-impact → Fetch consequence details from DB ----
+        consequence_data = _fetch_consequences(tool_name, entities)
+
+        # ---- 4. Store consequences in state for AI to process ----
+        state["consequences"] = consequence_data
+
+        payload = consequence_data or {
+            "type": "confirmation_required",
+            "tool_name": tool_name,
+            "entities": entities
+        }
+        if len(steps) > 1:
+            payload = {**payload, "step": index + 1, "total_steps": len(steps)}
+
+        # ---- 5. ALWAYS trigger HITL interrupt for high-impact steps ----
+        # When resumed with Command(resume=True/False), execution continues here
+        is_approved = interrupt(payload)
+
+        # Rejected steps stay in the plan (marked cancelled) so results keep plan order
+        reviewed_steps.append(step if is_approved else {**step, "cancelled": True})
+
+    approved_steps = [step for step in reviewed_steps if not step.get("cancelled")]
     state["consequences"] = None
     state["awaiting_confirmation"] = False
+
+    # If user rejected every step, cancel the tool
+    if not approved_steps:
+        state["tool_calls"] = []
+        state["tool_name"] = None
+        state["tool_result"] = CANCELLED_RESULT
+        return state
+
+    state["tool_calls"] = reviewed_steps
+    state["tool_name"] = approved_steps[0]["tool_name"]
+    state["entities"] = approved_steps[0].get("entities") or {}
     return state
 
 
+def _find_tool(tool_name: str, ALL_TOOLS: List[BaseTool]) -> Optional[BaseTool]:
+    """Find a tool by exact name."""
+    for t in ALL_TOOLS:
+        if t.name == tool_name:
+            return t
+    return None
+
+
+def _normalize_entities(entities: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Normalize entities to match tool parameter names.
+    The LLM may extract "trip_name" but tools expect "trip_display_name".
+    """
+    normalized_entities = entities.copy()
+    
+    # Map trip_name/trip -> trip_display_name
+    if "trip_name" in normalized_entities and "trip_display_name" not in normalized_entities:
+        normalized_entities["trip_display_name"] = normalized_entities.pop("trip_name")
+    elif "trip" in normalized_entities and "trip_display_name" not in normalized_entities:
+        normalized_entities["trip_display_name"] = normalized_entities.pop("trip")
+    
+    # Map route_name/route -> route_display_name
+    if "route_name" in normalized_entities and "route_display_name" not in normalized_entities:
+        normalized_entities["route_display_name"] = normalized_entities.pop("route_name")
+    elif "route" in normalized_entities and "route_display_name" not in normalized_entities:
+        normalized_entities["route_display_name"] = normalized_entities.pop("route")
+
+    return normalized_entities
+
+
+# Thread pool for running independent read-only tools of a plan concurrently
+MAX_PARALLEL_TOOLS = int(os.getenv("MOVI_MAX_PARALLEL_TOOLS", "4"))
+_tool_executor = ThreadPoolExecutor(max_workers=MAX_PARALLEL_TOOLS, thread_name_prefix="movi-tool")
+
+
+def _execute_tool(tool_name: str, entities: Dict[str, Any], ALL_TOOLS: List[BaseTool]) -> Any:
+    """Run one tool by name and return its output (errors are returned as text)."""
+    # 1. Find the tool by exact name
+    tool = _find_tool(tool_name, ALL_TOOLS)
+
+    # If no matching tool
+    if tool is None:
+        return f"Error: Tool '{tool_name}' not found."
+
+    started = time.perf_counter()
+    status = "ok"
+    try:
+        # 2. Call the tool with normalized entities (read-only tools on a replica)
+        with routed(tool.name in READ_ONLY_TOOLS):
+            return tool.invoke(_normalize_entities(entities))
+    except Exception as e:
+        status = "error"
+        return f"Tool execution failed: {str(e)}"
+    finally:
+        record_tool(tool.name, time.perf_counter() - started, status)
+
+
+async def _aexecute_tool(
+    tool_name: str,
+    entities: Dict[str, Any],
+    ALL_TOOLS: List[BaseTool],
+    config: Optional[RunnableConfig] = None
+) -> Any:
+    """Async variant of _execute_tool (sync tools run in the executor via ainvoke)."""
+    tool = _find_tool(tool_name, ALL_TOOLS)
+    if tool is None:
+        return f"Error: Tool '{tool_name}' not found."
+
+    started = time.perf_counter()
+    status = "ok"
+    try:
+        with routed(tool.name in READ_ONLY_TOOLS):
+            # A cancelled turn cannot stop the executor thread; the session
+            # lock is held until the call really ends (see SessionLease.track)
+            call = asyncio.ensure_future(tool.ainvoke(_normalize_entities(entities), config))
+            track_work(call)
+            return await asyncio.shield(call)
+    except Exception as e:
+        status = "error"
+        return f"Tool execution failed: {str(e)}"
+    finally:
+        record_tool(tool.name, time.perf_counter() - started, status)
+
+
+def _plan_batches(steps: List[Dict[str, Any]]) -> List[List[Dict[str, Any]]]:
+    """
+    Split a plan into execution batches that preserve ordering semantics.
+
+    Consecutive read-only steps form one batch and may run concurrently;
+    every write step is its own batch, so writes run in order and reads
+    planned after a write see its effect. Cancelled steps are skipped.
+    """
+    batches: List[List[Dict[str, Any]]] = []
+    for step in steps:
+        if step.get("cancelled"):
+            continue
+        is_read = step["tool_name"] in READ_ONLY_TOOLS
+        if is_read and batches and batches[-1][0]["tool_name"] in READ_ONLY_TOOLS:
+            batches[-1].append(step)
+        else:
+            batches.append([step])
+    return batches
+
+
+def _collect_results(steps: List[Dict[str, Any]], outputs: Dict[int, Any]) -> List[Dict[str, Any]]:
+    """Per-step results in plan order (outputs keyed by id() of the step dict)."""
+    return [
+        {
+            "tool_name": step["tool_name"],
+            "result": CANCELLED_RESULT if step.get("cancelled") else outputs.get(id(step))
+        }
+        for step in steps
+    ]
+
+
+def _summarize_results(results: List[Dict[str, Any]]) -> str:
+    """Combine per-step results into one tool_result for the response node."""
+    return "\n\n".join(
+        f"[{i}] {r['tool_name']}:\n{r['result']}"
+        for i, r in enumerate(results, start=1)
+    )
+
+
 def tool_call_node(state: MoviState, ALL_TOOLS: List[BaseTool]) -> MoviState:
     """
     Generic Tool Executor
@@ -290,55 +538,82 @@ def tool_call_node(state: MoviState, ALL_TOOLS: List[BaseTool]) -> MoviState:
     - Stores the result
 
     ALL_TOOLS can contain any number of tools.
+    For multi-step plans, independent read-only steps run concurrently in a
+    thread pool and writes run in order; per-step output goes to tool_results.
     """
 
+    steps = _plan_steps(state)
+
+    if len(steps) > 1:
+        outputs: Dict[int, Any] = {}
+        for batch in _plan_batches(steps):
+            if len(batch) > 1:
+                futures = {
+                    id(step): _tool_executor.submit(
+                        contextvars.copy_context().run,
+                        _execute_tool, step["tool_name"], step.get("entities") or {}, ALL_TOOLS
+                    )
+                    for step in batch
+                }
+                outputs.update({key: f.result() for key, f in futures.items()})
+            else:
+                step = batch[0]
+                outputs[id(step)] = _execute_tool(step["tool_name"], step.get("entities") or {}, ALL_TOOLS)
+
+        results = _collect_results(steps, outputs)
+        state["tool_results"] = results
+        state["tool_result"] = _summarize_results(results)
+        return state
+
     tool_name: Optional[str] = state.get("tool_name")
-    entities: Dict[str, Any] = state.get("entities", {})
-    state["tool_result"] = None
+    entities: Dict[str, Any] = state.get("entities") or {}
 
+    # Nothing to run (no tool, or every step rejected): keep the
+    # consequence node's cancellation result for the response node
     if not tool_name:
         return state
 
-    # 1. Find the tool by exact name
-    tool = None
-    for t in ALL_TOOLS:
-        if t.name == tool_name:
-            tool = t
-            break
+    # 3. Save tool output
+    state["tool_result"] = _execute_tool(tool_name, entities, ALL_TOOLS)
+    return state
 
-    # If no matching tool
-    if tool is None:
-        state["tool_result"] = f"Error: Tool '{tool_name}' not found."
-        return state
 
-    try:
-        # 2. Normalize entities to match tool parameter names
-        # The LLM may extract "trip_name" but tools expect "trip_display_name"
-        normalized_entities = entities.copy()
-        
-        # Map trip_name/trip -> trip_display_name
-        if "trip_name" in normalized_entities and "trip_display_name" not in normalized_entities:
-            normalized_entities["trip_display_name"] = normalized_entities.pop("trip_name")
-        elif "trip" in normalized_entities and "trip_display_name" not in normalized_entities:
-            normalized_entities["trip_display_name"] = normalized_entities.pop("trip")
-        
-        # Map route_name/route -> route_display_name
-        if "route_name" in normalized_entities and "route_display_name" not in normalized_entities:
-            normalized_entities["route_display_name"] = normalized_entities.pop("route_name")
-        elif "route" in normalized_entities and "route_display_name" not in normalized_entities:
-            normalized_entities["route_display_name"] = normalized_entities.pop("route")
-        
-        # Call the tool with normalized entities
-        result = tool.invoke(normalized_entities)
+async def atool_call_node(
+    state: MoviState,
+    ALL_TOOLS: List[BaseTool],
+    config: Optional[RunnableConfig] = None
+) -> MoviState:
+    """
+    Async variant of tool_call_node.
+    Sync tools are executed off the event loop by BaseTool.ainvoke, and the
+    read-only steps of a batch are awaited together with asyncio.gather.
+    """
+
+    steps = _plan_steps(state)
+
+    if len(steps) > 1:
+        outputs: Dict[int, Any] = {}
+        for batch in _plan_batches(steps):
+            batch_outputs = await asyncio.gather(*[
+                _aexecute_tool(step["tool_name"], step.get("entities") or {}, ALL_TOOLS, config)
+                for step in batch
+            ])
+            outputs.update({id(step): output for step, output in zip(batch, batch_outputs)})
 
-        # 3. Save tool output
-        state["tool_result"] = result
+        results = _collect_results(steps, outputs)
+        state["tool_results"] = results
+        state["tool_result"] = _summarize_results(results)
         return state
 
-    except Exception as e:
-        state["tool_result"] = f"Tool execution failed: {str(e)}"
+    tool_name: Optional[str] = state.get("tool_name")
+    entities: Dict[str, Any] = state.get("entities") or {}
+
+    if not tool_name:
         return state
 
+    state["tool_result"] = await _aexecute_tool(tool_name, entities, ALL_TOOLS, config)
+    return state
+
 
 # NOTE: confirmation_response_node and human_confirmation_node have been removed
 # They are replaced by the interrupt() mechanism in consequence_node
@@ -347,24 +622,8 @@ def tool_call_node(state: MoviState, ALL_TOOLS: List[BaseTool]) -> MoviState:
 
 from langchain_core.messages import SystemMessage, HumanMessage, AIMessage
 
-def response_node(state: MoviState, llm: ChatOpenAI) -> MoviState:
-    """
-    Final Response Node
-    Uses the LLM to generate the assistant's final reply to the user.
-
-    Input State:
-        - messages (chat history)
-        - tool_result (optional)
-        - consequences (optional)
-        - current_page
-        - intent
-
-    Output:
-        - LLM reply appended to state.messages
-        - state["response"] (string)
-    """
-
-    messages: List[BaseMessage] = state.get("messages", [])
+def _build_response_messages(state: MoviState, messages: List[BaseMessage]) -> List[BaseMessage]:
+    """Build the system prompt + history sent to the response LLM."""
 
     # 1. Build system instructions
     system_prompt = f"""
@@ -386,15 +645,14 @@ Rules:
     """
 
     # 2. Build LLM messages
-    llm_messages = [
+    return [
         SystemMessage(content=system_prompt),
         *messages
     ]
 
-    # 3. Invoke LLM
-    output = llm.invoke(llm_messages)
 
-    # 4. Save final assistant message
+def _apply_response(state: MoviState, output: Any, messages: List[BaseMessage]) -> MoviState:
+    """Append the assistant reply to history and store it on state."""
     assistant_msg = AIMessage(content=output.content)
     messages.append(assistant_msg)
 
@@ -402,3 +660,44 @@ Rules:
     state["response"] = output.content
 
     return state
+
+
+def response_node(state: MoviState, llm: ChatOpenAI) -> MoviState:
+    """
+    Final Response Node
+    Uses the LLM to generate the assistant's final reply to the user.
+
+    Input State:
+        - messages (chat history)
+        - tool_result (optional)
+        - consequences (optional)
+        - current_page
+        - intent
+
+    Output:
+        - LLM reply appended to state.messages
+        - state["response"] (string)
+    """
+
+    messages: List[BaseMessage] = state.get("messages", [])
+
+    # 3. Invoke LLM
+    output = llm.invoke(_build_response_messages(state, messages))
+
+    # 4. Save final assistant message
+    return _apply_response(state, output, messages)
+
+
+async def aresponse_node(
+    state: MoviState,
+    llm: ChatOpenAI,
+    config: Optional[RunnableConfig] = None
+) -> MoviState:
+    """
+    Async variant of response_node.
+    Passing config through keeps token streaming visible to astream_events.
+    """
+
+    messages: List[BaseMessage] = state.get("messages", [])
+    output = await llm.ainvoke(_build_response_messages(state, messages), config)
+    return _apply_response(state, output, messages)
@@ -0,0 +1,238 @@
+"""
+Movi Agent Runtime
+Single async entry point for running the graph: state loading, history trimming, interrupts/resume,
+streaming and per-session locking, with output adapters for text chat (NDJSON) and voice
+"""
+import asyncio
+import json
+import os
+from dataclasses import dataclass
+from functools import lru_cache
+from typing import TYPE_CHECKING, Any, AsyncGenerator, Dict, Optional, Union
+from Agents.session_locks import SessionBusy, SessionLease, SessionLockManager, bind_lease, session_locks
+from utils.db_routing import session_scope
+
+# LangGraph/LangChain (and the OpenAI SDK behind the confirmation renderer) are
+# imported on the first turn, so workers that only serve CRUD never load them
+if TYPE_CHECKING:
+    from langgraph.types import Command
+
+# Replies that approve a pending HITL confirmation (anything else rejects it)
+APPROVAL_WORDS = {"yes", "y", "proceed", "confirm", "ok", "okay", "yeah", "yep", "sure", "approve"}
+
+# Messages of history passed into a new turn (5 conversation pairs)
+HISTORY_MESSAGES = int(os.getenv("MOVI_HISTORY_MESSAGES", "10"))
+
+
+def is_approval(text: str) -> bool:
+    """True if the user's reply approves the pending action."""
+    return text.lower().strip().rstrip(".!") in APPROVAL_WORDS
+
+
+@dataclass
+class AgentTurn:
+    """One user message to run through the agent (input side, channel independent)"""
+    session_id: str
+    message: str
+    context_page: str = "unknown"
+    image_base64: Optional[str] = None
+    endpoint: str = "/movi/chat"
+    # "wait" or "supersede" when the session is already running a turn (None: server default)
+    on_busy: Optional[str] = None
+
+
+# Markers passed from the graph task to the streaming consumer
+_DONE = object()
+_SUPERSEDED = object()
+
+
+class AgentRuntime:
+    """
+    Runs Movi turns on the compiled graph.
+
+    Yields channel-neutral events:
+        {"type": "token", "content": "..."} for each response token
+        {"type": "confirmation", "consequence_data": {...}} when the graph
+        stops at a HITL interrupt
+        {"type": "superseded"} when a newer message on the session took over
+
+    Turns on the same session are serialized with the session lock so two
+    requests never read and write the same checkpoint concurrently. The
+    graph runs in its own task so a superseding message can cancel it.
+    """
+
+    def __init__(self, graph: Any, locks: SessionLockManager = session_locks):
+        self.graph = graph
+        self.locks = locks
+
+    def build_config(self, turn: AgentTurn) -> Dict[str, Any]:
+        """Thread config plus LangSmith metadata/tags."""
+        return {
+            "configurable": {"thread_id": turn.session_id},
+            "metadata": {
+                "session_id": turn.session_id,
+                "context_page": turn.context_page,
+                "has_image": turn.image_base64 is not None,
+                "endpoint": turn.endpoint
+            },
+            "tags": ["movi-agent", f"page:{turn.context_page}"]
+        }
+
+    @staticmethod
+    def pending_interrupt(state: Any) -> Optional[Dict[str, Any]]:
+        """
+        Interrupt payload the thread is waiting on, or None.
+
+        A run cancelled mid-graph leaves `next` set without an interrupt;
+        that is not a confirmation and must not swallow the next message.
+        """
+        for task in getattr(state, "tasks", None) or []:
+            if task.interrupts:
+                return task.interrupts[0].value or {}
+        return None
+
+    def build_input(self, turn: AgentTurn, state: Any) -> Union["Command", Dict[str, Any]]:
+        """Resume command for a pending interrupt, otherwise a fresh MoviState."""
+        from langgraph.types import Command
+        from Agents.state import initial_state
+
+        if self.pending_interrupt(state) is not None:
+            # User is responding to an interrupt/confirmation request
+            return Command(resume=is_approval(turn.message))
+
+        existing_messages = state.values.get("messages", []) if state.values else []
+        if len(existing_messages) > HISTORY_MESSAGES:
+            existing_messages = existing_messages[-HISTORY_MESSAGES:]
+
+        fresh: Dict[str, Any] = initial_state(
+            turn.message,
+            turn.context_page,
+            messages=existing_messages,
+            image_base64=turn.image_base64
+        )
+        return fresh
+
+    async def stream(self, turn: AgentTurn) -> AsyncGenerator[Dict[str, Any], None]:
+        """
+        Run one turn and stream its events.
+
+        Args:
+            turn: The user's message and session
+
+        Yields:
+            Token and confirmation events (see class docstring)
+        """
+        config = self.build_config(turn)
+
+        async with self.locks.hold(turn.session_id, turn.on_busy) as lease:
+            state = await self.graph.aget_state(config)
+            graph_input = self.build_input(turn, state)
+
+            events: "asyncio.Queue[Any]" = asyncio.Queue()
+            producer = asyncio.create_task(self._run_graph(graph_input, config, events, lease))
+            lease.on_supersede(producer.cancel)
+            try:
+                while True:
+                    item = await events.get()
+                    if item is _DONE:
+                        break
+                    if item is _SUPERSEDED:
+                        yield {"type": "superseded"}
+                        return
+                    if isinstance(item, Exception):
+                        raise item
+                    yield item
+            finally:
+                # Consumer went away (client disconnect, voice barge-in): stop the graph too
+                if not producer.done():
+                    producer.cancel()
+
+            # After the stream finishes, check if we stopped at a HITL interrupt
+            consequence_data = self.pending_interrupt(await self.graph.aget_state(config))
+            if consequence_data is not None:
+                yield {"type": "confirmation", "consequence_data": consequence_data}
+
+    async def _run_graph(
+        self,
+        graph_input: Any,
+        config: Dict[str, Any],
+        events: "asyncio.Queue[Any]",
+        lease: SessionLease
+    ) -> None:
+        # Tool calls started by this turn hold the session lock until they finish
+        bind_lease(lease)
+        try:
+            # Tool calls read their own session's writes (see utils.db_routing)
+            with session_scope(f"movi:{config['configurable']['thread_id']}"):
+                async for event in self.graph.astream_events(graph_input, config=config, version="v2"):
+                    # Only the final answer is streamed, not intent/tool LLM calls
+                    if (
+                        event["event"] == "on_chat_model_stream" and
+                        event["metadata"].get("langgraph_node") == "response"
+                    ):
+                        chunk_content = event["data"]["chunk"].content
+                        if chunk_content:
+                            events.put_nowait({"type": "token", "content": chunk_content})
+            events.put_nowait(_DONE)
+        except asyncio.CancelledError:
+            events.put_nowait(_SUPERSEDED)
+            raise
+        except Exception as e:
+            events.put_nowait(e)
+
+
+# ----------------------------------------------------------------------
+# Output adapters
+# ----------------------------------------------------------------------
+
+class NDJSONAdapter:
+    """Text chat: JSON lines for /movi/chat (LLM-rewritten confirmations when enabled)"""
+
+    async def stream(self, events: AsyncGenerator[Dict[str, Any], None]) -> AsyncGenerator[str, None]:
+        from Agents.confirmation import arender_confirmation
+
+        try:
+            async for event in events:
+                if event["type"] == "token":
+                    yield json.dumps({"type": "token", "content": event["content"]}) + "\n"
+                elif event["type"] == "confirmation":
+                    payload = {
+                        "requires_confirmation": True,
+                        "message": await arender_confirmation(event["consequence_data"])
+                    }
+                    yield json.dumps({"type": "confirmation", "payload": payload}) + "\n"
+                elif event["type"] == "superseded":
+                    yield json.dumps({"type": "superseded", "content": "Replaced by a newer message"}) + "\n"
+        except SessionBusy as e:
+            yield json.dumps({"type": "busy", "content": str(e)}) + "\n"
+        except Exception as e:
+            yield json.dumps({"type": "error", "content": str(e)}) + "\n"
+
+
+class VoiceAdapter:
+    """Voice: template confirmations (no extra LLM call before TTS); errors propagate to the turn"""
+
+    async def stream(self, events: AsyncGenerator[Dict[str, Any], None]) -> AsyncGenerator[Dict[str, Any], None]:
+        from Agents.confirmation import render_confirmation
+
+        async for event in events:
+            if event["type"] == "token":
+                yield event
+            elif event["type"] == "confirmation":
+                yield {
+                    "type": "confirmation",
+                    "text": render_confirmation(event["consequence_data"]),
+                    "consequence_info": event["consequence_data"]
+                }
+
+
+@lru_cache(maxsize=1)
+def get_agent_runtime() -> AgentRuntime:
+    """
+    Runtime over the shared compiled Movi graph.
+
+    Built on first use (or by the startup prewarm): importing the graph
+    loads LangChain, LangGraph and the OpenAI clients.
+    """
+    from Agents.graph import app as agent_graph
+    return AgentRuntime(agent_graph)
@@ -0,0 +1,295 @@
+"""
+Per-session Locks for the Movi Agent
+Serializes graph runs on the same conversation thread so checkpoints and interrupts are not raced;
+a new message either waits for the in-flight one or supersedes it
+"""
+import asyncio
+import os
+import time
+import uuid
+from contextlib import asynccontextmanager
+from contextvars import ContextVar
+from typing import TYPE_CHECKING, Any, AsyncIterator, Callable, Dict, List, Optional, Set
+
+try:
+    import redis.asyncio as aioredis  # optional, shared lock across workers
+except ImportError:
+    aioredis = None
+
+if TYPE_CHECKING:
+    from redis.asyncio import Redis
+
+# "wait": queue behind the in-flight turn; "supersede": cancel it and take over
+SESSION_BUSY_POLICY = os.getenv("MOVI_SESSION_BUSY_POLICY", "wait").lower()
+SESSION_LOCK_TIMEOUT = float(os.getenv("MOVI_SESSION_LOCK_TIMEOUT_S", "30"))
+# "memory" (this worker only) or "redis" (all workers, needs MOVI_REDIS_URL)
+SESSION_LOCK_BACKEND = os.getenv("MOVI_SESSION_LOCK_BACKEND", "memory").lower()
+SESSION_LOCK_TTL = float(os.getenv("MOVI_SESSION_LOCK_TTL_S", "60"))
+REDIS_URL = os.getenv("MOVI_REDIS_URL", "")
+
+POLICIES = ("wait", "supersede")
+
+
+class SessionBusy(Exception):
+    """Raised when the session lock cannot be acquired in time"""
+
+
+class SessionLease:
+    """A held session lock; the holder registers how to abort its turn if superseded"""
+
+    def __init__(self, session_id: str):
+        self.session_id = session_id
+        self.superseded = False
+        self._on_supersede: List[Callable[[], None]] = []
+        self._work: Set["asyncio.Future[Any]"] = set()
+
+    def on_supersede(self, callback: Callable[[], None]) -> None:
+        """Register a callback (e.g. task.cancel) run when a newer message takes over."""
+        if self.superseded:
+            callback()
+            return
+        self._on_supersede.append(callback)
+
+    def supersede(self) -> None:
+        if self.superseded:
+            return
+        self.superseded = True
+        for callback in self._on_supersede:
+            callback()
+
+    def track(self, work: "asyncio.Future[Any]") -> None:
+        """
+        Keep the lock until this work is done, even if the turn is cancelled.
+
+        Cancelling a turn does not stop a tool already running in an
+        executor thread; the next turn must not start while it still
+        writes to the session's data.
+        """
+        self._work.add(work)
+        work.add_done_callback(self._work.discard)
+
+    async def drain(self) -> bool:
+        """
+        Wait for tracked work to finish.
+
+        A cancellation that arrives meanwhile is deferred, not lost.
+
+        Returns:
+            True if the caller was cancelled while waiting (re-raise it)
+        """
+        cancelled = False
+        while self._work:
+            try:
+                await asyncio.wait(set(self._work))
+            except asyncio.CancelledError:
+                cancelled = True
+        return cancelled
+
+
+# Lease of the turn running in the current task (set by the agent runtime)
+_current_lease: ContextVar[Optional[SessionLease]] = ContextVar("movi_session_lease", default=None)
+
+
+def bind_lease(lease: SessionLease) -> None:
+    """Make the lease current for this task (call at the start of the turn's own task)."""
+    _current_lease.set(lease)
+
+
+def track_work(work: "asyncio.Future[Any]") -> None:
+    """Keep the current turn's session lock until work is done (no-op outside a turn)."""
+    lease = _current_lease.get()
+    if lease is not None:
+        lease.track(work)
+
+
+async def acquire_lock(lock: asyncio.Lock, timeout: float) -> bool:
+    """
+    lock.acquire() bounded by timeout, without leaking the lock.
+
+    asyncio.wait_for (Python 3.10) can raise TimeoutError or CancelledError
+    after the inner acquire already succeeded, leaving the lock held
+    forever. Here an acquire that completes after we gave up releases the
+    lock again.
+
+    Returns:
+        True if the lock is now held by the caller
+    """
+    acquiring = asyncio.ensure_future(lock.acquire())
+    try:
+        done, _ = await asyncio.wait({acquiring}, timeout=timeout)
+    except BaseException:
+        _abandon_acquire(acquiring, lock)
+        raise
+    if acquiring in done:
+        return True
+    _abandon_acquire(acquiring, lock)
+    return False
+
+
+def _abandon_acquire(acquiring: "asyncio.Future[Any]", lock: asyncio.Lock) -> None:
+    def release_if_acquired(future: "asyncio.Future[Any]") -> None:
+        if not future.cancelled() and future.exception() is None:
+            lock.release()
+
+    acquiring.cancel()
+    acquiring.add_done_callback(release_if_acquired)
+
+
+class RedisLockBackend:
+    """
+    Cross-worker session lock: SET NX with a TTL, renewed while held and
+    released only by its owner (compare-and-delete).
+
+    Superseding a turn that runs on another worker is not possible; the
+    new message waits for it instead.
+    """
+
+    KEY_PREFIX = "movi:agent:lock:"
+    RELEASE_SCRIPT = """
+    if redis.call('GET', KEYS[1]) == ARGV[1] then
+        return redis.call('DEL', KEYS[1])
+    end
+    return 0
+    """
+    EXTEND_SCRIPT = """
+    if redis.call('GET', KEYS[1]) == ARGV[1] then
+        return redis.call('PEXPIRE', KEYS[1], ARGV[2])
+    end
+    return 0
+    """
+    POLL_INTERVAL = 0.05
+
+    def __init__(self, client: "Redis", ttl: float = SESSION_LOCK_TTL):
+        self.client = client
+        self.ttl_ms = int(ttl * 1000)
+        self._release = client.register_script(self.RELEASE_SCRIPT)
+        self._extend = client.register_script(self.EXTEND_SCRIPT)
+
+    async def acquire(self, session_id: str, timeout: float) -> Optional[str]:
+        """Returns an ownership token, or None if still held by someone else after timeout."""
+        token = uuid.uuid4().hex
+        deadline = time.monotonic() + timeout
+        while True:
+            if await self.client.set(self.KEY_PREFIX + session_id, token, nx=True, px=self.ttl_ms):
+                return token
+            if time.monotonic() >= deadline:
+                return None
+            await asyncio.sleep(self.POLL_INTERVAL)
+
+    async def extend(self, session_id: str, token: str) -> bool:
+        return bool(await self._extend(keys=[self.KEY_PREFIX + session_id], args=[token, self.ttl_ms]))
+
+    async def release(self, session_id: str, token: str) -> None:
+        await self._release(keys=[self.KEY_PREFIX + session_id], args=[token])
+
+
+def create_lock_backend() -> Optional[RedisLockBackend]:
+    """Shared backend when configured and available, else None (in-process locks only)."""
+    if SESSION_LOCK_BACKEND != "redis":
+        return None
+    if aioredis is None or not REDIS_URL:
+        print("⚠️  MOVI_SESSION_LOCK_BACKEND=redis needs the redis package and MOVI_REDIS_URL; using in-process locks")
+        return None
+    return RedisLockBackend(aioredis.Redis.from_url(REDIS_URL))
+
+
+class SessionLockManager:
+    """
+    One asyncio.Lock per session (LangGraph thread_id), optionally backed
+    by a shared lock so only one worker runs a session at a time.
+
+    Locks are created on demand and dropped once no turn holds or waits
+    for them, so idle sessions cost nothing.
+    """
+
+    def __init__(
+        self,
+        policy: str = SESSION_BUSY_POLICY,
+        timeout: float = SESSION_LOCK_TIMEOUT,
+        backend: Optional[RedisLockBackend] = None
+    ):
+        self.policy = policy if policy in POLICIES else "wait"
+        self.timeout = timeout
+        self.backend = backend
+        self._locks: Dict[str, asyncio.Lock] = {}
+        self._users: Dict[str, int] = {}
+        self._holders: Dict[str, SessionLease] = {}
+
+    @asynccontextmanager
+    async def hold(self, session_id: str, policy: Optional[str] = None) -> AsyncIterator[SessionLease]:
+        """
+        Hold the session's lock for the duration of one agent turn.
+
+        Args:
+            session_id: Conversation thread id
+            policy: "wait" or "supersede" (defaults to MOVI_SESSION_BUSY_POLICY)
+
+        Raises:
+            SessionBusy: If the lock is not acquired within the timeout
+        """
+        policy = policy if policy in POLICIES else self.policy
+        lock = self._locks.setdefault(session_id, asyncio.Lock())
+        self._users[session_id] = self._users.get(session_id, 0) + 1
+        token = None
+        renewer = None
+        try:
+            holder = self._holders.get(session_id)
+            if policy == "supersede" and holder is not None:
+                holder.supersede()
+
+            started = time.monotonic()
+            if not await acquire_lock(lock, self.timeout):
+                raise SessionBusy("Another message for this session is still being processed")
+
+            lease = SessionLease(session_id)
+            cancelled = False
+            try:
+                if self.backend is not None:
+                    remaining = max(self.timeout - (time.monotonic() - started), 0)
+                    token = await self.backend.acquire(session_id, remaining)
+                    if token is None:
+                        raise SessionBusy("This session is busy on another server")
+                    renewer = asyncio.create_task(self._renew(session_id, token))
+
+                self._holders[session_id] = lease
+                try:
+                    yield lease
+                finally:
+                    if self._holders.get(session_id) is lease:
+                        del self._holders[session_id]
+            finally:
+                # A superseded turn's tools may still be running in executor threads
+                cancelled = await lease.drain()
+                if renewer is not None:
+                    renewer.cancel()
+                if token is not None:
+                    try:
+                        await self.backend.release(session_id, token)
+                    except Exception as e:
+                        print(f"⚠️  Failed to release session lock: {str(e)}")
+                lock.release()
+            if cancelled:
+                raise asyncio.CancelledError()
+        finally:
+            self._users[session_id] -= 1
+            if not self._users[session_id]:
+                del self._users[session_id]
+                del self._locks[session_id]
+
+    async def _renew(self, session_id: str, token: str) -> None:
+        # Keep the shared lock alive for long turns (TTL covers crashed workers)
+        interval = self.backend.ttl_ms / 1000 / 3
+        while True:
+            await asyncio.sleep(interval)
+            try:
+                await self.backend.extend(session_id, token)
+            except Exception as e:
+                print(f"⚠️  Failed to extend session lock: {str(e)}")
+
+    def is_busy(self, session_id: str) -> bool:
+        """Whether a turn is running (or waiting) on this session."""
+        return session_id in self._users
+
+
+# Shared by every route that runs the agent (chat and voice)
+session_locks = SessionLockManager(backend=create_lock_backend())
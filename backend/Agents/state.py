@@ -21,6 +21,10 @@ class MoviState(TypedDict):
     tool_name: Optional[str]
     entities: Optional[Dict[str, Any]]
 
+    # Multi-step plan: ordered [{"tool_name": ..., "entities": {...}}, ...]
+    # tool_name/entities mirror the first step for single-tool callers
+    tool_calls: Optional[List[Dict[str, Any]]]
+
     # Missing info / next-step requirements
     needs_user_input: bool
 
@@ -30,3 +34,29 @@ class MoviState(TypedDict):
 
     # Results
     tool_result: Optional[Dict[str, Any]]
+    tool_results: Optional[List[Dict[str, Any]]]   # Per-step results for multi-step plans
+
+
+def initial_state(
+    user_msg: str,
+    current_page: str,
+    messages: Optional[List[BaseMessage]] = None,
+    image_base64: Optional[str] = None
+) -> MoviState:
+    """Fresh state for a new turn (every key set, so no value leaks from the thread's last turn)."""
+    return {
+        "user_msg": user_msg,
+        "current_page": current_page,
+        "messages": messages or [],
+        "image_base64": image_base64,
+        "image_content": None,
+        "intent": None,
+        "tool_name": None,
+        "entities": None,
+        "tool_calls": None,
+        "needs_user_input": False,
+        "consequences": None,
+        "awaiting_confirmation": False,
+        "tool_result": None,
+        "tool_results": None
+    }
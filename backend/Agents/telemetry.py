@@ -0,0 +1,393 @@
+"""
+Agent Telemetry
+Local per-node timing, LLM latency/token accounting, tool latency and interrupt counts for the Movi graph,
+exported as Prometheus metrics and an optional JSONL trace (no LangSmith or network needed)
+"""
+import asyncio
+import functools
+import json
+import os
+import threading
+import time
+from typing import Any, Callable, Dict, List, Optional, Tuple, Union
+from uuid import UUID
+from langchain_core.callbacks import BaseCallbackHandler
+from langchain_core.messages import BaseMessage
+from langchain_core.outputs import ChatGenerationChunk, GenerationChunk, LLMResult
+from langchain_core.runnables.config import var_child_runnable_config
+from langgraph.errors import GraphInterrupt
+from prometheus_client import Counter, Histogram
+from utils.instrumentation import LATENCY_BUCKETS, metric
+
+AGENT_TELEMETRY_ENABLED = os.getenv("MOVI_AGENT_TELEMETRY", "true").lower() == "true"
+# Append one JSON object per node/LLM/tool/interrupt event to this file (empty disables)
+AGENT_TRACE_FILE = os.getenv("MOVI_AGENT_TRACE_FILE", "")
+
+NODE_DURATION = metric(
+    Histogram,
+    "movi_agent_node_duration_seconds",
+    "Wall time per graph node run",
+    ["node", "status"],
+    buckets=LATENCY_BUCKETS,
+)
+LLM_DURATION = metric(
+    Histogram,
+    "movi_llm_request_duration_seconds",
+    "LLM call latency by model and calling node",
+    ["model", "node", "status"],
+    buckets=LATENCY_BUCKETS,
+)
+LLM_TIME_TO_FIRST_TOKEN = metric(
+    Histogram,
+    "movi_llm_time_to_first_token_seconds",
+    "Time until the first streamed token of an LLM call",
+    ["model", "node"],
+    buckets=LATENCY_BUCKETS,
+)
+LLM_TOKENS = metric(
+    Counter,
+    "movi_llm_tokens_total",
+    "LLM tokens by model, calling node and kind (prompt/completion)",
+    ["model", "node", "kind"],
+)
+TOOL_DURATION = metric(
+    Histogram,
+    "movi_agent_tool_duration_seconds",
+    "Tool execution latency",
+    ["tool", "status"],
+    buckets=LATENCY_BUCKETS,
+)
+INTERRUPTS = metric(
+    Counter,
+    "movi_agent_interrupts_total",
+    "HITL confirmation interrupts raised, by tool",
+    ["tool"],
+)
+
+
+class TraceSink:
+    """Thread-safe JSONL appender (one line per event)"""
+
+    def __init__(self, path: str):
+        self.path = path
+        self._lock = threading.Lock()
+
+    def write(self, record: Dict[str, Any]) -> None:
+        line = json.dumps(record, default=str) + "\n"
+        try:
+            with self._lock, open(self.path, "a", encoding="utf-8") as f:
+                f.write(line)
+        except OSError as e:
+            print(f"⚠️  Failed to write agent trace: {str(e)}")
+
+
+_trace_sink: Optional[TraceSink] = TraceSink(AGENT_TRACE_FILE) if AGENT_TRACE_FILE else None
+
+
+def set_trace_sink(sink: Optional[TraceSink]) -> None:
+    """Replace the trace sink (None disables JSONL tracing)."""
+    global _trace_sink
+    _trace_sink = sink
+
+
+def _thread_id() -> Optional[str]:
+    # Config of the graph run executing in this context (set by LangGraph per node)
+    config = var_child_runnable_config.get() or {}
+    thread_id = (config.get("configurable") or {}).get("thread_id")
+    return str(thread_id) if thread_id is not None else None
+
+
+def trace(kind: str, name: str, seconds: float, **fields: Any) -> None:
+    """
+    Write one event to the JSONL trace (no-op without MOVI_AGENT_TRACE_FILE).
+
+    Args:
+        kind: "node", "llm", "tool" or "interrupt"
+        name: Node, model or tool name
+        seconds: Duration of the event
+        **fields: Extra attributes (status, tokens, ...)
+    """
+    sink = _trace_sink
+    if sink is None:
+        return
+    sink.write({
+        "ts": time.time(),
+        "kind": kind,
+        "name": name,
+        "thread_id": fields.pop("thread_id", None) or _thread_id(),
+        "duration_ms": round(seconds * 1000, 2),
+        **fields,
+    })
+
+
+# ----------------------------------------------------------------------
+# Nodes
+# ----------------------------------------------------------------------
+
+def _interrupted_tool(error: GraphInterrupt) -> str:
+    try:
+        return error.args[0][0].value.get("tool_name") or "unknown"
+    except (AttributeError, IndexError, TypeError):
+        return "unknown"
+
+
+def _record_node(node: str, started: float, error: Optional[BaseException]) -> None:
+    seconds = time.perf_counter() - started
+    if error is None:
+        status = "ok"
+    elif isinstance(error, GraphInterrupt):
+        status = "interrupt"
+        tool = _interrupted_tool(error)
+        INTERRUPTS.labels(tool).inc()
+        trace("interrupt", node, seconds, tool=tool)
+    elif isinstance(error, asyncio.CancelledError):
+        status = "cancelled"
+    else:
+        status = "error"
+    NODE_DURATION.labels(node, status).observe(seconds)
+    trace("node", node, seconds, status=status)
+
+
+def timed_node(node: str, func: Callable[..., Any]) -> Callable[..., Any]:
+    """
+    Wrap a node function (sync or async) to record its wall time.
+
+    A node pausing at interrupt() is recorded with status "interrupt" and
+    counted per tool. The wrapper keeps the function's signature, so
+    LangGraph still passes `config` to nodes that accept it.
+    """
+    if not AGENT_TELEMETRY_ENABLED:
+        return func
+
+    if asyncio.iscoroutinefunction(func):
+        @functools.wraps(func)
+        async def async_wrapper(*args: Any, **kwargs: Any) -> Any:
+            started = time.perf_counter()
+            error = None
+            try:
+                return await func(*args, **kwargs)
+            except BaseException as e:
+                error = e
+                raise
+            finally:
+                _record_node(node, started, error)
+        return async_wrapper
+
+    @functools.wraps(func)
+    def wrapper(*args: Any, **kwargs: Any) -> Any:
+        started = time.perf_counter()
+        error = None
+        try:
+            return func(*args, **kwargs)
+        except BaseException as e:
+            error = e
+            raise
+        finally:
+            _record_node(node, started, error)
+    return wrapper
+
+
+# ----------------------------------------------------------------------
+# Tools
+# ----------------------------------------------------------------------
+
+def record_tool(tool: str, seconds: float, status: str = "ok") -> None:
+    """Record one tool execution ("ok" or "error")."""
+    if not AGENT_TELEMETRY_ENABLED:
+        return
+    TOOL_DURATION.labels(tool, status).observe(seconds)
+    trace("tool", tool, seconds, status=status)
+
+
+# ----------------------------------------------------------------------
+# LLM calls
+# ----------------------------------------------------------------------
+
+def _token_usage(response: LLMResult) -> Tuple[int, int]:
+    """(prompt, completion) tokens from message usage metadata or the provider's llm_output."""
+    prompt = completion = 0
+    for generations in response.generations:
+        for generation in generations:
+            usage = getattr(getattr(generation, "message", None), "usage_metadata", None)
+            if usage:
+                prompt += usage.get("input_tokens", 0)
+                completion += usage.get("output_tokens", 0)
+    if not (prompt or completion):
+        usage = (response.llm_output or {}).get("token_usage") or {}
+        prompt = usage.get("prompt_tokens", 0)
+        completion = usage.get("completion_tokens", 0)
+    return prompt, completion
+
+
+class LLMTelemetryHandler(BaseCallbackHandler):
+    """
+    Callback handler timing every chat model call.
+
+    Attached to the shared ChatOpenAI instances, so it sees graph nodes as
+    well as vision and confirmation calls; the calling node comes from the
+    langgraph_node metadata ("none" outside the graph).
+    """
+
+    # Run in the caller's thread/loop so timings are not skewed by the executor
+    run_inline = True
+
+    def __init__(self) -> None:
+        self._runs: Dict[UUID, Dict[str, Any]] = {}
+        self._lock = threading.Lock()
+
+    def _start(self, run_id: UUID, serialized: Optional[Dict[str, Any]], metadata: Optional[Dict[str, Any]], kwargs: Dict[str, Any]) -> None:
+        metadata = metadata or {}
+        params = kwargs.get("invocation_params") or {}
+        model = (
+            metadata.get("ls_model_name") or params.get("model") or params.get("model_name") or
+            ((serialized or {}).get("kwargs") or {}).get("model_name") or "unknown"
+        )
+        run = {
+            "started": time.perf_counter(),
+            "model": model,
+            "node": metadata.get("langgraph_node") or "none",
+            "thread_id": _thread_id() or metadata.get("thread_id"),
+            "first_token": None,
+        }
+        with self._lock:
+            self._runs[run_id] = run
+
+    def on_chat_model_start(
+        self,
+        serialized: Dict[str, Any],
+        messages: List[List[BaseMessage]],
+        *,
+        run_id: UUID,
+        parent_run_id: Optional[UUID] = None,
+        tags: Optional[List[str]] = None,
+        metadata: Optional[Dict[str, Any]] = None,
+        **kwargs: Any,
+    ) -> None:
+        self._start(run_id, serialized, metadata, kwargs)
+
+    def on_llm_start(
+        self,
+        serialized: Dict[str, Any],
+        prompts: List[str],
+        *,
+        run_id: UUID,
+        parent_run_id: Optional[UUID] = None,
+        tags: Optional[List[str]] = None,
+        metadata: Optional[Dict[str, Any]] = None,
+        **kwargs: Any,
+    ) -> None:
+        self._start(run_id, serialized, metadata, kwargs)
+
+    def on_llm_new_token(
+        self,
+        token: Union[str, List[Union[str, Dict[str, Any]]]],
+        *,
+        chunk: Optional[Union[GenerationChunk, ChatGenerationChunk]] = None,
+        run_id: UUID,
+        parent_run_id: Optional[UUID] = None,
+        tags: Optional[List[str]] = None,
+        **kwargs: Any,
+    ) -> None:
+        run = self._runs.get(run_id)
+        if run is not None and run["first_token"] is None:
+            run["first_token"] = time.perf_counter() - run["started"]
+            LLM_TIME_TO_FIRST_TOKEN.labels(run["model"], run["node"]).observe(run["first_token"])
+
+    def on_llm_end(self, response: LLMResult, *, run_id: UUID, **kwargs: Any) -> None:
+        with self._lock:
+            run = self._runs.pop(run_id, None)
+        if run is None:
+            return
+        seconds = time.perf_counter() - run["started"]
+        prompt, completion = _token_usage(response)
+        LLM_DURATION.labels(run["model"], run["node"], "ok").observe(seconds)
+        LLM_TOKENS.labels(run["model"], run["node"], "prompt").inc(prompt)
+        LLM_TOKENS.labels(run["model"], run["node"], "completion").inc(completion)
+        trace(
+            "llm", run["model"], seconds,
+            node=run["node"], status="ok", thread_id=run["thread_id"],
+            prompt_tokens=prompt, completion_tokens=completion,
+            first_token_ms=round(run["first_token"] * 1000, 2) if run["first_token"] is not None else None,
+        )
+
+    def on_llm_error(self, error: BaseException, *, run_id: UUID, **kwargs: Any) -> None:
+        with self._lock:
+            run = self._runs.pop(run_id, None)
+        if run is None:
+            return
+        seconds = time.perf_counter() - run["started"]
+        LLM_DURATION.labels(run["model"], run["node"], "error").observe(seconds)
+        trace("llm", run["model"], seconds, node=run["node"], status="error", thread_id=run["thread_id"], error=str(error))
+
+
+llm_telemetry = LLMTelemetryHandler()
+
+
+def llm_callbacks() -> list:
+    """Callbacks to attach to chat models ([] when MOVI_AGENT_TELEMETRY=false)."""
+    return [llm_telemetry] if AGENT_TELEMETRY_ENABLED else []
+
+
+class TurnAccounting(BaseCallbackHandler):
+    """
+    Per-run accounting of model and tool time.
+
+    Pass one instance in the run's config callbacks; it is inherited by
+    every LLM and tool call in that run, so concurrent runs are accounted
+    separately. Everything not spent in the model is agent overhead
+    (graph, checkpointer, tools, DB).
+    """
+
+    run_inline = True
+
+    def __init__(self) -> None:
+        self.model_seconds = 0.0
+        self.model_calls = 0
+        self.tool_seconds = 0.0
+        self.tool_calls = 0
+        self.prompt_tokens = 0
+        self.completion_tokens = 0
+        self._started: Dict[UUID, float] = {}
+
+    def on_chat_model_start(
+        self,
+        serialized: Dict[str, Any],
+        messages: List[List[BaseMessage]],
+        *,
+        run_id: UUID,
+        **kwargs: Any,
+    ) -> None:
+        self._started[run_id] = time.perf_counter()
+
+    def on_llm_start(self, serialized: Dict[str, Any], prompts: List[str], *, run_id: UUID, **kwargs: Any) -> None:
+        self._started[run_id] = time.perf_counter()
+
+    def on_llm_end(self, response: LLMResult, *, run_id: UUID, **kwargs: Any) -> None:
+        started = self._started.pop(run_id, None)
+        if started is not None:
+            self.model_seconds += time.perf_counter() - started
+            self.model_calls += 1
+        prompt, completion = _token_usage(response)
+        self.prompt_tokens += prompt
+        self.completion_tokens += completion
+
+    def on_llm_error(self, error: BaseException, *, run_id: UUID, **kwargs: Any) -> None:
+        started = self._started.pop(run_id, None)
+        if started is not None:
+            self.model_seconds += time.perf_counter() - started
+            self.model_calls += 1
+
+    def on_tool_start(self, serialized: Dict[str, Any], input_str: str, *, run_id: UUID, **kwargs: Any) -> None:
+        self._started[run_id] = time.perf_counter()
+
+    def on_tool_end(self, output: Any, *, run_id: UUID, **kwargs: Any) -> None:
+        self._end_tool(run_id)
+
+    def on_tool_error(self, error: BaseException, *, run_id: UUID, **kwargs: Any) -> None:
+        self._end_tool(run_id)
+
+    def _end_tool(self, run_id: UUID) -> None:
+        started = self._started.pop(run_id, None)
+        if started is not None:
+            self.tool_seconds += time.perf_counter() - started
+            self.tool_calls += 1
@@ -798,6 +798,23 @@ ROUTES_TOOLS = [
 # Export all tools as a list for backward compatibility
 ALL_TOOLS = BUS_DASHBOARD_TOOLS + STOPS_PATHS_TOOLS + ROUTES_TOOLS
 
+# Tools that never write to the database (safe to run concurrently)
+READ_ONLY_TOOLS = {
+    "list_all_stops",
+    "get_stop_details",
+    "list_all_paths",
+    "list_stops_for_path",
+    "list_all_routes",
+    "list_routes_using_path",
+    "find_routes_for_path",
+    "list_all_vehicles",
+    "get_unassigned_vehicles",
+    "list_all_drivers",
+    "get_all_trips",
+    "get_trip_status",
+    "get_trip_data",
+}
+
 
 def get_tools_for_page(page: str) -> List[BaseTool]:
     """
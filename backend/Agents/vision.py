@@ -0,0 +1,161 @@
+"""
+Vision analysis for Movi
+Shared vision model client with local OCR fast path, preprocessing and a content-hash result cache
+"""
+import asyncio
+import os
+import re
+from typing import Any, Optional, cast
+from langchain_core.language_models.chat_models import BaseChatModel
+from langchain_core.messages import HumanMessage
+from langchain_core.runnables import RunnableConfig
+from Agents.clients import get_chat_model
+from utils.image_processing import (
+    image_base64_to_bytes,
+    image_content_hash,
+    prepare_image_for_vision,
+)
+from utils import ocr
+from utils.cache import LRUCache, record_cache
+
+VISION_MODEL = os.getenv("MOVI_VISION_MODEL", "gpt-4o")
+VISION_CACHE_SIZE = int(os.getenv("MOVI_VISION_CACHE_SIZE", "128"))
+
+VISION_PROMPT = """Analyze this image carefully and extract ALL text and information visible.
+
+Pay special attention to:
+1. ANY highlighted, circled, or marked items (these are MOST IMPORTANT)
+2. Trip names, IDs, and identifiers
+3. Status indicators (SCHEDULED, IN-PROGRESS, UNKNOWN, etc.)
+4. Booking percentages
+5. Times and schedules
+6. Any arrows or visual emphasis
+
+Provide a detailed description focusing on what the user wants to highlight or draw attention to. If there are circles, arrows, or highlighting, mention those items FIRST and PROMINENTLY."""
+
+
+# OCR reads text but cannot see circles, arrows or highlighting
+VISUAL_EMPHASIS_PATTERN = re.compile(
+    r"\b(circled?|highlight(ed)?|marked|arrows?|underlined|pointed|this one)\b",
+    re.IGNORECASE,
+)
+
+
+def needs_visual_reasoning(user_msg: Optional[str]) -> bool:
+    """True when the user refers to visual emphasis that only the vision model can see."""
+    return bool(user_msg and VISUAL_EMPHASIS_PATTERN.search(user_msg))
+
+
+# Image analyses keyed by image content hash
+analysis_cache: LRUCache[str] = LRUCache(VISION_CACHE_SIZE)
+
+
+def get_vision_llm() -> BaseChatModel:
+    """Shared vision-capable model (gpt-4o for better OCR)."""
+    return cast(BaseChatModel, get_chat_model(VISION_MODEL, temperature=0))
+
+
+def response_text(content: Any) -> str:
+    """Text of a model reply; list content (content blocks) is joined."""
+    if isinstance(content, str):
+        return content
+    if isinstance(content, list):
+        return "".join(
+            block if isinstance(block, str) else str(block.get("text", ""))
+            for block in content
+            if isinstance(block, (str, dict))
+        )
+    return str(content)
+
+
+def build_vision_message(image_base64: str, mime_type: str = "image/jpeg") -> HumanMessage:
+    """Build the multimodal message sent to the vision model."""
+    return HumanMessage(
+        content=[
+            {"type": "text", "text": VISION_PROMPT},
+            {
+                "type": "image_url",
+                "image_url": {"url": f"data:{mime_type};base64,{image_base64}"}
+            }
+        ]
+    )
+
+
+def analyze_image(
+    image_base64: str,
+    llm: Optional[BaseChatModel] = None,
+    allow_ocr: bool = True
+) -> str:
+    """
+    Describe an uploaded image, reusing the previous analysis for identical images.
+
+    Local OCR is tried first; the vision model is only called when OCR is
+    unavailable, not confident, or disallowed (allow_ocr=False).
+
+    Args:
+        image_base64: Base64 image from the frontend (raw or data URL)
+        llm: Vision model override (defaults to the shared client)
+        allow_ocr: Whether the local OCR fast path may answer
+
+    Returns:
+        Text description of the image
+    """
+    image_bytes = image_base64_to_bytes(image_base64)
+    key = image_content_hash(image_bytes)
+
+    # OCR analyses are cached separately: they lack visual emphasis, so they
+    # must not answer requests that disallow OCR
+    cached: Optional[str] = analysis_cache.get(key) or (analysis_cache.get(f"ocr:{key}") if allow_ocr else None)
+    record_cache("vision", cached is not None)
+    if cached is not None:
+        return cached
+
+    if allow_ocr:
+        ocr_result = ocr.extract_dashboard_text(image_bytes)
+        if ocr_result and ocr_result.is_confident:
+            analysis: str = ocr.format_analysis(ocr_result)
+            analysis_cache.put(f"ocr:{key}", analysis)
+            return analysis
+
+    prepared, mime_type = prepare_image_for_vision(image_bytes)
+    response = (llm or get_vision_llm()).invoke([build_vision_message(prepared, mime_type)])
+    analysis = response_text(response.content)
+
+    analysis_cache.put(key, analysis)
+    return analysis
+
+
+async def aanalyze_image(
+    image_base64: str,
+    llm: Optional[BaseChatModel] = None,
+    config: Optional[RunnableConfig] = None,
+    allow_ocr: bool = True
+) -> str:
+    """
+    Async variant of analyze_image.
+    Decoding and resizing run in a worker thread and OCR in the process pool,
+    so the event loop stays free.
+    """
+    image_bytes = await asyncio.to_thread(image_base64_to_bytes, image_base64)
+    key = image_content_hash(image_bytes)
+
+    # OCR analyses are cached separately: they lack visual emphasis, so they
+    # must not answer requests that disallow OCR
+    cached: Optional[str] = analysis_cache.get(key) or (analysis_cache.get(f"ocr:{key}") if allow_ocr else None)
+    record_cache("vision", cached is not None)
+    if cached is not None:
+        return cached
+
+    if allow_ocr:
+        ocr_result = await ocr.aextract_dashboard_text(image_bytes)
+        if ocr_result and ocr_result.is_confident:
+            analysis: str = ocr.format_analysis(ocr_result)
+            analysis_cache.put(f"ocr:{key}", analysis)
+            return analysis
+
+    prepared, mime_type = await asyncio.to_thread(prepare_image_for_vision, image_bytes)
+    response = await (llm or get_vision_llm()).ainvoke([build_vision_message(prepared, mime_type)], config)
+    analysis = response_text(response.content)
+
+    analysis_cache.put(key, analysis)
+    return analysis
@@ -1,10 +1,53 @@
+import itertools
+import os
+from contextvars import ContextVar
 from sqlalchemy import create_engine
 from sqlalchemy.ext.declarative import declarative_base
-from sqlalchemy.orm import sessionmaker
+from sqlalchemy.orm import Session, sessionmaker
+from sqlalchemy.sql import Delete, Insert, Update
 
 DATABASE_URL = "sqlite:///./test.db"
-engine = create_engine(DATABASE_URL, connect_args={"check_same_thread": False})
-SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+# Read replicas (comma-separated URLs); without any, reads stay on the primary
+REPLICA_URLS = [url.strip() for url in os.getenv("MOVI_DATABASE_REPLICA_URLS", "").split(",") if url.strip()]
+
+
+def _connect_args(url: str) -> dict:
+    return {"check_same_thread": False} if url.startswith("sqlite") else {}
+
+
+engine = create_engine(DATABASE_URL, connect_args=_connect_args(DATABASE_URL))
+replica_engines = [create_engine(url, connect_args=_connect_args(url)) for url in REPLICA_URLS]
+_replica_cycle = itertools.cycle(replica_engines)
+
+# Set per request / agent tool call by utils.db_routing; by default everything uses the primary
+use_replica: ContextVar[bool] = ContextVar("movi_db_use_replica", default=False)
+
+
+def next_replica_engine():
+    """Next replica engine, round-robin (None without replicas)."""
+    return next(_replica_cycle) if replica_engines else None
+
+
+class RoutingSession(Session):
+    """
+    Session that reads from a replica when created in a read-only context.
+
+    The replica is picked once per session, so a unit of work sees one
+    consistent snapshot. Flushes and INSERT/UPDATE/DELETE statements always
+    go to the primary (the configured bind).
+    """
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.replica = next_replica_engine() if use_replica.get() else None
+
+    def get_bind(self, mapper=None, *, clause=None, **kw):
+        if self.replica is not None and not self._flushing and not isinstance(clause, (Insert, Update, Delete)):
+            return self.replica
+        return super().get_bind(mapper, clause=clause, **kw)
+
+
+SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine, class_=RoutingSession)
 Base = declarative_base()
 
 def get_db():
@@ -1,7 +1,14 @@
+import asyncio
+import os
+from contextlib import asynccontextmanager
+from dotenv import load_dotenv
+
+# Before the app modules, which read their MOVI_* settings at import time
+load_dotenv()
+
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
-from models import Base
-from database import engine
+from database import engine, replica_engines
 from routes.vehicle import router as vehicle_router
 from routes.driver import router as driver_router
 from routes.stop import router as stop_router
@@ -9,12 +16,51 @@ from routes.path import router as path_router
 from routes.route import router as route_router
 from routes.daily_trip import router as daily_trip_router
 from routes.deployment import router as deployment_router
-from routes.movi import router as movi_router
-from routes.voice import router as voice_router
+from routes.metrics import router as metrics_router
+from routes.admin import router as admin_router
+from utils.db_routing import install_db_routing
+from utils.instrumentation import instrument_app
+from utils.migrations import ensure_schema
+from utils.profiling import install_profiling
+from utils.slow_query import install_slow_query_log
+
+# Movi chat/voice routes; CRUD-only workers can turn them off entirely
+AGENT_ENABLED = os.getenv("MOVI_AGENT_ENABLED", "true").lower() == "true"
+# Build the agent graph in the background at startup instead of on the first chat
+AGENT_PREWARM = os.getenv("MOVI_AGENT_PREWARM", "true").lower() == "true"
+
+if AGENT_ENABLED:
+    from routes.movi import router as movi_router
+    from routes.voice import router as voice_router, prewarm_tts_cache
+
 
-Base.metadata.create_all(bind=engine)
+async def prewarm_agent() -> None:
+    """Import and compile the agent graph off the event loop (LangChain/LangGraph/OpenAI imports)."""
+    from Agents.runtime import get_agent_runtime
+    try:
+        await asyncio.to_thread(get_agent_runtime)
+        print("🤖 Movi agent ready")
+    except Exception as e:
+        print(f"⚠️  Movi agent prewarm failed: {str(e)}")
 
-app = FastAPI(title="Move In Sync API", version="1.0.0")
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Refuses to start on an out-of-date schema (run `alembic upgrade head`, or MOVI_AUTO_MIGRATE=true)
+    await asyncio.to_thread(ensure_schema, engine)
+    # Background tasks, so the server accepts requests while the agent stack loads
+    tasks = []
+    if AGENT_ENABLED:
+        app.state.tts_prewarm = asyncio.create_task(prewarm_tts_cache())
+        tasks.append(app.state.tts_prewarm)
+        if AGENT_PREWARM:
+            tasks.append(asyncio.create_task(prewarm_agent()))
+    yield
+    for task in tasks:
+        task.cancel()
+
+
+app = FastAPI(title="Move In Sync API", version="1.0.0", lifespan=lifespan)
 
 app.add_middleware(
     CORSMiddleware,
@@ -24,6 +70,16 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# GETs read from the replicas (MOVI_DATABASE_REPLICA_URLS), writes and read-after-write go to the primary
+install_db_routing(app)
+# Call-tree profiles for admin-flagged or sampled requests, on /admin/profiles
+install_profiling(app)
+# Per-route latency, DB query count/time, Server-Timing headers (outermost middleware)
+instrument_app(app, engine, *replica_engines)
+# Statements above MOVI_SLOW_QUERY_MS, with query plans, on /admin/slow-queries
+for db_engine in (engine, *replica_engines):
+    install_slow_query_log(db_engine)
+
 app.include_router(vehicle_router)
 app.include_router(driver_router)
 app.include_router(stop_router)
@@ -31,8 +87,11 @@ app.include_router(path_router)
 app.include_router(route_router)
 app.include_router(daily_trip_router)
 app.include_router(deployment_router)
-app.include_router(movi_router)
-app.include_router(voice_router)
+if AGENT_ENABLED:
+    app.include_router(movi_router)
+    app.include_router(voice_router)
+app.include_router(metrics_router)
+app.include_router(admin_router)
 
 @app.get("/health")
 def health_check():
@@ -0,0 +1,67 @@
+"""
+Alembic Environment
+Runs migrations against database.DATABASE_URL (or `-x url=...`), or on a connection handed over by
+utils.migrations when the app migrates at startup
+"""
+import os
+import sys
+from logging.config import fileConfig
+from alembic import context
+from sqlalchemy import create_engine, pool
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from database import DATABASE_URL
+import models  # noqa: F401  (registers the tables on Base.metadata)
+from models import Base
+
+config = context.config
+
+if config.config_file_name is not None and config.attributes.get("configure_logger", True):
+    fileConfig(config.config_file_name)
+
+target_metadata = Base.metadata
+
+
+def database_url() -> str:
+    return context.get_x_argument(as_dictionary=True).get("url") or config.get_main_option("sqlalchemy.url") or DATABASE_URL
+
+
+def configure(**kwargs) -> None:
+    context.configure(
+        target_metadata=target_metadata,
+        # SQLite cannot ALTER most constraints; batch mode recreates the table instead
+        render_as_batch=True,
+        compare_type=True,
+        # Commit per revision, so online index builds/backfills (autocommit blocks) start clean
+        transaction_per_migration=True,
+        **kwargs
+    )
+
+
+def run_migrations_offline() -> None:
+    """Emit SQL to stdout (`alembic upgrade head --sql`)"""
+    configure(url=database_url(), literal_binds=True, dialect_opts={"paramstyle": "named"})
+    with context.begin_transaction():
+        context.run_migrations()
+
+
+def run_migrations_online() -> None:
+    connection = config.attributes.get("connection")
+    if connection is not None:
+        configure(connection=connection)
+        with context.begin_transaction():
+            context.run_migrations()
+        return
+
+    engine = create_engine(database_url(), poolclass=pool.NullPool)
+    with engine.connect() as connection:
+        configure(connection=connection)
+        with context.begin_transaction():
+            context.run_migrations()
+
+
+if context.is_offline_mode():
+    run_migrations_offline()
+else:
+    run_migrations_online()
@@ -0,0 +1,127 @@
+"""initial schema
+
+The tables as Base.metadata.create_all built them before migrations existed;
+databases created that way are stamped at this revision on startup.
+
+Revision ID: 0001
+Revises:
+Create Date: 2026-10-19 12:05:35.289640
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '0001'
+down_revision: Union[str, Sequence[str], None] = None
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table('drivers',
+    sa.Column('driver_id', sa.Integer(), nullable=False),
+    sa.Column('name', sa.String(), nullable=True),
+    sa.Column('phone_number', sa.String(), nullable=True),
+    sa.PrimaryKeyConstraint('driver_id'),
+    sa.UniqueConstraint('phone_number')
+    )
+    op.create_index('ix_drivers_driver_id', 'drivers', ['driver_id'], unique=False)
+
+    op.create_table('paths',
+    sa.Column('path_id', sa.Integer(), nullable=False),
+    sa.Column('path_name', sa.String(), nullable=True),
+    sa.PrimaryKeyConstraint('path_id')
+    )
+    op.create_index('ix_paths_path_id', 'paths', ['path_id'], unique=False)
+
+    op.create_table('stops',
+    sa.Column('stop_id', sa.Integer(), nullable=False),
+    sa.Column('name', sa.String(), nullable=True),
+    sa.Column('latitude', sa.Float(), nullable=True),
+    sa.Column('longitude', sa.Float(), nullable=True),
+    sa.PrimaryKeyConstraint('stop_id')
+    )
+    op.create_index('ix_stops_stop_id', 'stops', ['stop_id'], unique=False)
+
+    op.create_table('vehicles',
+    sa.Column('vehicle_id', sa.Integer(), nullable=False),
+    sa.Column('license_plate', sa.String(), nullable=True),
+    sa.Column('type', sa.Enum('bus', 'cab', name='vehicletype'), nullable=True),
+    sa.Column('capacity', sa.Integer(), nullable=True),
+    sa.Column('status', sa.String(), nullable=True),
+    sa.PrimaryKeyConstraint('vehicle_id'),
+    sa.UniqueConstraint('license_plate')
+    )
+    op.create_index('ix_vehicles_vehicle_id', 'vehicles', ['vehicle_id'], unique=False)
+
+    op.create_table('path_stops',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('path_id', sa.Integer(), nullable=True),
+    sa.Column('stop_id', sa.Integer(), nullable=True),
+    sa.Column('stop_order', sa.Integer(), nullable=False),
+    sa.ForeignKeyConstraint(['path_id'], ['paths.path_id'], ),
+    sa.ForeignKeyConstraint(['stop_id'], ['stops.stop_id'], ),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.create_table('routes',
+    sa.Column('route_id', sa.Integer(), nullable=False),
+    sa.Column('path_id', sa.Integer(), nullable=True),
+    sa.Column('route_display_name', sa.String(), nullable=True),
+    sa.Column('shift_time', sa.Time(), nullable=True),
+    sa.Column('direction', sa.String(), nullable=True),
+    sa.Column('start_point', sa.String(), nullable=True),
+    sa.Column('end_point', sa.String(), nullable=True),
+    sa.Column('status', sa.Enum('active', 'deactivated', name='routestatus'), nullable=True),
+    sa.Column('capacity', sa.Integer(), nullable=True),
+    sa.Column('allocated_waitlist', sa.Integer(), nullable=True),
+    sa.ForeignKeyConstraint(['path_id'], ['paths.path_id'], ),
+    sa.PrimaryKeyConstraint('route_id')
+    )
+    op.create_index('ix_routes_route_id', 'routes', ['route_id'], unique=False)
+
+    op.create_table('daily_trips',
+    sa.Column('trip_id', sa.Integer(), nullable=False),
+    sa.Column('route_id', sa.Integer(), nullable=True),
+    sa.Column('display_name', sa.String(), nullable=True),
+    sa.Column('booking_status_percentage', sa.Float(), nullable=True),
+    sa.Column('live_status', sa.String(), nullable=True),
+    sa.ForeignKeyConstraint(['route_id'], ['routes.route_id'], ),
+    sa.PrimaryKeyConstraint('trip_id')
+    )
+    op.create_index('ix_daily_trips_trip_id', 'daily_trips', ['trip_id'], unique=False)
+
+    op.create_table('deployments',
+    sa.Column('deployment_id', sa.Integer(), nullable=False),
+    sa.Column('trip_id', sa.Integer(), nullable=True),
+    sa.Column('vehicle_id', sa.Integer(), nullable=True),
+    sa.Column('driver_id', sa.Integer(), nullable=True),
+    sa.ForeignKeyConstraint(['driver_id'], ['drivers.driver_id'], ),
+    sa.ForeignKeyConstraint(['trip_id'], ['daily_trips.trip_id'], ),
+    sa.ForeignKeyConstraint(['vehicle_id'], ['vehicles.vehicle_id'], ),
+    sa.PrimaryKeyConstraint('deployment_id')
+    )
+    op.create_index('ix_deployments_deployment_id', 'deployments', ['deployment_id'], unique=False)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_deployments_deployment_id', table_name='deployments')
+    op.drop_table('deployments')
+    op.drop_index('ix_daily_trips_trip_id', table_name='daily_trips')
+    op.drop_table('daily_trips')
+    op.drop_index('ix_routes_route_id', table_name='routes')
+    op.drop_table('routes')
+    op.drop_table('path_stops')
+    op.drop_index('ix_vehicles_vehicle_id', table_name='vehicles')
+    op.drop_table('vehicles')
+    op.drop_index('ix_stops_stop_id', table_name='stops')
+    op.drop_table('stops')
+    op.drop_index('ix_paths_path_id', table_name='paths')
+    op.drop_table('paths')
+    op.drop_index('ix_drivers_driver_id', table_name='drivers')
+    op.drop_table('drivers')
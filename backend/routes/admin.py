@@ -0,0 +1,73 @@
+"""
+Admin Endpoints
+Operational views guarded by MOVI_ADMIN_TOKEN (X-Admin-Token header)
+"""
+from fastapi import APIRouter, Depends, HTTPException
+from fastapi.responses import FileResponse
+from typing import Any, Dict, List, Optional
+import sys
+import os
+
+sys.path.append(os.path.join(os.path.dirname(__file__), ".."))
+
+from utils.admin import require_admin
+from utils.profiling import profile_store
+from utils.slow_query import slow_query_log
+
+router = APIRouter(prefix="/admin", tags=["admin"], dependencies=[Depends(require_admin)])
+
+
+@router.get("/slow-queries")
+def get_slow_queries(limit: Optional[int] = None) -> Dict[str, Any]:
+    """Rolling top-N of slow SQL statements with caller, parameters and query plan"""
+    return {
+        "threshold_ms": slow_query_log.threshold_ms,
+        "top_n": slow_query_log.top_n,
+        "slow_count": slow_query_log.slow_count,
+        "queries": slow_query_log.top(limit),
+    }
+
+
+@router.delete("/slow-queries")
+def reset_slow_queries() -> Dict[str, str]:
+    """Clear the slow-query table (e.g. after adding an index)"""
+    slow_query_log.reset()
+    return {"status": "cleared"}
+
+
+# Media type per downloadable profile format
+PROFILE_MEDIA_TYPES = {
+    "txt": "text/plain",
+    "folded": "text/plain",
+    "prof": "application/octet-stream",
+}
+
+
+@router.get("/profiles")
+def list_profiles() -> List[Dict[str, Any]]:
+    """Stored request profiles (newest first) with route, duration and available formats"""
+    return profile_store.list()
+
+
+@router.get("/profiles/{profile_id}")
+def download_profile(profile_id: str, format: str = "txt") -> FileResponse:
+    """
+    Download one profile.
+
+    Formats: "txt" (call tree / cProfile summary), "folded" (flame graph
+    stacks, sampling profiler) and "prof" (pstats dump, cProfile).
+    """
+    path = profile_store.artifact_path(profile_id, format)
+    if path is None:
+        raise HTTPException(status_code=404, detail="Profile not found")
+    return FileResponse(
+        path,
+        media_type=PROFILE_MEDIA_TYPES.get(format, "application/octet-stream"),
+        filename=f"movi-profile-{profile_id}.{format}"
+    )
+
+
+@router.delete("/profiles")
+def clear_profiles() -> Dict[str, int]:
+    """Delete all stored profiles"""
+    return {"deleted": profile_store.clear()}
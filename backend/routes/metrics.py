@@ -0,0 +1,21 @@
+"""
+Metrics Endpoint
+Prometheus scrape target for request, DB and agent metrics
+"""
+from fastapi import APIRouter
+from fastapi.responses import Response
+import sys
+import os
+
+sys.path.append(os.path.join(os.path.dirname(__file__), ".."))
+
+from utils.instrumentation import metrics_payload
+
+router = APIRouter(tags=["metrics"])
+
+
+@router.get("/metrics", include_in_schema=False)
+def prometheus_metrics() -> Response:
+    """Prometheus text exposition of all metrics on this worker (or all workers in multiprocess mode)"""
+    payload = metrics_payload()
+    return Response(content=payload["content"], media_type=payload["media_type"])
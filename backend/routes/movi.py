@@ -2,19 +2,16 @@
 Movi API Endpoint
 FastAPI routes for Movi AI assistant
 """
-from typing import Optional, Dict, Any, AsyncGenerator, Union
+from typing import Optional, Dict
 from fastapi import APIRouter, HTTPException
 from fastapi.responses import StreamingResponse
 from pydantic import BaseModel
-from langchain_core.messages import HumanMessage
-from langgraph.types import Command
-import json
 import sys
 import os
 
 sys.path.append(os.path.join(os.path.dirname(__file__), ".."))
 
-from Agents.graph import app as agent_graph
+from Agents.runtime import AgentTurn, NDJSONAdapter, get_agent_runtime
 
 router = APIRouter(prefix="/movi", tags=["movi"])
 
@@ -24,6 +21,8 @@ class ChatRequest(BaseModel):
     context_page: Optional[str] = "unknown"
     image_base64: Optional[str] = None  # For vision analysis
     audio_base64: Optional[str] = None
+    # "wait" or "supersede" if this session is still answering a previous message
+    on_busy: Optional[str] = None
 
 class ChatResponse(BaseModel):
     response: str
@@ -38,129 +37,26 @@ async def chat_with_movi(request: ChatRequest) -> StreamingResponse:
     Returns a StreamingResponse with JSON-lines format:
     - {"type": "token", "content": "..."} -> Text chunks
     - {"type": "confirmation", "payload": {...}} -> HITL confirmation request
+    - {"type": "superseded", "content": "..."} -> A newer message on this session took over
+    - {"type": "busy", "content": "..."} -> The session stayed busy past the lock timeout
     - {"type": "error", "content": "..."} -> Errors
     """
-    if agent_graph is None:
+    runtime = get_agent_runtime()
+    if runtime.graph is None:
         raise HTTPException(status_code=503, detail="Movi agent unavailable")
 
-    # Config with thread_id for state persistence and LangSmith metadata
-    config = {
-        "configurable": {"thread_id": request.session_id},
-        "metadata": {
-            "session_id": request.session_id,
-            "context_page": request.context_page or "unknown",
-            "has_image": request.image_base64 is not None,
-            "endpoint": "/movi/chat"
-        },
-        "tags": ["movi-agent", f"page:{request.context_page or 'unknown'}"]
-    }
-    
-    async def event_generator() -> AsyncGenerator[str, None]:
-        try:
-            # Check if there's an ongoing interrupt waiting for resume
-            state = agent_graph.get_state(config)
-
-            # Determine input for the graph
-            if state.next:
-                # User is responding to an interrupt/confirmation request
-                user_approved = request.message.lower().strip() in [
-                    "yes", "y", "proceed", "confirm", "ok", "okay", "yeah", "yep", "sure", "approve"
-                ]
-                # Resume with the user's decision
-                # We use astream_events even for resume to capture subsequent output
-                input_data: Union[Command[Any], Dict[str, Any]] = Command(resume=user_approved)
-            else:
-                # Normal flow: new conversation
-                existing_messages = state.values.get("messages", []) if state.values else []
-                if len(existing_messages) > 10:
-                    existing_messages = existing_messages[-10:]
-                
-                input_data = {
-                    "user_msg": request.message,
-                    "current_page": request.context_page or "unknown",
-                    "messages": existing_messages,
-                    "image_base64": request.image_base64,
-                    "image_content": None,
-                    "intent": None,
-                    "tool_name": None,
-                    "entities": None,
-                    "needs_user_input": False,
-                    "consequences": None,
-                    "awaiting_confirmation": False,
-                    "tool_result": None
-                }
-
-            # Stream events from the graph
-            async for event in agent_graph.astream_events(input_data, config=config, version="v2"):
-                # Filter for LLM streaming events from the 'response' node
-                # This ensures we only stream the final answer, not internal thoughts or tool calls
-                if (
-                    event["event"] == "on_chat_model_stream" and 
-                    event["metadata"].get("langgraph_node") == "response"
-                ):
-                    chunk_content = event["data"]["chunk"].content
-                    if chunk_content:
-                        yield json.dumps({"type": "token", "content": chunk_content}) + "\n"
-
-            # After stream finishes, check if we stopped due to an interrupt
-            final_state = agent_graph.get_state(config)
-            if final_state.next:
-                # We are interrupted (HITL) - need to generate AI alert
-                # Extract consequence data from interrupt payload
-                consequence_data = None
-                
-                if hasattr(final_state, "tasks") and final_state.tasks:
-                    for task in final_state.tasks:
-                        if task.interrupts:
-                            consequence_data = task.interrupts[0].value
-                            break
-                
-                # Generate AI alert based on consequences
-                if consequence_data and consequence_data.get("has_consequences"):
-                    # Use AI to generate a natural, context-aware confirmation message
-                    from langchain_openai import ChatOpenAI
-                    
-                    llm = ChatOpenAI(model="gpt-4o-mini", temperature=0.3)
-                    
-                    details = consequence_data.get("details", "")
-                    tool_name = consequence_data.get("tool_name", "this action")
-                    affected_entity = consequence_data.get("affected_entity", "")
-                    
-                    prompt = f"""You are a helpful assistant generating a confirmation alert for a user action.
-                    
-The user is about to: {tool_name}
-Affected entity: {affected_entity}
-
-Consequences:
-{details}
-
-Generate a clear, concise, and friendly confirmation message that:
-1. Explains what will happen if they proceed
-2. Highlights the key consequences
-3. Asks if they want to continue
-
-Keep it under 3-4 sentences. Be direct but respectful."""
-
-                    ai_alert = llm.invoke(prompt).content
-                    
-                    payload = {
-                        "requires_confirmation": True,
-                        "message": ai_alert
-                    }
-                else:
-                    # Fallback for tools without specific consequences
-                    tool_name = consequence_data.get("tool_name", "this action") if consequence_data else "this action"
-                    payload = {
-                        "requires_confirmation": True,
-                        "message": f"You are about to execute: {tool_name}\n\nDo you want to proceed? (yes/no)"
-                    }
-                
-                yield json.dumps({"type": "confirmation", "payload": payload}) + "\n"
-                
-        except Exception as e:
-            yield json.dumps({"type": "error", "content": str(e)}) + "\n"
-
-    return StreamingResponse(event_generator(), media_type="application/x-ndjson")
+    turn = AgentTurn(
+        session_id=request.session_id,
+        message=request.message,
+        context_page=request.context_page or "unknown",
+        image_base64=request.image_base64,
+        endpoint="/movi/chat",
+        on_busy=request.on_busy
+    )
+    return StreamingResponse(
+        NDJSONAdapter().stream(runtime.stream(turn)),
+        media_type="application/x-ndjson"
+    )
 
 
 # ========== VOICE CHAT TOKEN ==========
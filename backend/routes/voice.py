@@ -1,262 +1,597 @@
 """
 Voice WebSocket Endpoint for Movi AI Assistant
-Real-time voice conversation using OpenAI Whisper (STT) and TTS
+Real-time voice conversation with pluggable STT/TTS backends (OpenAI Whisper/TTS by default)
 """
 from fastapi import APIRouter, WebSocket, WebSocketDisconnect
-from typing import Dict, Optional
+from typing import Any, AsyncGenerator, Dict, List, Optional, Tuple
+import asyncio
 import json
+from functools import lru_cache
 import sys
 import os
-from datetime import datetime
+import time
 
 # Add paths
 sys.path.append(os.path.join(os.path.dirname(__file__), "..", "Agents"))
 sys.path.append(os.path.join(os.path.dirname(__file__), ".."))
 
-from Agents.graph import app as movi_graph
-from langchain_core.messages import HumanMessage
-from langgraph.types import Command
+from Agents.runtime import AgentTurn, VoiceAdapter, get_agent_runtime
 from utils.audio_processing import (
-    transcribe_audio,
-    text_to_speech,
     audio_base64_to_bytes,
-    audio_bytes_to_base64
+    audio_bytes_to_base64,
+    SentenceChunker
+)
+from utils.audio_backends import TTSBackend, get_stt_backend, get_tts_backend
+from utils.audio_service import AudioService, AudioServiceBusy
+from utils.phrases import NO_RESPONSE_TEXT
+from utils.tts_cache import TTSCache, TTS_CACHE_ENABLED, PREWARM_PHRASES
+from utils.voice_sessions import (
+    VoiceSessionManager,
+    VoiceSessionLimitExceeded,
+    create_global_limiter
+)
+from utils.voice_protocol import (
+    PROTOCOL_VERSION,
+    FRAME_AUDIO,
+    FRAME_AUDIO_END,
+    FRAME_TTS,
+    FrameError,
+    encode_frame,
+    parse_frame
 )
 
 router = APIRouter(prefix="/movi", tags=["voice"])
 
+# Whisper rejects uploads above 25 MB
+MAX_AUDIO_BYTES = int(os.getenv("MOVI_VOICE_MAX_AUDIO_BYTES", str(25 * 1024 * 1024)))
+TTS_VOICE = os.getenv("MOVI_TTS_VOICE", "nova")  # Female voice
+
+# Utterances a session may queue while a turn is running (backpressure beyond this)
+VOICE_SESSION_QUEUE_SIZE = int(os.getenv("MOVI_VOICE_SESSION_QUEUE_SIZE", "2"))
+# A new utterance aborts the reply in progress instead of queuing behind it
+VOICE_BARGE_IN = os.getenv("MOVI_VOICE_BARGE_IN", "true").lower() == "true"
+
+TTS_PREWARM = os.getenv("MOVI_TTS_PREWARM", "true").lower() == "true"
+
+
+@lru_cache(maxsize=1)
+def get_voice_tts_backend() -> TTSBackend:
+    """TTS engine selected by MOVI_AUDIO_BACKEND / MOVI_TTS_BACKEND, built on first use."""
+    return get_tts_backend()
+
+
+@lru_cache(maxsize=1)
+def get_audio_service() -> AudioService:
+    """
+    Bounded STT/TTS pools shared by every voice session on this worker.
+
+    Built on first use (or by the startup TTS prewarm): the backends import
+    their SDKs and the service starts its thread pools.
+    """
+    stt_backend = get_stt_backend()
+    tts_backend = get_voice_tts_backend()
+    return AudioService(
+        stt=stt_backend.transcribe,
+        tts=tts_backend.synthesize,
+        tts_cache=TTSCache(
+            namespace=tts_backend.cache_namespace,
+            audio_format=tts_backend.output_format
+        ) if TTS_CACHE_ENABLED else None
+    )
+
+
+async def prewarm_tts_cache() -> None:
+    """Synthesize the fixed assistant phrases so they play instantly (run at startup)."""
+    if not TTS_PREWARM:
+        return
+    audio_service = await asyncio.to_thread(get_audio_service)
+    warmed = await audio_service.prewarm(PREWARM_PHRASES, TTS_VOICE)
+    if warmed:
+        print(f"🔊 TTS cache pre-warmed with {warmed} phrases")
+
+
+def split_sentences(text: str) -> List[str]:
+    """Split a full reply into the same sentences the streaming path synthesizes."""
+    chunker = SentenceChunker()
+    return chunker.feed(text) + chunker.flush()
+
+
+async def _any_cached(audio_service: AudioService, sentences: List[str]) -> bool:
+    for sentence in sentences:
+        if await audio_service.is_cached(sentence, TTS_VOICE):
+            return True
+    return False
+
+
+async def synthesize_reply(text: str) -> bytes:
+    """
+    TTS for a complete reply.
+
+    If any sentence is already cached (e.g. the confirmation question), the
+    reply is synthesized sentence by sentence so cached sentences cost
+    nothing; the MP3 segments are concatenated. Otherwise one TTS call is
+    made for the whole text.
+    """
+    sentences = split_sentences(text)
+    audio_service = get_audio_service()
+    if len(sentences) > 1 and await _any_cached(audio_service, sentences):
+        segments = await asyncio.gather(*(audio_service.synthesize(s, TTS_VOICE) for s in sentences))
+        return b"".join(segments)
+    return await audio_service.synthesize(text, TTS_VOICE)
+
+
+# Active sessions with limits, idle/max-duration reaping and latency metrics
+voice_sessions = VoiceSessionManager(global_limiter=create_global_limiter())
+
+
+async def stream_agent_reply(
+    session_id: str,
+    user_text: str,
+    context_page: str
+) -> AsyncGenerator[Dict[str, Any], None]:
+    """
+    Run one conversational turn through the shared agent runtime and stream the reply.
+
+    Yields:
+        {"type": "token", "content": "..."} for each response token
+        {"type": "confirmation", "text": "...", "consequence_info": {...}} on HITL interrupt
+    """
+    turn = AgentTurn(
+        session_id=session_id,
+        message=user_text,
+        context_page=context_page,
+        endpoint="/movi/voice"
+    )
+    async for event in VoiceAdapter().stream(get_agent_runtime().stream(turn)):
+        yield event
+
+
+async def run_voice_turn(
+    websocket: WebSocket,
+    session_id: str,
+    audio_bytes: bytes,
+    audio_format: str,
+    streaming: bool,
+    protocol: int = 1
+) -> None:
+    """
+    STT → graph → TTS for one utterance.
+
+    streaming=True sends each sentence as soon as it is synthesized
+    (audio_chunk header + binary MP3 frame, or a single v2 TTS frame when
+    protocol=2); otherwise one audio_response with the whole reply
+    base64-encoded (original protocol).
+    """
+    turn_started = time.perf_counter()
+    audio_service = get_audio_service()
+    output_format = get_voice_tts_backend().output_format
+
+    # Step 1: Convert audio to text (STT)
+    transcribed_text = await audio_service.transcribe(audio_bytes, audio_format)
+    voice_sessions.record_latency(session_id, "stt", time.perf_counter() - turn_started)
+
+    print(f"📝 Transcription: {transcribed_text}")
+
+    # Send transcription to client
+    await websocket.send_json({
+        "type": "transcription",
+        "text": transcribed_text
+    })
+
+    # Silence or noise only: nothing to answer
+    if not transcribed_text.strip():
+        await websocket.send_json({"type": "no_speech"})
+        return
+
+    # Step 2: Process with LangGraph (same as text chat)
+    session = voice_sessions.get_session(session_id)
+    context_page = session.context_page if session else "unknown"
+
+    chunker = SentenceChunker()
+    sentences: "asyncio.Queue[Optional[str]]" = asyncio.Queue()
+    response_parts = []
+    requires_confirmation = False
+    consequence_info = None
+    tts_seconds = 0.0
+
+    async def timed_synthesize(text: str) -> bytes:
+        nonlocal tts_seconds
+        started = time.perf_counter()
+        audio = await (audio_service.synthesize(text, TTS_VOICE) if streaming else synthesize_reply(text))
+        tts_seconds += time.perf_counter() - started
+        return audio
+
+    def record_first_audio() -> None:
+        voice_sessions.record_latency(session_id, "first_audio", time.perf_counter() - turn_started)
+
+    async def speak_sentences() -> None:
+        # Step 3: Convert each sentence to speech (TTS) while the graph keeps streaming
+        seq = 0
+        while True:
+            sentence = await sentences.get()
+            if sentence is None:
+                return
+            audio = await timed_synthesize(sentence)
+            if seq == 0:
+                record_first_audio()
+            if protocol == PROTOCOL_VERSION:
+                # Header carries kind/codec/seq, no JSON message needed
+                await websocket.send_bytes(encode_frame(FRAME_TTS, output_format, seq, audio))
+                seq += 1
+                continue
+            await websocket.send_json({
+                "type": "audio_chunk",
+                "seq": seq,
+                "text": sentence,
+                "size": len(audio),
+                "format": output_format
+            })
+            await websocket.send_bytes(audio)
+            seq += 1
+
+    speaker = asyncio.create_task(speak_sentences()) if streaming else None
+    graph_started = time.perf_counter()
+
+    try:
+        async for event in stream_agent_reply(session_id, transcribed_text, context_page):
+            if event["type"] == "token":
+                text = event["content"]
+                if streaming:
+                    await websocket.send_json({"type": "token", "content": text})
+            else:
+                text = event["text"]
+                requires_confirmation = True
+                consequence_info = event["consequence_info"]
+
+            response_parts.append(text)
+            if streaming:
+                for sentence in chunker.feed(text):
+                    await sentences.put(sentence)
+        voice_sessions.record_latency(session_id, "graph", time.perf_counter() - graph_started)
+
+        if streaming:
+            for sentence in chunker.flush():
+                await sentences.put(sentence)
+            await sentences.put(None)
+            await speaker
+    finally:
+        if speaker and not speaker.done():
+            speaker.cancel()
+
+    response_text = "".join(response_parts) or NO_RESPONSE_TEXT
+    print(f"🤖 Movi response: {response_text[:100]}...")
+
+    if streaming:
+        voice_sessions.record_latency(session_id, "tts", tts_seconds)
+        voice_sessions.record_latency(session_id, "turn", time.perf_counter() - turn_started)
+        await websocket.send_json({
+            "type": "response_end",
+            "text": response_text,
+            "requires_confirmation": requires_confirmation,
+            "awaiting_confirmation": requires_confirmation,
+            "consequence_info": consequence_info
+        })
+        return
+
+    audio_response = await timed_synthesize(response_text)
+    print(f"🔊 Generated TTS response ({len(audio_response)} bytes)")
+
+    # Send audio response to client
+    await websocket.send_json({
+        "type": "audio_response",
+        "data": audio_bytes_to_base64(audio_response),
+        "format": output_format,
+        "text": response_text,
+        "requires_confirmation": requires_confirmation,
+        "awaiting_confirmation": requires_confirmation,
+        "consequence_info": consequence_info
+    })
+    record_first_audio()
+    voice_sessions.record_latency(session_id, "tts", tts_seconds)
+    voice_sessions.record_latency(session_id, "turn", time.perf_counter() - turn_started)
+
+
+class TurnController:
+    """
+    Tracks the voice turn in progress so it can be aborted.
+
+    Cancelling the turn task cancels the graph stream (and its in-flight
+    LLM request) and the TTS speaker task; no further sentences are
+    synthesized for an abandoned reply.
+    """
 
-class VoiceSessionManager:
-    """Manages active voice sessions"""
     def __init__(self):
-        self.active_sessions: Dict[str, dict] = {}
-    
-    def create_session(self, session_id: str, websocket: WebSocket, context_page: str = "unknown"):
-        self.active_sessions[session_id] = {
-            "websocket": websocket,
-            "context_page": context_page,
-            "created_at": datetime.now(),
-            "conversation_active": True
-        }
-        print(f"🎤 Voice session created: {session_id}")
-    
-    def get_session(self, session_id: str) -> Optional[dict]:
-        return self.active_sessions.get(session_id)
-    
-    def remove_session(self, session_id: str):
-        if session_id in self.active_sessions:
-            del self.active_sessions[session_id]
-            print(f"🛑 Voice session ended: {session_id}")
-    
-    def update_context(self, session_id: str, context_page: str):
-        if session_id in self.active_sessions:
-            self.active_sessions[session_id]["context_page"] = context_page
-
-
-voice_sessions = VoiceSessionManager()
+        self.current: Optional[asyncio.Task] = None
+        self.cancel_reason: Optional[str] = None
+
+    def cancel(self, reason: str) -> bool:
+        """Abort the running turn; returns False if nothing was running."""
+        if self.current is None or self.current.done():
+            return False
+        self.cancel_reason = reason
+        self.current.cancel()
+        return True
+
+    async def run(self, turn: Any) -> bool:
+        """
+        Run a turn coroutine to completion.
+
+        Returns:
+            False if the turn was cancelled, True otherwise (errors are re-raised)
+        """
+        task = self.current = asyncio.create_task(turn)
+        self.cancel_reason = None
+        try:
+            # wait() instead of awaiting the task so cancel() only stops the turn
+            await asyncio.wait({task})
+        finally:
+            if not task.done():
+                task.cancel()  # The worker itself is shutting down
+            self.current = None
+        if task.cancelled():
+            return False
+        task.result()
+        return True
+
+
+def drain_turns(turns: "asyncio.Queue[Tuple[str, bytes, str, bool, int]]") -> int:
+    """Drop queued utterances (superseded by a newer one); returns how many."""
+    dropped = 0
+    while not turns.empty():
+        turns.get_nowait()
+        turns.task_done()
+        dropped += 1
+    return dropped
+
+
+async def process_voice_turns(
+    websocket: WebSocket,
+    turns: "asyncio.Queue[Tuple[str, bytes, str, bool, int]]",
+    controller: Optional[TurnController] = None
+) -> None:
+    """
+    Per-session worker: runs queued utterances one at a time, in order,
+    while the receive loop keeps reading control messages.
+    """
+    controller = controller or TurnController()
+    while True:
+        session_id, audio_bytes, audio_format, streaming, protocol = await turns.get()
+        try:
+            completed = await controller.run(
+                run_voice_turn(websocket, session_id, audio_bytes, audio_format, streaming, protocol)
+            )
+            if not completed:
+                print(f"✋ Voice turn cancelled for {session_id} ({controller.cancel_reason})")
+                await websocket.send_json({"type": "cancelled", "reason": controller.cancel_reason})
+        except AudioServiceBusy as e:
+            await websocket.send_json({"type": "busy", "message": str(e)})
+        except Exception as e:
+            print(f"❌ Error processing voice: {str(e)}")
+            import traceback
+            traceback.print_exc()
+
+            await websocket.send_json({
+                "type": "error",
+                "message": f"Failed to process voice: {str(e)}"
+            })
+        finally:
+            turns.task_done()
 
 
 @router.websocket("/voice")
 async def voice_websocket(websocket: WebSocket):
     """
     WebSocket endpoint for voice chat.
-    
+
     Protocol:
-    1. Client sends: {"type": "init", "session_id": "...", "context_page": "..."}
-    2. Server responds: {"type": "ready"}
-    3. Client sends: {"type": "audio", "data": "base64_audio", "format": "webm"}
+    1. Client sends: {"type": "init", "session_id": "...", "context_page": "...", "protocol": 2 (optional)}
+    2. Server responds: {"type": "ready", "protocol": 1 or 2}
+    3. Client sends audio, either
+       a. {"type": "audio", "data": "base64_audio", "format": "webm"}, or
+       b. {"type": "audio_start", "format": "webm"}, binary audio frames, {"type": "audio_end"}, or
+       c. (protocol 2) binary frames with an 8-byte header (see utils/voice_protocol.py):
+          FRAME_AUDIO chunks, then a FRAME_AUDIO_END chunk; no JSON needed
     4. Server processes and responds: {"type": "transcription", "text": "..."}
-    5. Server responds: {"type": "audio_response", "data": "base64_audio", "text": "..."}
+       (followed by {"type": "no_speech"} and nothing else if the audio held no speech)
+    5. Server responds, for (a): {"type": "audio_response", "data": "base64_audio", "text": "..."}
+       for (b), streamed as the reply is generated:
+         {"type": "token", "content": "..."} for each text token
+         {"type": "audio_chunk", "seq": n, "text": "...", "size": n} followed by one binary audio frame (MP3, or WAV for local TTS) per sentence
+         {"type": "response_end", "text": "...", "requires_confirmation": bool}
+       for (c), the same but each sentence is one binary FRAME_TTS frame (no audio_chunk message)
+       A new utterance (barge-in) or {"type": "cancel"} aborts the reply in progress;
+       the server then sends {"type": "cancelled", "reason": "barge_in" | "cancel"}
     6. Client sends: {"type": "close"}
     """
     await websocket.accept()
     session_id = None
-    
+    audio_buffer: Optional[bytearray] = None
+    audio_format = "webm"
+    protocol = 1
+    turns: "asyncio.Queue[Tuple[str, bytes, str, bool, int]]" = asyncio.Queue(maxsize=VOICE_SESSION_QUEUE_SIZE)
+    controller = TurnController()
+    turn_worker = asyncio.create_task(process_voice_turns(websocket, turns, controller))
+
+    def barge_in() -> None:
+        # The user started speaking again: the pending reply is obsolete
+        if VOICE_BARGE_IN:
+            drain_turns(turns)
+            controller.cancel("barge_in")
+
+    async def enqueue_turn(audio_bytes: bytes, streaming: bool) -> None:
+        print(f"🎤 Received audio from {session_id} (format: {audio_format}, {len(audio_bytes)} bytes)")
+        try:
+            turns.put_nowait((session_id, audio_bytes, audio_format, streaming, protocol))
+        except asyncio.QueueFull:
+            # Backpressure: the session is already behind, drop this utterance
+            await websocket.send_json({
+                "type": "busy",
+                "message": "Still processing previous audio, please wait"
+            })
+
     try:
         print(f"🎤 Voice WebSocket connection established")
-        
+
         # Ensure the Movi agent is available before processing messages
-        if movi_graph is None:
+        if get_agent_runtime().graph is None:
             await websocket.send_json({"type": "error", "message": "Movi agent unavailable"})
             await websocket.close()
             return
 
         while True:
-            # Receive message from client
-            message = await websocket.receive_json()
+            # Receive message from client (JSON control messages or binary audio frames)
+            frame = await websocket.receive()
+            if frame["type"] == "websocket.disconnect":
+                raise WebSocketDisconnect(frame.get("code", 1000))
+            voice_sessions.touch(session_id)
+
+            if frame.get("bytes") is not None and protocol == PROTOCOL_VERSION:
+                try:
+                    audio_frame = parse_frame(frame["bytes"])
+                except FrameError as e:
+                    await websocket.send_json({"type": "error", "message": str(e)})
+                    continue
+                if not session_id or audio_frame.kind not in (FRAME_AUDIO, FRAME_AUDIO_END):
+                    await websocket.send_json({"type": "error", "message": "Unexpected binary frame"})
+                    continue
+                if audio_buffer is None:
+                    # First chunk of an utterance
+                    barge_in()
+                    audio_buffer = bytearray()
+                    audio_format = audio_frame.codec
+                if len(audio_buffer) + len(audio_frame.payload) > MAX_AUDIO_BYTES:
+                    audio_buffer = None
+                    await websocket.send_json({
+                        "type": "error",
+                        "message": "Audio exceeds maximum utterance size"
+                    })
+                    continue
+                audio_buffer.extend(audio_frame.payload)
+                if audio_frame.kind == FRAME_AUDIO_END:
+                    audio_bytes = bytes(audio_buffer)
+                    audio_buffer = None
+                    if not audio_bytes:
+                        await websocket.send_json({"type": "error", "message": "No audio data provided"})
+                        continue
+                    await enqueue_turn(audio_bytes, streaming=True)
+                continue
+
+            if frame.get("bytes") is not None:
+                if audio_buffer is None:
+                    await websocket.send_json({
+                        "type": "error",
+                        "message": "Send audio_start before binary audio frames"
+                    })
+                    continue
+                if len(audio_buffer) + len(frame["bytes"]) > MAX_AUDIO_BYTES:
+                    audio_buffer = None
+                    await websocket.send_json({
+                        "type": "error",
+                        "message": "Audio exceeds maximum utterance size"
+                    })
+                    continue
+                audio_buffer.extend(frame["bytes"])
+                continue
+
+            message = json.loads(frame.get("text") or "{}")
             msg_type = message.get("type")
-            
+
             # Handle initialization
             if msg_type == "init":
                 session_id = message.get("session_id")
                 context_page = message.get("context_page", "unknown")
-                
+                protocol = PROTOCOL_VERSION if message.get("protocol") == PROTOCOL_VERSION else 1
+
                 if not session_id:
                     await websocket.send_json({
                         "type": "error",
                         "message": "session_id is required"
                     })
                     continue
-                
-                voice_sessions.create_session(session_id, websocket, context_page)
-                
+
+                try:
+                    await voice_sessions.acreate_session(session_id, websocket, context_page)
+                except VoiceSessionLimitExceeded as e:
+                    await websocket.send_json({"type": "busy", "message": str(e)})
+                    session_id = None
+                    # 1013: try again later
+                    await websocket.close(code=1013)
+                    return
+
                 await websocket.send_json({
                     "type": "ready",
-                    "message": "Voice session initialized"
+                    "message": "Voice session initialized",
+                    "protocol": protocol
                 })
-                
+
                 print(f"✅ Voice session ready: {session_id} (page: {context_page})")
-            
+
             # Handle audio input
-            elif msg_type == "audio":
+            elif msg_type in ("audio", "audio_start", "audio_end"):
                 if not session_id:
                     await websocket.send_json({
                         "type": "error",
                         "message": "Session not initialized"
                     })
                     continue
-                
-                audio_base64 = message.get("data")
-                audio_format = message.get("format", "webm")
-                
-                if not audio_base64:
-                    await websocket.send_json({
-                        "type": "error",
-                        "message": "No audio data provided"
-                    })
+
+                if msg_type == "audio_start":
+                    barge_in()
+                    audio_buffer = bytearray()
+                    audio_format = message.get("format", "webm")
                     continue
-                
-                print(f"🎤 Received audio from {session_id} (format: {audio_format})")
-                
-                try:
-                    # Step 1: Convert audio to text (STT)
-                    audio_bytes = audio_base64_to_bytes(audio_base64)
-                    transcribed_text = transcribe_audio(audio_bytes, audio_format)
-                    
-                    print(f"📝 Transcription: {transcribed_text}")
-                    
-                    # Send transcription to client
-                    await websocket.send_json({
-                        "type": "transcription",
-                        "text": transcribed_text
-                    })
-                    
-                    # Step 2: Process with LangGraph (same as text chat)
-                    session = voice_sessions.get_session(session_id)
-                    context_page = session["context_page"]
-                    
-                    # Build LangGraph config
-                    config = {
-                        "configurable": {
-                            "thread_id": session_id
-                        }
-                    }
-                    
-                    # Check if conversation state exists and if interrupted
-                    current_state = movi_graph.get_state(config)
-                    
-                    # If graph is interrupted, handle resume
-                    if current_state.next:
-                        # User is responding to previous interrupt
-                        user_approved = transcribed_text.lower().strip() in [
-                            "yes", "y", "proceed", "confirm", "ok", "okay", "sure"
-                        ]
-                        result = movi_graph.invoke(Command(resume=user_approved), config=config)
-                    else:
-                        # Normal flow: Create proper MoviState
-                        # Load existing chat history from checkpointer (if any)
-                        existing_messages = current_state.values.get("messages", []) if current_state.values else []
-                        
-                        # Trim to last 5 conversation pairs (10 messages)
-                        if len(existing_messages) > 10:
-                            existing_messages = existing_messages[-10:]
-                        
-                        input_state = {
-                            "user_msg": transcribed_text,
-                            "current_page": context_page,
-                            "messages": existing_messages,  # Load previous history
-                            "intent": None,
-                            "tool_name": None,
-                            "entities": None,
-                            "needs_user_input": False,
-                            "consequences": None,
-                            "awaiting_confirmation": False,
-                            "tool_result": None
-                        }
-                    
-                    # Invoke the graph
-                    if not current_state.next:
-                        result = movi_graph.invoke(input_state, config=config)
-                    
-                    # Check final state for interrupts
-                    final_state = movi_graph.get_state(config)
-                    is_interrupted = bool(final_state.next)
-                    
-                    # Extract response
-                    if is_interrupted and "__interrupt__" in result:
-                        # Get interrupt payload
-                        interrupt_data = result["__interrupt__"][0].value if result["__interrupt__"] else {}
-                        response_text = interrupt_data.get("details", "Confirmation required.")
-                        response_text += "\n\nDo you want to proceed? (yes/no)"
-                    else:
-                        # Normal response
-                        last_message = result.get("messages", [])[-1] if result.get("messages") else None
-                        if last_message:
-                            response_text = last_message.content if hasattr(last_message, "content") else str(last_message)
-                        else:
-                            response_text = result.get("response", "No response generated.")
-                    
-                    print(f"🤖 Movi response: {response_text[:100]}...")
-                    
-                    # Check if confirmation is needed
-                    requires_confirmation = result.get("requires_confirmation", False)
-                    awaiting_confirmation = result.get("awaiting_confirmation", False)
-                    consequence_info = result.get("consequence_info")
-                    
-                    # Step 3: Convert response to speech (TTS)
-                    audio_response = text_to_speech(response_text, voice="nova")  # Female voice
-                    audio_base64_response = audio_bytes_to_base64(audio_response)
-                    
-                    print(f"🔊 Generated TTS response ({len(audio_response)} bytes)")
-                    
-                    # Send audio response to client
-                    await websocket.send_json({
-                        "type": "audio_response",
-                        "data": audio_base64_response,
-                        "text": response_text,
-                        "requires_confirmation": requires_confirmation,
-                        "awaiting_confirmation": awaiting_confirmation,
-                        "consequence_info": consequence_info
-                    })
-                    
-                except Exception as e:
-                    print(f"❌ Error processing voice: {str(e)}")
-                    import traceback
-                    traceback.print_exc()
-                    
-                    await websocket.send_json({
-                        "type": "error",
-                        "message": f"Failed to process voice: {str(e)}"
-                    })
-            
+
+                if msg_type == "audio_end":
+                    if not audio_buffer:
+                        audio_buffer = None
+                        await websocket.send_json({
+                            "type": "error",
+                            "message": "No audio data provided"
+                        })
+                        continue
+                    audio_bytes, streaming = bytes(audio_buffer), True
+                    audio_buffer = None
+                else:
+                    audio_base64 = message.get("data")
+                    audio_format = message.get("format", "webm")
+
+                    if not audio_base64:
+                        await websocket.send_json({
+                            "type": "error",
+                            "message": "No audio data provided"
+                        })
+                        continue
+                    audio_bytes, streaming = audio_base64_to_bytes(audio_base64), False
+                    barge_in()
+
+                await enqueue_turn(audio_bytes, streaming)
+
             # Handle context update
             elif msg_type == "update_context":
                 if session_id:
                     new_context = message.get("context_page", "unknown")
                     voice_sessions.update_context(session_id, new_context)
                     print(f"🔄 Context updated for {session_id}: {new_context}")
-            
+
+            # Explicit cancel (e.g. user pressed stop)
+            elif msg_type == "cancel":
+                drain_turns(turns)
+                if not controller.cancel("cancel"):
+                    await websocket.send_json({"type": "cancelled", "reason": "idle"})
+
             # Handle close
             elif msg_type == "close":
                 print(f"👋 Client requested close for {session_id}")
+                # Let queued turns finish before closing
+                await turns.join()
                 break
-            
+
             else:
                 await websocket.send_json({
                     "type": "error",
                     "message": f"Unknown message type: {msg_type}"
                 })
-    
+
     except WebSocketDisconnect:
         print(f"🔌 WebSocket disconnected: {session_id}")
     except Exception as e:
@@ -264,22 +599,29 @@ async def voice_websocket(websocket: WebSocket):
         import traceback
         traceback.print_exc()
     finally:
+        turn_worker.cancel()
         if session_id:
-            voice_sessions.remove_session(session_id)
-        await websocket.close()
+            await voice_sessions.aremove_session(session_id, websocket)
+        try:
+            await websocket.close()
+        except RuntimeError:
+            pass  # Already closed by the client
 
 
 @router.get("/voice/sessions")
 async def get_voice_sessions():
-    """Get active voice sessions (for debugging)"""
+    """Active voice sessions with per-session latency breakdowns"""
     return {
         "active_sessions": len(voice_sessions.active_sessions),
-        "sessions": [
-            {
-                "session_id": sid,
-                "context_page": session["context_page"],
-                "created_at": session["created_at"].isoformat()
-            }
-            for sid, session in voice_sessions.active_sessions.items()
-        ]
+        "sessions": [session.info() for session in list(voice_sessions.active_sessions.values())]
+    }
+
+
+@router.get("/voice/metrics")
+async def get_voice_metrics():
+    """Session limits, reaping counters, stage latency percentiles and STT/TTS pool usage"""
+    # metrics() may read the global session count from Redis
+    return {
+        **await asyncio.to_thread(voice_sessions.metrics),
+        "audio": get_audio_service().stats()
     }
@@ -0,0 +1,32 @@
+"""
+Admin Access
+Shared-token check for operational endpoints (slow queries, profiles)
+"""
+import hmac
+import os
+from typing import Optional
+from fastapi import Header, HTTPException
+
+# Admin endpoints are disabled unless a token is configured
+ADMIN_TOKEN = os.getenv("MOVI_ADMIN_TOKEN", "")
+ADMIN_HEADER = "X-Admin-Token"
+
+
+def is_admin_token(token: Optional[str]) -> bool:
+    """Constant-time comparison against MOVI_ADMIN_TOKEN (always False when unset)."""
+    if not ADMIN_TOKEN or not token:
+        return False
+    return hmac.compare_digest(token.encode(), ADMIN_TOKEN.encode())
+
+
+def require_admin(x_admin_token: Optional[str] = Header(None)) -> None:
+    """
+    FastAPI dependency guarding admin routes.
+
+    Raises:
+        HTTPException: 404 when admin endpoints are disabled, 403 on a wrong token
+    """
+    if not ADMIN_TOKEN:
+        raise HTTPException(status_code=404, detail="Not found")
+    if not is_admin_token(x_admin_token):
+        raise HTTPException(status_code=403, detail="Admin token required")
@@ -0,0 +1,281 @@
+"""
+Pluggable STT/TTS Backends for Voice Features
+OpenAI (Whisper/TTS), local CPU inference (faster-whisper, Piper) and a deterministic fake, chosen by configuration
+"""
+import hashlib
+import io
+import json
+import os
+import shutil
+import subprocess
+import time
+import wave
+from abc import ABC, abstractmethod
+from concurrent.futures import ProcessPoolExecutor
+from functools import lru_cache
+from typing import Any, Optional
+from utils.audio_preprocess import prepare_for_stt
+
+# "openai", "local" or "fake"; STT and TTS can be overridden separately
+AUDIO_BACKEND = os.getenv("MOVI_AUDIO_BACKEND", "openai").lower()
+STT_BACKEND = os.getenv("MOVI_STT_BACKEND", AUDIO_BACKEND).lower()
+TTS_BACKEND = os.getenv("MOVI_TTS_BACKEND", AUDIO_BACKEND).lower()
+
+LOCAL_STT_MODEL = os.getenv("MOVI_LOCAL_STT_MODEL", "base.en")
+LOCAL_STT_COMPUTE_TYPE = os.getenv("MOVI_LOCAL_STT_COMPUTE_TYPE", "int8")
+LOCAL_STT_PROCESSES = int(os.getenv("MOVI_LOCAL_STT_PROCESSES", "2"))
+LOCAL_STT_THREADS = int(os.getenv("MOVI_LOCAL_STT_THREADS", "2"))
+
+PIPER_BINARY = os.getenv("MOVI_PIPER_BINARY") or shutil.which("piper")
+PIPER_MODEL = os.getenv("MOVI_PIPER_MODEL", "")
+
+FAKE_STT_TEXT = os.getenv("MOVI_FAKE_STT_TEXT", "show all trips")
+FAKE_AUDIO_LATENCY_MS = int(os.getenv("MOVI_FAKE_AUDIO_LATENCY_MS", "0"))
+
+
+class STTBackend(ABC):
+    """Speech-to-text engine; transcribe() is blocking and runs on the AudioService STT pool"""
+    name = "base"
+
+    @abstractmethod
+    def transcribe(self, audio_data: bytes, format: str = "webm") -> str:
+        """Text spoken in the audio (empty if there is no speech)."""
+
+
+class TTSBackend(ABC):
+    """Text-to-speech engine; synthesize() is blocking and runs on the AudioService TTS pool"""
+    name = "base"
+    # Container of the returned audio (sent to clients so they can play it)
+    output_format = "mp3"
+
+    @property
+    def cache_namespace(self) -> str:
+        """TTS cache namespace, so audio from another engine/model is never served."""
+        return self.name
+
+    @abstractmethod
+    def synthesize(self, text: str, voice: str = "alloy") -> bytes:
+        """Audio for the text, in output_format."""
+
+
+# ----------------------------------------------------------------------
+# OpenAI
+# ----------------------------------------------------------------------
+
+class OpenAISTT(STTBackend):
+    """Whisper API (whisper-1), with local VAD trimming before upload"""
+    name = "openai"
+
+    def transcribe(self, audio_data: bytes, format: str = "webm") -> str:
+        from utils.audio_processing import transcribe_audio
+        return transcribe_audio(audio_data, format)
+
+
+class OpenAITTS(TTSBackend):
+    """OpenAI TTS (tts-1), MP3 output"""
+    name = "openai"
+
+    @property
+    def cache_namespace(self) -> str:
+        return "openai:tts-1"
+
+    def synthesize(self, text: str, voice: str = "alloy") -> bytes:
+        from utils.audio_processing import text_to_speech
+        return text_to_speech(text, voice)
+
+
+# ----------------------------------------------------------------------
+# Local (faster-whisper in a process pool, Piper)
+# ----------------------------------------------------------------------
+
+# Loaded once per worker process by _init_whisper_worker
+_whisper_model: Any = None
+
+
+def _init_whisper_worker(model_name: str, compute_type: str, cpu_threads: int) -> None:
+    global _whisper_model
+    import faster_whisper
+
+    _whisper_model = faster_whisper.WhisperModel(
+        model_name, device="cpu", compute_type=compute_type, cpu_threads=cpu_threads
+    )
+
+
+def _whisper_transcribe(audio_data: bytes) -> str:
+    segments, _ = _whisper_model.transcribe(io.BytesIO(audio_data), language="en", beam_size=1)
+    return "".join(segment.text for segment in segments).strip()
+
+
+class LocalWhisperSTT(STTBackend):
+    """
+    faster-whisper on CPU.
+
+    Inference is CPU bound and holds the GIL, so it runs in a process pool
+    whose workers each load the model once; the AudioService thread only
+    waits for the result.
+    """
+    name = "local"
+
+    def __init__(
+        self,
+        model_name: str = LOCAL_STT_MODEL,
+        compute_type: str = LOCAL_STT_COMPUTE_TYPE,
+        processes: int = LOCAL_STT_PROCESSES,
+        cpu_threads: int = LOCAL_STT_THREADS
+    ):
+        # Optional and heavy: only imported when the local backend is selected
+        try:
+            import faster_whisper  # noqa: F401
+        except ImportError:
+            raise RuntimeError("MOVI_STT_BACKEND=local requires the faster-whisper package")
+        self.model_name = model_name
+        self._pool_args = (model_name, compute_type, cpu_threads)
+        self._processes = processes
+        self._pool: Optional[ProcessPoolExecutor] = None
+
+    def _get_pool(self) -> ProcessPoolExecutor:
+        """Lazily created so the model is only loaded once voice is actually used."""
+        if self._pool is None:
+            self._pool = ProcessPoolExecutor(
+                max_workers=self._processes,
+                initializer=_init_whisper_worker,
+                initargs=self._pool_args,
+            )
+        return self._pool
+
+    def transcribe(self, audio_data: bytes, format: str = "webm") -> str:
+        prepared = prepare_for_stt(audio_data, format)
+        if not prepared.has_speech:
+            print(f"🔇 No speech detected ({prepared.speech_ms} ms), skipping STT")
+            return ""
+        try:
+            return self._get_pool().submit(_whisper_transcribe, prepared.data).result()
+        except Exception as e:
+            print(f"❌ STT Error: {str(e)}")
+            raise Exception(f"Speech-to-text failed: {str(e)}")
+
+
+class PiperTTS(TTSBackend):
+    """
+    Piper neural TTS via its CLI, WAV output.
+
+    Piper voices are separate models, so the OpenAI voice name is ignored
+    and MOVI_PIPER_MODEL selects the voice.
+    """
+    name = "local"
+    output_format = "wav"
+
+    def __init__(self, model_path: str = PIPER_MODEL, binary: Optional[str] = PIPER_BINARY):
+        if not binary or not model_path:
+            raise RuntimeError("MOVI_TTS_BACKEND=local requires the piper binary and MOVI_PIPER_MODEL")
+        self.binary = binary
+        self.model_path = model_path
+        self.sample_rate = self._read_sample_rate(model_path)
+
+    @staticmethod
+    def _read_sample_rate(model_path: str) -> int:
+        # Piper ships "<model>.onnx.json" next to the model
+        try:
+            with open(f"{model_path}.json") as f:
+                return int(json.load(f)["audio"]["sample_rate"])
+        except (OSError, KeyError, ValueError):
+            return 22050
+
+    @property
+    def cache_namespace(self) -> str:
+        return f"piper:{os.path.basename(self.model_path)}"
+
+    def synthesize(self, text: str, voice: str = "alloy") -> bytes:
+        try:
+            result = subprocess.run(
+                [self.binary, "--model", self.model_path, "--output-raw"],
+                input=text.encode("utf-8"),
+                stdout=subprocess.PIPE,
+                stderr=subprocess.PIPE,
+                check=True,
+            )
+        except Exception as e:
+            print(f"❌ TTS Error: {str(e)}")
+            raise Exception(f"Text-to-speech failed: {str(e)}")
+
+        output = io.BytesIO()
+        with wave.open(output, "wb") as wav:
+            wav.setnchannels(1)
+            wav.setsampwidth(2)
+            wav.setframerate(self.sample_rate)
+            wav.writeframes(result.stdout)
+        return output.getvalue()
+
+
+# ----------------------------------------------------------------------
+# Fake (tests and load tests)
+# ----------------------------------------------------------------------
+
+def _fake_delay(latency_ms: int) -> None:
+    if latency_ms > 0:
+        time.sleep(latency_ms / 1000)
+
+
+class FakeSTT(STTBackend):
+    """
+    Deterministic STT without any model or network.
+
+    UTF-8 text sent as "audio" is returned as the transcription, so load
+    tests can script what the user says; anything else yields a fixed text.
+    """
+    name = "fake"
+
+    def __init__(self, text: str = FAKE_STT_TEXT, latency_ms: int = FAKE_AUDIO_LATENCY_MS):
+        self.text = text
+        self.latency_ms = latency_ms
+
+    def transcribe(self, audio_data: bytes, format: str = "webm") -> str:
+        _fake_delay(self.latency_ms)
+        try:
+            spoken = audio_data.decode("utf-8").strip()
+        except UnicodeDecodeError:
+            spoken = ""
+        return spoken if spoken.isprintable() and spoken else self.text
+
+
+class FakeTTS(TTSBackend):
+    """Deterministic TTS: a short fake "MP3" derived from the voice and text"""
+    name = "fake"
+
+    def __init__(self, latency_ms: int = FAKE_AUDIO_LATENCY_MS):
+        self.latency_ms = latency_ms
+
+    def synthesize(self, text: str, voice: str = "alloy") -> bytes:
+        _fake_delay(self.latency_ms)
+        digest = hashlib.sha256(f"{voice}\x00{text}".encode("utf-8")).hexdigest()[:16]
+        return f"fake-mp3:{voice}:{digest}:{text}".encode("utf-8")
+
+
+STT_BACKENDS = {"openai": OpenAISTT, "local": LocalWhisperSTT, "fake": FakeSTT}
+TTS_BACKENDS = {"openai": OpenAITTS, "local": PiperTTS, "fake": FakeTTS}
+
+
+@lru_cache(maxsize=None)
+def get_stt_backend(name: str = STT_BACKEND) -> STTBackend:
+    """
+    STT backend selected by MOVI_STT_BACKEND (or MOVI_AUDIO_BACKEND).
+
+    Raises:
+        ValueError: If the backend name is unknown
+    """
+    if name not in STT_BACKENDS:
+        raise ValueError(f"Unknown STT backend '{name}' (choose from {', '.join(STT_BACKENDS)})")
+    return STT_BACKENDS[name]()
+
+
+@lru_cache(maxsize=None)
+def get_tts_backend(name: str = TTS_BACKEND) -> TTSBackend:
+    """
+    TTS backend selected by MOVI_TTS_BACKEND (or MOVI_AUDIO_BACKEND).
+
+    Raises:
+        ValueError: If the backend name is unknown
+    """
+    if name not in TTS_BACKENDS:
+        raise ValueError(f"Unknown TTS backend '{name}' (choose from {', '.join(TTS_BACKENDS)})")
+    return TTS_BACKENDS[name]()
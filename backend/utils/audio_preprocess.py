@@ -0,0 +1,199 @@
+"""
+Audio Preprocessing for Speech-to-Text
+Decodes browser recordings to 16 kHz mono PCM, trims silence with voice activity
+detection and re-encodes compactly (FLAC/Opus) before the audio is uploaded to Whisper.
+"""
+import io
+import os
+import shutil
+import subprocess
+import wave
+from dataclasses import dataclass
+from typing import List, Optional, Tuple
+
+try:
+    import audioop  # stdlib up to Python 3.12
+except ImportError:
+    audioop = None
+
+try:
+    import webrtcvad  # optional, more robust than the energy detector
+except ImportError:
+    webrtcvad = None
+
+AUDIO_PREPROCESS_ENABLED = os.getenv("MOVI_AUDIO_PREPROCESS", "true").lower() == "true"
+TARGET_SAMPLE_RATE = 16000
+SAMPLE_WIDTH = 2  # 16-bit PCM
+FRAME_MS = 30
+# Minimum detected speech for an utterance to be worth transcribing
+MIN_SPEECH_MS = int(os.getenv("MOVI_VAD_MIN_SPEECH_MS", "300"))
+# Absolute RMS floor for the energy detector (16-bit scale)
+VAD_MIN_RMS = int(os.getenv("MOVI_VAD_MIN_RMS", "300"))
+VAD_PADDING_MS = int(os.getenv("MOVI_VAD_PADDING_MS", "200"))
+WEBRTC_VAD_MODE = int(os.getenv("MOVI_WEBRTC_VAD_MODE", "2"))
+# "flac" (lossless) or "opus" (smallest); needs ffmpeg, otherwise 16 kHz WAV is sent
+STT_UPLOAD_CODEC = os.getenv("MOVI_STT_UPLOAD_CODEC", "opus").lower()
+
+FFMPEG = shutil.which("ffmpeg")
+
+
+@dataclass
+class PreparedAudio:
+    """Audio ready for STT, or a verdict that there is no speech"""
+    data: bytes
+    format: str
+    speech_ms: int
+    has_speech: bool = True
+
+
+def _run_ffmpeg(args: List[str], data: bytes) -> bytes:
+    result = subprocess.run(
+        [FFMPEG, "-hide_banner", "-loglevel", "error", *args],
+        input=data,
+        stdout=subprocess.PIPE,
+        stderr=subprocess.PIPE,
+        check=True,
+    )
+    return result.stdout
+
+
+def decode_to_pcm(audio_data: bytes, format: str) -> Optional[bytes]:
+    """
+    Decode any recording to 16 kHz mono 16-bit PCM.
+
+    Uses ffmpeg when installed; WAV can also be handled in-process.
+
+    Returns:
+        Raw PCM bytes, or None if this format cannot be decoded here
+    """
+    if FFMPEG:
+        return _run_ffmpeg(
+            ["-i", "pipe:0", "-ac", "1", "-ar", str(TARGET_SAMPLE_RATE), "-f", "s16le", "pipe:1"],
+            audio_data,
+        )
+
+    if format.lower() != "wav" or audioop is None:
+        return None
+
+    with wave.open(io.BytesIO(audio_data), "rb") as wav:
+        channels, width, rate = wav.getnchannels(), wav.getsampwidth(), wav.getframerate()
+        pcm = wav.readframes(wav.getnframes())
+
+    if width != SAMPLE_WIDTH:
+        pcm = audioop.lin2lin(pcm, width, SAMPLE_WIDTH)
+    if channels == 2:
+        pcm = audioop.tomono(pcm, SAMPLE_WIDTH, 0.5, 0.5)
+    elif channels != 1:
+        return None
+    if rate != TARGET_SAMPLE_RATE:
+        pcm, _ = audioop.ratecv(pcm, SAMPLE_WIDTH, 1, rate, TARGET_SAMPLE_RATE, None)
+    return pcm
+
+
+def _frames(pcm: bytes) -> List[bytes]:
+    frame_bytes = TARGET_SAMPLE_RATE * FRAME_MS // 1000 * SAMPLE_WIDTH
+    return [pcm[i:i + frame_bytes] for i in range(0, len(pcm) - frame_bytes + 1, frame_bytes)]
+
+
+def _frame_rms(frame: bytes) -> int:
+    if audioop is not None:
+        return audioop.rms(frame, SAMPLE_WIDTH)
+    samples = memoryview(frame).cast("h")
+    return int((sum(s * s for s in samples) / max(len(samples), 1)) ** 0.5)
+
+
+def detect_speech(pcm: bytes) -> List[bool]:
+    """
+    Per-frame (30 ms) speech decision.
+
+    Uses WebRTC VAD when installed; otherwise an energy detector whose
+    threshold adapts to the recording's noise floor.
+    """
+    frames = _frames(pcm)
+    if not frames:
+        return []
+
+    if webrtcvad is not None:
+        vad = webrtcvad.Vad(WEBRTC_VAD_MODE)
+        return [vad.is_speech(frame, TARGET_SAMPLE_RATE) for frame in frames]
+
+    energies = [_frame_rms(frame) for frame in frames]
+    noise_floor = sorted(energies)[len(energies) // 5]
+    threshold = max(VAD_MIN_RMS, noise_floor * 3)
+    return [energy >= threshold for energy in energies]
+
+
+def trim_silence(pcm: bytes, speech: List[bool]) -> Tuple[bytes, int]:
+    """
+    Cut leading/trailing silence (keeping a little padding).
+
+    Returns:
+        (trimmed PCM, milliseconds of detected speech)
+    """
+    speech_ms = sum(speech) * FRAME_MS
+    if not any(speech):
+        return b"", 0
+
+    frame_bytes = TARGET_SAMPLE_RATE * FRAME_MS // 1000 * SAMPLE_WIDTH
+    pad = VAD_PADDING_MS // FRAME_MS
+    first = max(speech.index(True) - pad, 0)
+    last = min(len(speech) - 1 - speech[::-1].index(True) + pad, len(speech) - 1)
+    return pcm[first * frame_bytes:(last + 1) * frame_bytes], speech_ms
+
+
+def encode_pcm(pcm: bytes) -> Tuple[bytes, str]:
+    """
+    Encode 16 kHz mono PCM for upload.
+
+    Returns:
+        (encoded bytes, format/extension understood by Whisper)
+    """
+    raw_args = ["-f", "s16le", "-ar", str(TARGET_SAMPLE_RATE), "-ac", "1", "-i", "pipe:0"]
+    if FFMPEG and STT_UPLOAD_CODEC == "opus":
+        return _run_ffmpeg([*raw_args, "-c:a", "libopus", "-b:a", "24k", "-f", "ogg", "pipe:1"], pcm), "ogg"
+    if FFMPEG and STT_UPLOAD_CODEC == "flac":
+        return _run_ffmpeg([*raw_args, "-f", "flac", "pipe:1"], pcm), "flac"
+
+    output = io.BytesIO()
+    with wave.open(output, "wb") as wav:
+        wav.setnchannels(1)
+        wav.setsampwidth(SAMPLE_WIDTH)
+        wav.setframerate(TARGET_SAMPLE_RATE)
+        wav.writeframes(pcm)
+    return output.getvalue(), "wav"
+
+
+def prepare_for_stt(audio_data: bytes, format: str = "webm") -> PreparedAudio:
+    """
+    Normalize and trim an utterance before transcription.
+
+    Audio that cannot be decoded locally (no ffmpeg, unknown container) is
+    passed through unchanged so STT still works.
+
+    Args:
+        audio_data: Raw recording from the browser
+        format: Container/codec of the recording (webm, wav, ...)
+
+    Returns:
+        PreparedAudio; has_speech=False means the STT call should be skipped
+    """
+    if not AUDIO_PREPROCESS_ENABLED:
+        return PreparedAudio(audio_data, format, speech_ms=-1)
+
+    try:
+        pcm = decode_to_pcm(audio_data, format)
+        if pcm is None:
+            return PreparedAudio(audio_data, format, speech_ms=-1)
+
+        trimmed, speech_ms = trim_silence(pcm, detect_speech(pcm))
+        if speech_ms < MIN_SPEECH_MS:
+            return PreparedAudio(b"", format, speech_ms=speech_ms, has_speech=False)
+
+        data, encoded_format = encode_pcm(trimmed)
+        # Keep the original if re-encoding did not help
+        if len(data) >= len(audio_data):
+            return PreparedAudio(audio_data, format, speech_ms=speech_ms)
+        return PreparedAudio(data, encoded_format, speech_ms=speech_ms)
+    except Exception as e:
+        print(f"⚠️  Audio preprocessing skipped: {str(e)}")
+        return PreparedAudio(audio_data, format, speech_ms=-1)
@@ -5,33 +5,54 @@ Handles STT (Speech-to-Text) and TTS (Text-to-Speech) using OpenAI APIs
 import os
 import base64
 import io
-from typing import Optional
-from openai import OpenAI
-from dotenv import load_dotenv
+import re
+from functools import lru_cache
+from typing import TYPE_CHECKING, List, Optional
+from utils.audio_preprocess import prepare_for_stt
 
-load_dotenv()
+if TYPE_CHECKING:
+    from openai import OpenAI
 
-client = OpenAI(api_key=os.getenv("OPENAI_API_KEY"))
+
+@lru_cache(maxsize=1)
+def get_openai_client() -> "OpenAI":
+    """
+    OpenAI client for Whisper/TTS, created on first use so other backends
+    need no API key (and workers that never speak never import the SDK).
+    """
+    from openai import OpenAI
+
+    return OpenAI(api_key=os.getenv("OPENAI_API_KEY"))
 
 
 def transcribe_audio(audio_data: bytes, format: str = "webm") -> str:
     """
     Convert audio bytes to text using OpenAI Whisper.
+
+    The recording is first downmixed, resampled to 16 kHz, trimmed with VAD
+    and re-encoded; utterances without enough speech return "" without
+    calling Whisper.
     
     Args:
         audio_data: Raw audio bytes
         format: Audio format (webm, mp3, wav, etc.)
     
     Returns:
-        Transcribed text
+        Transcribed text ("" when no speech was detected)
     """
+    prepared = prepare_for_stt(audio_data, format)
+    if not prepared.has_speech:
+        print(f"🔇 No speech detected ({prepared.speech_ms} ms), skipping STT")
+        return ""
+    audio_data, format = prepared.data, prepared.format
+
     try:
         # Create a file-like object from bytes
         audio_file = io.BytesIO(audio_data)
         audio_file.name = f"audio.{format}"
         
         # Call Whisper API
-        transcript = client.audio.transcriptions.create(
+        transcript = get_openai_client().audio.transcriptions.create(
             model="whisper-1",
             file=audio_file,
             language="en"  # Can be made dynamic
@@ -55,7 +76,7 @@ def text_to_speech(text: str, voice: str = "alloy") -> bytes:
         Audio bytes (MP3 format)
     """
     try:
-        response = client.audio.speech.create(
+        response = get_openai_client().audio.speech.create(
             model="tts-1",  # Use tts-1-hd for higher quality
             voice=voice,
             input=text,
@@ -100,4 +121,53 @@ def audio_bytes_to_base64(audio_bytes: bytes) -> str:
         Base64 encoded audio string
     """
     return base64.b64encode(audio_bytes).decode('utf-8')
-        
\ No newline at end of file
+        
+
+# Sentence boundary: terminal punctuation followed by whitespace, or a newline
+SENTENCE_BOUNDARY = re.compile(r"(?<=[.!?])\s+|\n+")
+MIN_SENTENCE_CHARS = int(os.getenv("MOVI_TTS_MIN_SENTENCE_CHARS", "24"))
+
+
+class SentenceChunker:
+    """
+    Splits a stream of LLM tokens into sentences for incremental TTS.
+
+    Very short sentences ("Sure.") are merged with the next one so each TTS
+    request carries enough text to sound natural.
+    """
+
+    def __init__(self, min_chars: int = MIN_SENTENCE_CHARS):
+        self.min_chars = min_chars
+        self._buffer = ""
+
+    def feed(self, token: str) -> List[str]:
+        """
+        Add a token and return any sentences that are now complete.
+
+        Args:
+            token: Next chunk of streamed text
+
+        Returns:
+            Complete sentences ready for TTS (possibly empty)
+        """
+        self._buffer += token
+        parts = SENTENCE_BOUNDARY.split(self._buffer)
+        # The last part has no boundary after it yet
+        self._buffer = parts.pop()
+
+        sentences: List[str] = []
+        pending = ""
+        for part in parts:
+            pending = f"{pending} {part}".strip() if pending else part.strip()
+            if len(pending) >= self.min_chars:
+                sentences.append(pending)
+                pending = ""
+        if pending:
+            self._buffer = f"{pending} {self._buffer}"
+        return sentences
+
+    def flush(self) -> List[str]:
+        """Return whatever text remains at the end of the stream."""
+        remaining = self._buffer.strip()
+        self._buffer = ""
+        return [remaining] if remaining else []
@@ -0,0 +1,127 @@
+"""
+Audio Service for Voice Features
+Runs blocking STT/TTS calls on bounded thread pools so voice sessions never block the event loop
+"""
+import asyncio
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, List, Optional
+from utils.tts_cache import TTSCache
+
+STT_WORKERS = int(os.getenv("MOVI_STT_WORKERS", "4"))
+TTS_WORKERS = int(os.getenv("MOVI_TTS_WORKERS", "8"))
+# Jobs allowed to wait for a worker before new work is rejected (backpressure)
+AUDIO_MAX_PENDING = int(os.getenv("MOVI_AUDIO_MAX_PENDING", "64"))
+
+
+class AudioServiceBusy(Exception):
+    """Raised when the STT/TTS pools are saturated and the job is rejected"""
+
+
+class AudioService:
+    """
+    Executor-backed STT/TTS with bounded concurrency.
+
+    STT and TTS get separate pools so a burst of sentence-level TTS cannot
+    starve transcription. When a TTSCache is given, cached phrases are
+    returned without touching the pool (and never count as busy). Each pool runs at most N jobs at a time; once more
+    than max_pending jobs are queued behind them, new jobs fail fast with
+    AudioServiceBusy instead of piling up latency.
+    """
+
+    def __init__(
+        self,
+        stt: Callable[..., str],
+        tts: Callable[..., bytes],
+        stt_workers: int = STT_WORKERS,
+        tts_workers: int = TTS_WORKERS,
+        max_pending: int = AUDIO_MAX_PENDING,
+        tts_cache: Optional[TTSCache] = None
+    ):
+        self._stt = stt
+        self.tts_cache = tts_cache
+        self._tts = tts
+        self._stt_pool = ThreadPoolExecutor(max_workers=stt_workers, thread_name_prefix="movi-stt")
+        self._tts_pool = ThreadPoolExecutor(max_workers=tts_workers, thread_name_prefix="movi-tts")
+        self._limits = {"stt": stt_workers + max_pending, "tts": tts_workers + max_pending}
+        self._in_flight = {"stt": 0, "tts": 0}
+        self._lock = threading.Lock()
+
+    async def _run(self, kind: str, pool: ThreadPoolExecutor, func: Callable[..., Any], *args: Any) -> Any:
+        with self._lock:
+            if self._in_flight[kind] >= self._limits[kind]:
+                raise AudioServiceBusy(f"{kind.upper()} capacity exhausted, try again shortly")
+            self._in_flight[kind] += 1
+
+        def release(_: Any) -> None:
+            with self._lock:
+                self._in_flight[kind] -= 1
+
+        # The slot is released when the job really ends: a cancelled caller
+        # (barge-in) removes a queued job, but a running one keeps its slot
+        try:
+            job = pool.submit(func, *args)
+        except Exception:
+            release(None)
+            raise
+        job.add_done_callback(release)
+        return await asyncio.wrap_future(job)
+
+    async def transcribe(self, audio_data: bytes, format: str = "webm") -> str:
+        """Speech-to-text on the STT pool."""
+        return await self._run("stt", self._stt_pool, self._stt, audio_data, format)
+
+    async def synthesize(self, text: str, voice: str = "alloy") -> bytes:
+        """Text-to-speech on the TTS pool, served from the TTS cache when possible."""
+        if self.tts_cache is None:
+            return await self._run("tts", self._tts_pool, self._tts, text, voice)
+
+        # Memory hits are served inline; the disk tier is read off the loop
+        cached = self.tts_cache.get_memory(text, voice)
+        if cached is None:
+            cached = await asyncio.to_thread(self.tts_cache.get, text, voice)
+        if cached is not None:
+            return cached
+        audio = await self._run("tts", self._tts_pool, self._tts, text, voice)
+        await asyncio.to_thread(self.tts_cache.put, text, voice, audio)
+        return audio
+
+    async def is_cached(self, text: str, voice: str = "alloy") -> bool:
+        """Whether synthesize() would be answered from the cache."""
+        if self.tts_cache is None:
+            return False
+        if self.tts_cache.get_memory(text, voice) is not None:
+            return True
+        return await asyncio.to_thread(self.tts_cache.contains, text, voice)
+
+    async def prewarm(self, phrases: List[str], voice: str = "alloy") -> int:
+        """
+        Synthesize phrases that are not cached yet.
+
+        Returns:
+            Number of phrases newly synthesized
+        """
+        if self.tts_cache is None:
+            return 0
+        warmed = 0
+        for phrase in phrases:
+            if await self.is_cached(phrase, voice):
+                continue
+            try:
+                await self.synthesize(phrase, voice)
+                warmed += 1
+            except Exception as e:
+                print(f"⚠️  TTS pre-warm failed for '{phrase}': {str(e)}")
+        return warmed
+
+    def stats(self) -> Dict[str, Any]:
+        """Current in-flight job counts and limits per pool, plus TTS cache counters."""
+        with self._lock:
+            stats: Dict[str, Any] = {
+                kind: {"in_flight": self._in_flight[kind], "limit": self._limits[kind]}
+                for kind in self._in_flight
+            }
+        if self.tts_cache is not None:
+            stats["tts_cache"] = self.tts_cache.stats()
+        return stats
@@ -0,0 +1,53 @@
+"""
+In-memory Cache Utilities
+Small thread-safe LRU shared by the vision, confirmation and TTS caches
+"""
+import threading
+from collections import OrderedDict
+from typing import Generic, Hashable, Optional, TypeVar
+from prometheus_client import Counter
+from utils.instrumentation import metric
+
+V = TypeVar("V")
+
+CACHE_REQUESTS = metric(
+    Counter,
+    "movi_cache_requests_total",
+    "Cache lookups by cache and result (hit/miss)",
+    ["cache", "result"],
+)
+
+
+def record_cache(cache: str, hit: bool) -> None:
+    """Count one lookup against a named cache (vision, confirmation, tts)."""
+    CACHE_REQUESTS.labels(cache, "hit" if hit else "miss").inc()
+
+
+class LRUCache(Generic[V]):
+    """Thread-safe least-recently-used cache with a fixed number of entries"""
+
+    def __init__(self, max_size: int = 128):
+        self.max_size = max_size
+        self._items: "OrderedDict[Hashable, V]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: Hashable) -> Optional[V]:
+        with self._lock:
+            if key not in self._items:
+                return None
+            self._items.move_to_end(key)
+            return self._items[key]
+
+    def put(self, key: Hashable, value: V) -> None:
+        with self._lock:
+            self._items[key] = value
+            self._items.move_to_end(key)
+            while len(self._items) > self.max_size:
+                self._items.popitem(last=False)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._items.clear()
+
+    def __len__(self) -> int:
+        return len(self._items)
@@ -0,0 +1,217 @@
+"""
+Read/Write Session Routing
+Sends read-only requests and read-only Movi tools to the replica pool and writes to the primary, with
+read-your-writes stickiness: a session that just wrote keeps reading from the primary for a while
+"""
+import os
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from contextlib import contextmanager
+from contextvars import ContextVar
+from http.cookies import CookieError, SimpleCookie
+from typing import Any, Awaitable, Callable, Iterable, Iterator, Optional, Tuple
+from prometheus_client import Counter
+
+import database
+from utils.instrumentation import Message, Receive, Scope, Send, metric
+
+# How long a session reads from the primary after a write (covers replica lag)
+STICKY_SECONDS = float(os.getenv("MOVI_REPLICA_STICKY_SECONDS", "5"))
+STICKY_MAX_SESSIONS = int(os.getenv("MOVI_REPLICA_STICKY_MAX_SESSIONS", "10000"))
+
+SESSION_HEADER = "x-movi-session"
+# Issued on the first write of a caller without the header
+SESSION_COOKIE = "movi_session"
+READ_METHODS = {"GET", "HEAD", "OPTIONS"}
+# The agent routes each tool call itself (a chat POST is usually a read)
+AGENT_PREFIXES = ("/movi",)
+
+DB_ROUTED = metric(
+    Counter,
+    "movi_db_routed_total",
+    "Units of work (requests, agent tool calls) by database target",
+    ["target", "reason"],
+)
+
+# Keys identifying the caller: the HTTP session, plus the agent session in a Movi turn
+_session_keys: ContextVar[Tuple[str, ...]] = ContextVar("movi_db_session_keys", default=())
+
+
+class StickySessions:
+    """
+    Sessions that wrote recently, so their reads go to the primary.
+
+    In-process and bounded (oldest sessions are dropped first); the app
+    runs as a single worker, so a session's write and its next read meet
+    in the same registry.
+    """
+
+    def __init__(self, seconds: float = STICKY_SECONDS, max_sessions: int = STICKY_MAX_SESSIONS):
+        self.seconds = seconds
+        self.max_sessions = max_sessions
+        self._until: "OrderedDict[str, float]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def mark(self, keys: Iterable[str]) -> None:
+        """Record a write by these sessions."""
+        until = time.monotonic() + self.seconds
+        with self._lock:
+            for key in keys:
+                self._until[key] = until
+                self._until.move_to_end(key)
+            while len(self._until) > self.max_sessions:
+                self._until.popitem(last=False)
+
+    def is_sticky(self, keys: Iterable[str]) -> bool:
+        """True if any of these sessions wrote within the sticky window."""
+        now = time.monotonic()
+        with self._lock:
+            for key in keys:
+                until = self._until.get(key)
+                if until is None:
+                    continue
+                if until > now:
+                    return True
+                del self._until[key]
+        return False
+
+    def clear(self) -> None:
+        with self._lock:
+            self._until.clear()
+
+
+sticky_sessions = StickySessions()
+
+
+def route(read_only: bool, sticky: StickySessions = sticky_sessions) -> Tuple[bool, str]:
+    """
+    Decide where a unit of work runs for the current session.
+
+    Returns:
+        (use_replica, reason)
+    """
+    if not read_only:
+        return False, "write"
+    if not database.replica_engines:
+        return False, "no_replica"
+    if sticky.is_sticky(_session_keys.get()):
+        return False, "read_your_writes"
+    return True, "read"
+
+
+@contextmanager
+def session_scope(key: str) -> Iterator[None]:
+    """Add a session key (e.g. the Movi session id) to the caller's identity for stickiness."""
+    token = _session_keys.set(_session_keys.get() + (key,))
+    try:
+        yield
+    finally:
+        _session_keys.reset(token)
+
+
+@contextmanager
+def routed(read_only: bool, sticky: StickySessions = sticky_sessions) -> Iterator[None]:
+    """
+    Route the sessions opened inside the block (database.SessionLocal).
+
+    Writes mark the current session sticky when the block exits, whatever
+    its outcome (a tool reports failures as text, not exceptions).
+    """
+    replica, reason = route(read_only, sticky)
+    DB_ROUTED.labels("replica" if replica else "primary", reason).inc()
+    token = database.use_replica.set(replica)
+    try:
+        yield
+    finally:
+        database.use_replica.reset(token)
+        if not read_only:
+            sticky.mark(_session_keys.get())
+
+
+def client_key(scope: Scope) -> Optional[str]:
+    """
+    Caller identity for stickiness: the X-Movi-Session header, else the
+    movi_session cookie. None for anonymous callers; the client address is
+    never used, since callers behind one proxy or NAT share it.
+    """
+    cookie_header = None
+    for name, value in scope.get("headers", []):
+        if name == SESSION_HEADER.encode():
+            return f"http:{value.decode('latin-1')}"
+        if name == b"cookie":
+            cookie_header = value.decode("latin-1")
+    if cookie_header:
+        try:
+            morsel = SimpleCookie(cookie_header).get(SESSION_COOKIE)
+        except CookieError:
+            morsel = None
+        if morsel is not None and morsel.value:
+            return f"cookie:{morsel.value}"
+    return None
+
+
+def session_cookie(session_id: str) -> bytes:
+    """Set-Cookie value identifying a new session."""
+    return f"{SESSION_COOKIE}={session_id}; Path=/; HttpOnly; SameSite=Lax".encode("latin-1")
+
+
+class ReplicaRoutingMiddleware:
+    """
+    Pure ASGI middleware: GET/HEAD/OPTIONS read from a replica, everything
+    else uses the primary.
+
+    A successful (< 400) write makes the caller sticky, so its reads for
+    the next STICKY_SECONDS go to the primary and see the write. A caller
+    without a session header or cookie gets a movi_session cookie with that
+    write. Agent routes only get the caller identity; the tool executor
+    routes each call.
+    """
+
+    def __init__(self, app: Callable[..., Awaitable[None]], sticky: StickySessions = sticky_sessions):
+        self.app = app
+        self.sticky = sticky
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        key = client_key(scope)
+        keys_token = _session_keys.set((key,) if key else ())
+        try:
+            if scope.get("path", "").startswith(AGENT_PREFIXES):
+                await self.app(scope, receive, send)
+                return
+
+            read_only = scope.get("method", "GET") in READ_METHODS
+            replica, reason = route(read_only, self.sticky)
+            DB_ROUTED.labels("replica" if replica else "primary", reason).inc()
+
+            async def send_wrapper(message: Message) -> None:
+                # Before the body goes out, so a client reacting to it already reads its write
+                if message["type"] == "http.response.start" and not read_only and message["status"] < 400:
+                    keys = _session_keys.get()
+                    if not keys:
+                        session_id = uuid.uuid4().hex
+                        message["headers"] = [*message.get("headers", []), (b"set-cookie", session_cookie(session_id))]
+                        keys = (f"cookie:{session_id}",)
+                    self.sticky.mark(keys)
+                await send(message)
+
+            route_token = database.use_replica.set(replica)
+            try:
+                await self.app(scope, receive, send_wrapper)
+            finally:
+                database.use_replica.reset(route_token)
+        finally:
+            _session_keys.reset(keys_token)
+
+
+def install_db_routing(app: Any) -> None:
+    """Attach the routing middleware and report the replica pool."""
+    app.add_middleware(ReplicaRoutingMiddleware)
+    if database.replica_engines:
+        print(f"🗄️  Reads routed to {len(database.replica_engines)} replica(s), "
+              f"sticky to the primary for {STICKY_SECONDS:g}s after a write")
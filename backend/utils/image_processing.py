@@ -0,0 +1,118 @@
+"""
+Image Processing Utilities for Vision Features
+Downscales and re-encodes screenshots locally before they are sent to the vision model
+"""
+import base64
+import hashlib
+import io
+import os
+from typing import Tuple
+from PIL import Image, ImageOps
+
+# gpt-4o "high" detail fits images into 2048x2048, then scales the short side to 768.
+# Anything above that is discarded by the API, so we never upload it.
+VISION_MAX_LONG_SIDE = int(os.getenv("MOVI_VISION_MAX_LONG_SIDE", "2048"))
+VISION_MAX_SHORT_SIDE = int(os.getenv("MOVI_VISION_MAX_SHORT_SIDE", "768"))
+VISION_IMAGE_FORMAT = os.getenv("MOVI_VISION_IMAGE_FORMAT", "JPEG").upper()
+VISION_IMAGE_QUALITY = int(os.getenv("MOVI_VISION_IMAGE_QUALITY", "85"))
+
+_MIME_TYPES = {"JPEG": "image/jpeg", "WEBP": "image/webp", "PNG": "image/png"}
+
+
+def image_base64_to_bytes(image_base64: str) -> bytes:
+    """
+    Convert base64 encoded image (optionally a data URL) to bytes.
+
+    Args:
+        image_base64: Base64 encoded image string
+
+    Returns:
+        Raw image bytes
+    """
+    try:
+        # Remove data URL prefix if present
+        if "," in image_base64:
+            image_base64 = image_base64.split(",", 1)[1]
+
+        return base64.b64decode(image_base64)
+    except Exception as e:
+        raise Exception(f"Failed to decode image: {str(e)}")
+
+
+def image_content_hash(image_bytes: bytes) -> str:
+    """SHA-256 of the raw image bytes, used as the cache key for identical screenshots."""
+    return hashlib.sha256(image_bytes).hexdigest()
+
+
+def target_size(width: int, height: int) -> Tuple[int, int]:
+    """
+    Compute the largest size the vision model will actually use.
+
+    Args:
+        width: Original width in pixels
+        height: Original height in pixels
+
+    Returns:
+        (width, height) no larger than the original
+    """
+    scale = min(
+        1.0,
+        VISION_MAX_LONG_SIDE / max(width, height),
+        VISION_MAX_SHORT_SIDE / min(width, height),
+    )
+    return max(1, round(width * scale)), max(1, round(height * scale))
+
+
+def preprocess_image(image_bytes: bytes) -> Tuple[bytes, str]:
+    """
+    Downscale to the model's effective resolution and re-encode compactly.
+
+    Args:
+        image_bytes: Raw uploaded image bytes (PNG, JPEG, WebP, ...)
+
+    Returns:
+        (encoded image bytes, mime type)
+    """
+    with Image.open(io.BytesIO(image_bytes)) as img:
+        img = ImageOps.exif_transpose(img)
+
+        # Flatten transparency onto white (JPEG has no alpha channel)
+        if img.mode in ("RGBA", "LA", "P"):
+            img = img.convert("RGBA")
+            background = Image.new("RGB", img.size, (255, 255, 255))
+            background.paste(img, mask=img.split()[-1])
+            img = background
+        elif img.mode != "RGB":
+            img = img.convert("RGB")
+
+        size = target_size(*img.size)
+        if size != img.size:
+            img = img.resize(size, Image.LANCZOS)
+
+        output = io.BytesIO()
+        img.save(output, format=VISION_IMAGE_FORMAT, quality=VISION_IMAGE_QUALITY, optimize=True)
+
+    return output.getvalue(), _MIME_TYPES.get(VISION_IMAGE_FORMAT, "image/jpeg")
+
+
+def prepare_image_for_vision(image_bytes: bytes) -> Tuple[str, str]:
+    """
+    Preprocess an image and return it ready for an image_url data URL.
+    Falls back to the original bytes if the image cannot be decoded locally.
+
+    Args:
+        image_bytes: Raw uploaded image bytes
+
+    Returns:
+        (base64 string, mime type)
+    """
+    try:
+        data, mime_type = preprocess_image(image_bytes)
+        # Never upload something bigger than what we received
+        if len(data) >= len(image_bytes):
+            data, mime_type = image_bytes, "image/jpeg"
+    except Exception as e:
+        print(f"⚠️  Image preprocessing skipped: {str(e)}")
+        data, mime_type = image_bytes, "image/jpeg"
+
+    return base64.b64encode(data).decode("utf-8"), mime_type
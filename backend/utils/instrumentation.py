@@ -0,0 +1,251 @@
+"""
+Request Instrumentation
+ASGI middleware with per-route latency histograms, per-request SQLAlchemy query count and DB time,
+Server-Timing headers and Prometheus metrics
+"""
+import os
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from dataclasses import dataclass
+from typing import Any, Awaitable, Callable, Dict, Iterator, MutableMapping, Optional, Sequence
+from prometheus_client import (
+    CONTENT_TYPE_LATEST,
+    REGISTRY,
+    CollectorRegistry,
+    Counter,
+    Gauge,
+    Histogram,
+    generate_latest,
+)
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+INSTRUMENTATION_ENABLED = os.getenv("MOVI_INSTRUMENTATION", "true").lower() == "true"
+SERVER_TIMING_ENABLED = os.getenv("MOVI_SERVER_TIMING", "true").lower() == "true"
+
+Scope = MutableMapping[str, Any]
+Message = MutableMapping[str, Any]
+Receive = Callable[[], Awaitable[Message]]
+Send = Callable[[Message], Awaitable[None]]
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30)
+QUERY_COUNT_BUCKETS = (0, 1, 2, 3, 5, 10, 20, 50, 100)
+
+# Collectors created through metric(), by the name they were created with
+_collectors: Dict[str, Any] = {}
+
+
+def metric(cls: Any, name: str, documentation: str, labelnames: Sequence[str] = (), **kwargs: Any) -> Any:
+    """
+    Create a Prometheus metric, or return the one this module already created under that name.
+
+    A module imported under a second package path (e.g. utils.x and backend.utils.x
+    in tests) gets its own copy of this module; the duplicate registration is then
+    refused and that copy falls back to an unregistered collector.
+    """
+    existing = _collectors.get(name)
+    if existing is not None:
+        return existing
+    try:
+        collector = cls(name, documentation, labelnames, **kwargs)
+    except ValueError:
+        collector = cls(name, documentation, labelnames, registry=None, **kwargs)
+    _collectors[name] = collector
+    return collector
+
+
+HTTP_REQUEST_DURATION = metric(
+    Histogram,
+    "movi_http_request_duration_seconds",
+    "HTTP request latency by route",
+    ["method", "route", "status"],
+    buckets=LATENCY_BUCKETS,
+)
+HTTP_REQUESTS_IN_PROGRESS = metric(
+    Gauge,
+    "movi_http_requests_in_progress",
+    "HTTP requests currently being served",
+    ["method"],
+    multiprocess_mode="livesum",
+)
+DB_QUERIES_PER_REQUEST = metric(
+    Histogram,
+    "movi_db_queries_per_request",
+    "SQL statements executed per HTTP request",
+    ["route"],
+    buckets=QUERY_COUNT_BUCKETS,
+)
+DB_TIME_PER_REQUEST = metric(
+    Histogram,
+    "movi_db_time_per_request_seconds",
+    "Time spent in SQL per HTTP request",
+    ["route"],
+    buckets=LATENCY_BUCKETS,
+)
+DB_QUERY_DURATION = metric(
+    Histogram,
+    "movi_db_query_duration_seconds",
+    "Duration of individual SQL statements",
+    ["operation"],
+    buckets=LATENCY_BUCKETS,
+)
+DB_QUERIES = metric(
+    Counter,
+    "movi_db_queries_total",
+    "SQL statements executed (inside or outside HTTP requests)",
+    ["operation"],
+)
+
+
+@dataclass
+class RequestStats:
+    """Per-request DB accounting, shared with worker threads through a context variable"""
+    queries: int = 0
+    db_time: float = 0.0
+
+
+_request_stats: ContextVar[Optional[RequestStats]] = ContextVar("movi_request_stats", default=None)
+
+
+def current_request_stats() -> Optional[RequestStats]:
+    """Stats of the HTTP request being served in this context, if any."""
+    return _request_stats.get()
+
+
+@contextmanager
+def collect_db_stats() -> Iterator[RequestStats]:
+    """
+    Account SQL statements run in this context (and worker threads started
+    from it) outside HTTP requests, e.g. one benchmarked agent turn.
+    """
+    stats = RequestStats()
+    token = _request_stats.set(stats)
+    try:
+        yield stats
+    finally:
+        _request_stats.reset(token)
+
+
+def _operation(statement: str) -> str:
+    # First keyword only (SELECT/INSERT/...), keeps label cardinality tiny
+    return statement.lstrip().split(None, 1)[0].upper() if statement.strip() else "OTHER"
+
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany) -> None:
+    # Kept on the statement's execution context rather than the connection, so a
+    # statement that raises (no after_cursor_execute) leaves nothing behind
+    context._movi_query_start = time.perf_counter()
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany) -> None:
+    started = getattr(context, "_movi_query_start", None)
+    if started is None:
+        return
+    duration = time.perf_counter() - started
+    operation = _operation(statement)
+    DB_QUERIES.labels(operation).inc()
+    DB_QUERY_DURATION.labels(operation).observe(duration)
+
+    stats = _request_stats.get()
+    if stats is not None:
+        stats.queries += 1
+        stats.db_time += duration
+
+
+def instrument_engine(engine: Engine) -> None:
+    """Count and time every statement executed on this engine."""
+    if not event.contains(engine, "before_cursor_execute", _before_cursor_execute):
+        event.listen(engine, "before_cursor_execute", _before_cursor_execute)
+        event.listen(engine, "after_cursor_execute", _after_cursor_execute)
+
+
+def route_label(scope: Scope) -> str:
+    """Route template ("/vehicles/{vehicle_id}"), never the raw path, to bound label cardinality."""
+    route = scope.get("route")
+    if route is None:
+        return "unmatched"
+    return getattr(route, "path_format", None) or getattr(route, "path", "unmatched")
+
+
+def server_timing(total: float, stats: RequestStats) -> str:
+    """Server-Timing header value (milliseconds)."""
+    return (
+        f'app;dur={total * 1000:.1f}, '
+        f'db;dur={stats.db_time * 1000:.1f};desc="{stats.queries} queries"'
+    )
+
+
+class InstrumentationMiddleware:
+    """
+    Pure ASGI middleware (works with streaming responses).
+
+    Records latency per route/method/status, SQL statements and DB time per
+    request, and adds a Server-Timing header. For streaming responses the
+    header reflects the time until the first byte.
+    """
+
+    def __init__(self, app: Callable[..., Awaitable[None]], server_timing_header: bool = SERVER_TIMING_ENABLED):
+        self.app = app
+        self.server_timing_header = server_timing_header
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        stats = RequestStats()
+        token = _request_stats.set(stats)
+        started = time.perf_counter()
+        method = scope.get("method", "GET")
+        status_code = 500
+
+        async def send_wrapper(message: Message) -> None:
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+                if self.server_timing_header:
+                    headers = list(message.get("headers", []))
+                    headers.append((b"server-timing", server_timing(time.perf_counter() - started, stats).encode()))
+                    # Lets the frontend (another origin) read it via the Resource Timing API
+                    headers.append((b"timing-allow-origin", b"*"))
+                    message["headers"] = headers
+            await send(message)
+
+        HTTP_REQUESTS_IN_PROGRESS.labels(method).inc()
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            HTTP_REQUESTS_IN_PROGRESS.labels(method).dec()
+            _request_stats.reset(token)
+            route = route_label(scope)
+            HTTP_REQUEST_DURATION.labels(method, route, str(status_code)).observe(time.perf_counter() - started)
+            DB_QUERIES_PER_REQUEST.labels(route).observe(stats.queries)
+            DB_TIME_PER_REQUEST.labels(route).observe(stats.db_time)
+
+
+def metrics_payload() -> Dict[str, Any]:
+    """
+    Prometheus exposition of all registered metrics.
+
+    With PROMETHEUS_MULTIPROC_DIR set (gunicorn/uvicorn workers), metrics
+    from every worker process are aggregated.
+
+    Returns:
+        {"content": bytes, "media_type": str}
+    """
+    registry = REGISTRY
+    if os.getenv("PROMETHEUS_MULTIPROC_DIR"):
+        from prometheus_client import multiprocess
+        registry = CollectorRegistry()
+        multiprocess.MultiProcessCollector(registry)
+    return {"content": generate_latest(registry), "media_type": CONTENT_TYPE_LATEST}
+
+
+def instrument_app(app: Any, engine: Engine, *replicas: Engine) -> None:
+    """Attach the middleware and SQLAlchemy listeners (no-op if MOVI_INSTRUMENTATION=false)."""
+    if not INSTRUMENTATION_ENABLED:
+        return
+    for db_engine in (engine, *replicas):
+        instrument_engine(db_engine)
+    app.add_middleware(InstrumentationMiddleware)
@@ -0,0 +1,245 @@
+"""
+Schema Migrations
+Alembic wiring for the app: startup schema check that refuses out-of-date databases, programmatic
+upgrades, and helpers for migration scripts (online-safe index builds, batched data backfills)
+"""
+import ast
+import os
+import time
+from typing import TYPE_CHECKING, Any, Dict, List, Optional, Sequence, Set
+from sqlalchemy import bindparam, inspect, text
+from sqlalchemy.engine import Engine
+
+# Alembic adds ~150ms to startup; it is only imported to stamp or upgrade
+if TYPE_CHECKING:
+    from alembic.config import Config
+
+SCHEMA_CHECK_ENABLED = os.getenv("MOVI_SCHEMA_CHECK", "true").lower() == "true"
+# Upgrade an out-of-date database at startup instead of refusing to start
+AUTO_MIGRATE = os.getenv("MOVI_AUTO_MIGRATE", "false").lower() == "true"
+BACKFILL_BATCH_SIZE = int(os.getenv("MOVI_BACKFILL_BATCH_SIZE", "1000"))
+# Pause between backfill batches, leaving the write lock to live traffic
+BACKFILL_PAUSE_MS = float(os.getenv("MOVI_BACKFILL_PAUSE_MS", "0"))
+
+ALEMBIC_INI = os.path.join(os.path.dirname(__file__), "..", "alembic.ini")
+VERSIONS_DIR = os.path.join(os.path.dirname(__file__), "..", "migrations", "versions")
+
+# Tables of the first revision; a database holding them without a version
+# table was built by Base.metadata.create_all before migrations existed
+BASELINE_REVISION = "0001"
+BASELINE_TABLES = (
+    "stops", "paths", "path_stops", "routes", "vehicles", "drivers", "daily_trips", "deployments"
+)
+
+
+class SchemaOutOfDate(RuntimeError):
+    """The database is not at the revision this code expects"""
+
+
+def alembic_config(connection: Any = None) -> "Config":
+    """Alembic config for backend/migrations, optionally bound to an open connection."""
+    from alembic.config import Config
+
+    config = Config(ALEMBIC_INI)
+    # Keep the app's logging setup (env.py would apply alembic.ini's)
+    config.attributes["configure_logger"] = False
+    if connection is not None:
+        config.attributes["connection"] = connection
+    return config
+
+
+def _script_revisions(versions_dir: str = VERSIONS_DIR) -> Dict[str, Set[str]]:
+    """revision → down_revisions, read from the scripts' module-level assignments."""
+    revisions: Dict[str, Set[str]] = {}
+    for name in os.listdir(versions_dir):
+        if not name.endswith(".py"):
+            continue
+        with open(os.path.join(versions_dir, name), encoding="utf-8") as f:
+            tree = ast.parse(f.read())
+        values: Dict[str, Any] = {}
+        for node in tree.body:
+            target = node.target if isinstance(node, ast.AnnAssign) else (
+                node.targets[0] if isinstance(node, ast.Assign) else None
+            )
+            if isinstance(target, ast.Name) and target.id in ("revision", "down_revision") and node.value is not None:
+                values[target.id] = ast.literal_eval(node.value)
+        if "revision" in values:
+            down = values.get("down_revision")
+            revisions[values["revision"]] = set(down if isinstance(down, (list, tuple)) else [down] if down else [])
+    return revisions
+
+
+def head_revisions() -> Set[str]:
+    """Revisions the code expects (the migration scripts' heads)."""
+    revisions = _script_revisions()
+    parents = set().union(*revisions.values()) if revisions else set()
+    return set(revisions) - parents
+
+
+def current_revisions(engine: Engine) -> Set[str]:
+    """Revisions recorded in the database's alembic_version table (empty if none)."""
+    with engine.connect() as connection:
+        if not inspect(connection).has_table("alembic_version"):
+            return set()
+        return {row[0] for row in connection.execute(text("SELECT version_num FROM alembic_version"))}
+
+
+def upgrade(engine: Engine, revision: str = "head") -> None:
+    """Run migrations up to `revision` on this engine."""
+    from alembic import command
+
+    # A plain connection, not engine.begin(): Alembic owns the transactions so
+    # migrations can use autocommit blocks (CREATE INDEX CONCURRENTLY, backfills)
+    with engine.connect() as connection:
+        command.upgrade(alembic_config(connection), revision)
+        connection.commit()
+
+
+def stamp(engine: Engine, revision: str) -> None:
+    """Record `revision` as applied without running it."""
+    from alembic import command
+
+    with engine.connect() as connection:
+        command.stamp(alembic_config(connection), revision)
+        connection.commit()
+
+
+def ensure_schema(engine: Engine, check: bool = SCHEMA_CHECK_ENABLED, auto_migrate: bool = AUTO_MIGRATE) -> None:
+    """
+    Startup check: make sure the database is at the migration heads.
+
+    An empty database is created by running the migrations, and a database
+    built by create_all before migrations existed is stamped at the
+    baseline. Anything else that is behind (or ahead of) the code stops
+    startup, unless auto_migrate is set.
+
+    Raises:
+        SchemaOutOfDate: The schema does not match and auto_migrate is off
+    """
+    if not check:
+        return
+
+    current = current_revisions(engine)
+    if not current:
+        tables = set(inspect(engine).get_table_names())
+        if not tables & set(BASELINE_TABLES):
+            upgrade(engine)
+            print("🗄️  Database created from migrations")
+            return
+        if set(BASELINE_TABLES) <= tables:
+            stamp(engine, BASELINE_REVISION)
+            print(f"🗄️  Existing database stamped at baseline revision {BASELINE_REVISION}")
+            current = {BASELINE_REVISION}
+
+    heads = head_revisions()
+    if current == heads:
+        return
+    if auto_migrate:
+        upgrade(engine)
+        print(f"🗄️  Database migrated {', '.join(sorted(current)) or 'none'} → {', '.join(sorted(heads))}")
+        return
+    raise SchemaOutOfDate(
+        f"Database schema is at {', '.join(sorted(current)) or 'no revision'} but the code expects "
+        f"{', '.join(sorted(heads))}. Run `alembic upgrade head` in backend/ (or set MOVI_AUTO_MIGRATE=true)."
+    )
+
+
+# ----------------------------------------------------------------------
+# Helpers for migration scripts (call inside upgrade()/downgrade())
+# ----------------------------------------------------------------------
+
+def create_index_online(index_name: str, table_name: str, columns: Sequence[str], unique: bool = False, **kw: Any) -> None:
+    """
+    Create an index without blocking writes where the database allows it.
+
+    PostgreSQL builds it CONCURRENTLY (outside the migration transaction);
+    MySQL/InnoDB builds indexes online by default. SQLite has no online
+    build and holds the write lock while it runs. IF NOT EXISTS makes a
+    re-run safe (an interrupted CONCURRENTLY build leaves an INVALID index
+    that has to be dropped first).
+    """
+    from alembic import op
+
+    if op.get_bind().dialect.name == "postgresql":
+        with op.get_context().autocommit_block():
+            op.create_index(index_name, table_name, list(columns), unique=unique,
+                            postgresql_concurrently=True, if_not_exists=True, **kw)
+    else:
+        op.create_index(index_name, table_name, list(columns), unique=unique, if_not_exists=True, **kw)
+
+
+def drop_index_online(index_name: str, table_name: str) -> None:
+    """Drop an index (CONCURRENTLY on PostgreSQL); no-op if it does not exist."""
+    from alembic import op
+
+    if op.get_bind().dialect.name == "postgresql":
+        with op.get_context().autocommit_block():
+            op.drop_index(index_name, table_name=table_name, postgresql_concurrently=True, if_exists=True)
+    else:
+        op.drop_index(index_name, table_name=table_name, if_exists=True)
+
+
+def batched_backfill(
+    table: str,
+    key: str,
+    set_clause: str,
+    where: str = "1 = 1",
+    params: Optional[Dict[str, Any]] = None,
+    batch_size: int = BACKFILL_BATCH_SIZE,
+    pause_ms: float = BACKFILL_PAUSE_MS
+) -> int:
+    """
+    UPDATE `table` SET `set_clause` WHERE `where`, committed in batches.
+
+    Rows are walked in `key` order (the primary key), so each batch is a
+    short transaction and the backfill resumes cleanly if re-run with a
+    `where` that skips finished rows. In offline mode (--sql) a single
+    UPDATE is emitted instead.
+
+    Args:
+        table: Table name
+        key: Integer primary key column used to page through the rows
+        set_clause: SQL assignments, e.g. "status = 'active'"
+        where: SQL filter for rows still to backfill
+        params: Bind parameters used in set_clause/where
+        batch_size: Rows per batch
+        pause_ms: Sleep between batches
+
+    Returns:
+        Number of rows updated
+    """
+    from alembic import op
+
+    params = params or {}
+    context = op.get_context()
+    if context.as_sql:
+        op.execute(text(f"UPDATE {table} SET {set_clause} WHERE {where}").bindparams(**params))
+        return 0
+
+    select_batch = text(
+        f"SELECT {key} FROM {table} WHERE ({where}) AND {key} > :_after ORDER BY {key} LIMIT :_limit"
+    )
+    update_batch = text(
+        f"UPDATE {table} SET {set_clause} WHERE {key} IN :_keys"
+    ).bindparams(bindparam("_keys", expanding=True))
+
+    updated = 0
+    after: Any = None
+    # Each statement commits on its own instead of one long migration transaction
+    with context.autocommit_block():
+        bind = op.get_bind()
+        while True:
+            keys: List[Any] = [
+                row[0] for row in bind.execute(
+                    select_batch, {**params, "_after": after if after is not None else -2**63, "_limit": batch_size}
+                )
+            ]
+            if not keys:
+                break
+            bind.execute(update_batch, {**params, "_keys": keys})
+            updated += len(keys)
+            after = keys[-1]
+            if pause_ms:
+                time.sleep(pause_ms / 1000)
+    print(f"🗄️  Backfilled {updated} rows in {table}")
+    return updated
@@ -0,0 +1,193 @@
+"""
+Local OCR for Dashboard Screenshots
+Extracts trip names, statuses and booking percentages with Tesseract (optional dependency)
+so the vision LLM is only needed when local recognition is not confident.
+"""
+import asyncio
+import io
+import os
+import re
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass, field
+from typing import Any, Dict, List, Optional, Tuple
+from PIL import Image, ImageOps
+
+try:
+    import pytesseract
+except ImportError:  # OCR fast path is optional
+    pytesseract = None
+
+OCR_ENABLED = os.getenv("MOVI_OCR_ENABLED", "true").lower() == "true"
+OCR_MIN_CONFIDENCE = float(os.getenv("MOVI_OCR_MIN_CONFIDENCE", "80"))
+OCR_MIN_ROWS = int(os.getenv("MOVI_OCR_MIN_ROWS", "1"))
+OCR_WORKERS = int(os.getenv("MOVI_OCR_WORKERS", "2"))
+
+# Live statuses as rendered on the bus dashboard (live_status upper-cased, "_" → " ")
+STATUS_PATTERN = re.compile(
+    r"\b(SCHEDULED|IN[ _-]?PROGRESS|COMPLETED|CANCELLED|DELAYED|UNKNOWN)\b",
+    re.IGNORECASE,
+)
+PERCENT_PATTERN = re.compile(r"(\d{1,3}(?:\.\d+)?)\s*%")
+
+_pool: Optional[ProcessPoolExecutor] = None
+
+
+@dataclass
+class DashboardRow:
+    """One trip row recognized on the dashboard"""
+    trip_name: str
+    status: Optional[str] = None
+    booking_percentage: Optional[float] = None
+
+
+@dataclass
+class OcrResult:
+    """Text and table rows recognized in a screenshot"""
+    text: str
+    confidence: float
+    rows: List[DashboardRow] = field(default_factory=list)
+
+    @property
+    def is_confident(self) -> bool:
+        return self.confidence >= OCR_MIN_CONFIDENCE and len(self.rows) >= OCR_MIN_ROWS
+
+
+def is_available() -> bool:
+    """True when the OCR fast path is enabled and Tesseract bindings are installed."""
+    return OCR_ENABLED and pytesseract is not None
+
+
+def _get_pool() -> ProcessPoolExecutor:
+    """Lazily created process pool (OCR is CPU bound and holds the GIL)."""
+    global _pool
+    if _pool is None:
+        _pool = ProcessPoolExecutor(max_workers=OCR_WORKERS)
+    return _pool
+
+
+def _ocr_words(image_bytes: bytes) -> List[Dict[str, Any]]:
+    """
+    Run Tesseract and return recognized words with their line keys.
+    Top-level so it can be pickled into the process pool.
+    """
+    with Image.open(io.BytesIO(image_bytes)) as img:
+        gray = ImageOps.grayscale(img)
+        # Small screenshots OCR noticeably better at 2x
+        if max(gray.size) < 1600:
+            gray = gray.resize((gray.width * 2, gray.height * 2), Image.LANCZOS)
+        data = pytesseract.image_to_data(gray, output_type=pytesseract.Output.DICT)
+
+    words = []
+    for i, text in enumerate(data["text"]):
+        text = text.strip()
+        conf = float(data["conf"][i])
+        if not text or conf < 0:
+            continue
+        words.append({
+            "text": text,
+            "conf": conf,
+            "line": (data["block_num"][i], data["par_num"][i], data["line_num"][i]),
+        })
+    return words
+
+
+def group_lines(words: List[Dict[str, Any]]) -> List[Tuple[str, float]]:
+    """
+    Join OCR words into text lines.
+
+    Returns:
+        List of (line text, mean word confidence) in reading order
+    """
+    lines: Dict[Tuple[int, int, int], List[Dict[str, Any]]] = {}
+    for word in words:
+        lines.setdefault(tuple(word["line"]), []).append(word)
+
+    return [
+        (" ".join(w["text"] for w in line_words), sum(w["conf"] for w in line_words) / len(line_words))
+        for _, line_words in sorted(lines.items())
+    ]
+
+
+def parse_dashboard_row(line: str) -> Optional[DashboardRow]:
+    """
+    Parse one dashboard table line, e.g. "Path2 - 19:45 SCHEDULED 25%".
+
+    Returns:
+        DashboardRow, or None if the line has neither a status nor a percentage
+    """
+    status_match = STATUS_PATTERN.search(line)
+    percent_match = PERCENT_PATTERN.search(line)
+    if not status_match and not percent_match:
+        return None
+
+    cut = min(m.start() for m in (status_match, percent_match) if m)
+    trip_name = line[:cut].strip(" |:-")
+    if not trip_name:
+        return None
+
+    status = None
+    if status_match:
+        status = re.sub(r"[ _-]", "-", status_match.group(1).upper())
+        if status == "INPROGRESS":
+            status = "IN-PROGRESS"
+
+    return DashboardRow(
+        trip_name=trip_name,
+        status=status,
+        booking_percentage=float(percent_match.group(1)) if percent_match else None,
+    )
+
+
+def build_result(words: List[Dict[str, Any]]) -> OcrResult:
+    """Build an OcrResult (text, confidence, table rows) from raw OCR words."""
+    lines = group_lines(words)
+    rows = [row for row in (parse_dashboard_row(text) for text, _ in lines) if row]
+    confidence = sum(w["conf"] for w in words) / len(words) if words else 0.0
+    return OcrResult(text="\n".join(text for text, _ in lines), confidence=confidence, rows=rows)
+
+
+def format_analysis(result: OcrResult) -> str:
+    """Render an OCR result in the same shape as a vision-model description."""
+    parts = ["Dashboard screenshot (local OCR). Trips visible:"]
+    for row in result.rows:
+        details = [d for d in (
+            row.status,
+            f"{row.booking_percentage:g}% booked" if row.booking_percentage is not None else None,
+        ) if d]
+        parts.append(f"- {row.trip_name}" + (f" ({', '.join(details)})" if details else ""))
+    parts.append("")
+    parts.append("Full text:")
+    parts.append(result.text)
+    return "\n".join(parts)
+
+
+def extract_dashboard_text(image_bytes: bytes) -> Optional[OcrResult]:
+    """
+    Run local OCR on a screenshot in the process pool.
+
+    Args:
+        image_bytes: Raw image bytes
+
+    Returns:
+        OcrResult, or None when OCR is unavailable or fails
+    """
+    if not is_available():
+        return None
+    try:
+        return build_result(_get_pool().submit(_ocr_words, image_bytes).result())
+    except Exception as e:
+        print(f"⚠️  OCR failed, falling back to vision model: {str(e)}")
+        return None
+
+
+async def aextract_dashboard_text(image_bytes: bytes) -> Optional[OcrResult]:
+    """Async variant of extract_dashboard_text (awaits the process pool)."""
+    if not is_available():
+        return None
+    try:
+        loop = asyncio.get_running_loop()
+        words = await loop.run_in_executor(_get_pool(), _ocr_words, image_bytes)
+        return build_result(words)
+    except Exception as e:
+        print(f"⚠️  OCR failed, falling back to vision model: {str(e)}")
+        return None
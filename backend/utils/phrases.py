@@ -0,0 +1,9 @@
+"""
+Fixed Assistant Phrases
+Text Movi speaks verbatim, shared by the code that says it and the TTS cache prewarm
+"""
+
+# Closes every HITL confirmation (Agents.confirmation)
+CONFIRMATION_QUESTION = "Do you want to proceed? (yes/no)"
+# Spoken when a voice turn produced no reply (routes.voice)
+NO_RESPONSE_TEXT = "No response generated."
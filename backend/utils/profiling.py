@@ -0,0 +1,366 @@
+"""
+Request Profiling
+Opt-in call-tree profiles of REST requests and Movi turns (per request for admins, or sampled),
+stored on disk and downloadable from /admin/profiles
+"""
+import asyncio
+import cProfile
+import io
+import json
+import logging
+import marshal
+import os
+import pstats
+import random
+import re
+import sys
+import threading
+import time
+import uuid
+from collections import Counter
+from typing import Any, Awaitable, Callable, Dict, List, Optional
+from urllib.parse import parse_qs
+from utils.admin import ADMIN_HEADER, is_admin_token
+from utils.instrumentation import Message, Receive, Scope, Send, route_label
+
+logger = logging.getLogger(__name__)
+
+PROFILING_ENABLED = os.getenv("MOVI_PROFILING", "true").lower() == "true"
+# Fraction of requests profiled without asking (0 disables sampling)
+PROFILE_SAMPLE_RATE = float(os.getenv("MOVI_PROFILE_SAMPLE_RATE", "0"))
+# "sampling" (all threads, incl. the sync-endpoint threadpool) or "cprofile" (event loop thread only)
+PROFILER = os.getenv("MOVI_PROFILER", "sampling")
+PROFILE_DIR = os.getenv("MOVI_PROFILE_DIR", "./profiles")
+PROFILE_INTERVAL_MS = float(os.getenv("MOVI_PROFILE_INTERVAL_MS", "1"))
+# Newest profiles kept on disk
+PROFILE_KEEP = int(os.getenv("MOVI_PROFILE_KEEP", "100"))
+
+PROFILE_HEADER = "X-Movi-Profile"
+PROFILE_QUERY = "profile"
+# Never profiled (profiling the profile download is noise)
+EXCLUDED_PREFIXES = ("/admin", "/metrics")
+
+# Leaf frames of a thread that is waiting rather than working, as (file, function)
+IDLE_FRAMES = {
+    ("threading.py", "wait"),
+    ("threading.py", "_wait_for_tstate_lock"),
+    ("selectors.py", "select"),
+    ("queue.py", "get"),
+    ("thread.py", "_worker"),
+}
+_PROFILE_ID = re.compile(r"^[0-9]{8}-[0-9]{6}-[0-9a-f]{8}$")
+_TRUTHY = {"1", "true", "yes", "on"}
+
+
+def _frame_label(code: Any) -> str:
+    filename = code.co_filename
+    # Backend modules relative to backend/, everything else by file name
+    marker = f"{os.sep}backend{os.sep}"
+    short = filename.split(marker, 1)[1] if marker in filename else os.path.basename(filename)
+    return f"{code.co_name} ({short}:{code.co_firstlineno})"
+
+
+class SamplingProfiler:
+    """
+    Statistical profiler sampling the stacks of every thread.
+
+    Sync endpoints run in the threadpool and agent tools in their own
+    executor, so per-thread hooks like cProfile would miss them. Idle
+    threads are skipped; work of other requests running at the same time
+    is included, so profile under low load where possible.
+    """
+
+    def __init__(self, interval_ms: float = PROFILE_INTERVAL_MS):
+        self.interval = interval_ms / 1000
+        # Stack (thread name first, leaf last) → seconds attributed to it
+        self.samples: Counter = Counter()
+        self.sample_count = 0
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def _sample(self, elapsed: float) -> None:
+        names = {thread.ident: thread.name for thread in threading.enumerate()}
+        own = threading.get_ident()
+        for ident, frame in sys._current_frames().items():
+            if ident == own:
+                continue
+            leaf = frame.f_code
+            if (os.path.basename(leaf.co_filename), leaf.co_name) in IDLE_FRAMES:
+                continue
+            stack = []
+            while frame is not None:
+                stack.append(_frame_label(frame.f_code))
+                frame = frame.f_back
+            stack.append(names.get(ident, str(ident)))
+            self.samples[tuple(reversed(stack))] += elapsed
+        self.sample_count += 1
+
+    def _run(self) -> None:
+        last = time.perf_counter()
+        while not self._stop.wait(self.interval):
+            # Weighted by the real gap: CPU-bound code holding the GIL delays the sampler
+            now = time.perf_counter()
+            self._sample(now - last)
+            last = now
+
+    def start(self) -> None:
+        self._thread = threading.Thread(target=self._run, name="movi-profiler", daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        """Stop sampling (returns at once; render() waits for the sampler thread)."""
+        self._stop.set()
+
+    def render(self) -> Dict[str, str]:
+        """Artifacts of the finished profile ({extension: content})."""
+        if self._thread is not None:
+            self._thread.join()
+        return {"txt": self.render_tree(), "folded": self.render_folded()}
+
+    def render_tree(self, min_percent: float = 0.5) -> str:
+        """Indented call tree with time and share per frame, pyinstrument style."""
+        total = sum(self.samples.values())
+        if not total:
+            return "No samples (request finished within one sampling interval)\n"
+
+        tree: Dict[str, Any] = {}
+        for stack, seconds in self.samples.items():
+            level = tree
+            for label in stack:
+                node = level.setdefault(label, {"seconds": 0.0, "children": {}})
+                node["seconds"] += seconds
+                level = node["children"]
+
+        lines = [f"{self.sample_count} samples, {total * 1000:.1f}ms busy thread time"]
+
+        def walk(level: Dict[str, Any], depth: int) -> None:
+            for label, node in sorted(level.items(), key=lambda item: -item[1]["seconds"]):
+                percent = node["seconds"] / total * 100
+                if percent < min_percent:
+                    continue
+                lines.append(f"{'  ' * depth}{node['seconds'] * 1000:9.1f}ms {percent:5.1f}%  {label}")
+                walk(node["children"], depth + 1)
+
+        walk(tree, 0)
+        return "\n".join(lines) + "\n"
+
+    def render_folded(self) -> str:
+        """Folded stacks ("a;b;c microseconds") for flamegraph.pl / speedscope."""
+        return "".join(
+            f"{';'.join(stack)} {round(seconds * 1_000_000)}\n" for stack, seconds in self.samples.most_common()
+        )
+
+
+class CProfileProfiler:
+    """Deterministic cProfile of the event loop thread (async endpoints and graph nodes)"""
+
+    def __init__(self):
+        self.profile = cProfile.Profile()
+
+    def start(self) -> None:
+        self.profile.enable()
+
+    def stop(self) -> None:
+        # Must run on the thread that called start()
+        self.profile.disable()
+
+    def render(self) -> Dict[str, Any]:
+        summary = io.StringIO()
+        stats = pstats.Stats(self.profile, stream=summary)
+        stats.sort_stats("cumulative").print_stats(60)
+        # Same format as Stats.dump_stats, loadable with pstats / snakeviz
+        return {"txt": summary.getvalue(), "prof": marshal.dumps(stats.stats)}
+
+
+def create_profiler(engine: str = PROFILER) -> Any:
+    """Profiler for the configured engine ("sampling" or "cprofile")."""
+    if engine == "cprofile":
+        return CProfileProfiler()
+    return SamplingProfiler()
+
+
+class ProfileStore:
+    """Profiles on disk: <id>.json metadata plus one file per artifact format"""
+
+    def __init__(self, directory: str = PROFILE_DIR, keep: int = PROFILE_KEEP):
+        self.directory = directory
+        self.keep = keep
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def new_id() -> str:
+        return f"{time.strftime('%Y%m%d-%H%M%S')}-{uuid.uuid4().hex[:8]}"
+
+    @staticmethod
+    def valid_id(profile_id: str) -> bool:
+        # Ids end up in file paths
+        return bool(_PROFILE_ID.match(profile_id))
+
+    def save(self, meta: Dict[str, Any], artifacts: Dict[str, Any]) -> None:
+        """Write one profile and prune the oldest beyond `keep`."""
+        profile_id = meta["id"]
+        with self._lock:
+            os.makedirs(self.directory, exist_ok=True)
+            for fmt, content in artifacts.items():
+                mode = "wb" if isinstance(content, bytes) else "w"
+                with open(os.path.join(self.directory, f"{profile_id}.{fmt}"), mode) as f:
+                    f.write(content)
+            meta = {**meta, "formats": sorted(artifacts)}
+            with open(os.path.join(self.directory, f"{profile_id}.json"), "w") as f:
+                json.dump(meta, f)
+            self._prune()
+
+    def _prune(self) -> None:
+        for meta in self.list()[self.keep:]:
+            self.delete(meta["id"])
+
+    def list(self) -> List[Dict[str, Any]]:
+        """Metadata of stored profiles, newest first."""
+        if not os.path.isdir(self.directory):
+            return []
+        profiles = []
+        for name in os.listdir(self.directory):
+            if name.endswith(".json") and self.valid_id(name[:-5]):
+                try:
+                    with open(os.path.join(self.directory, name)) as f:
+                        profiles.append(json.load(f))
+                except (OSError, json.JSONDecodeError):
+                    continue
+        return sorted(profiles, key=lambda meta: meta["id"], reverse=True)
+
+    def get(self, profile_id: str) -> Optional[Dict[str, Any]]:
+        if not self.valid_id(profile_id):
+            return None
+        try:
+            with open(os.path.join(self.directory, f"{profile_id}.json")) as f:
+                return json.load(f)
+        except (OSError, json.JSONDecodeError):
+            return None
+
+    def artifact_path(self, profile_id: str, fmt: str) -> Optional[str]:
+        """Path of one artifact ("txt", "folded", "prof"), or None."""
+        meta = self.get(profile_id)
+        if meta is None or fmt not in meta.get("formats", []):
+            return None
+        return os.path.join(self.directory, f"{profile_id}.{fmt}")
+
+    def delete(self, profile_id: str) -> None:
+        if not self.valid_id(profile_id):
+            return
+        for name in os.listdir(self.directory):
+            if name.startswith(f"{profile_id}."):
+                os.remove(os.path.join(self.directory, name))
+
+    def clear(self) -> int:
+        profiles = self.list()
+        for meta in profiles:
+            self.delete(meta["id"])
+        return len(profiles)
+
+
+profile_store = ProfileStore()
+# One profile at a time: the sampler sees all threads and cProfile owns the loop thread's hook
+_profiling_lock = threading.Lock()
+
+
+def profile_reason(scope: Scope, sample_rate: float = PROFILE_SAMPLE_RATE) -> Optional[str]:
+    """
+    Why this request should be profiled: "requested" (profile header or
+    query flag with a valid admin token), "sampled", or None.
+    """
+    path = scope.get("path", "")
+    if path.startswith(EXCLUDED_PREFIXES):
+        return None
+    headers = {key.decode("latin-1").lower(): value.decode("latin-1") for key, value in scope.get("headers", [])}
+    flag = headers.get(PROFILE_HEADER.lower())
+    if flag is None:
+        query = parse_qs(scope.get("query_string", b"").decode("latin-1"))
+        flag = (query.get(PROFILE_QUERY) or [None])[0]
+    if flag is not None and flag.lower() in _TRUTHY and is_admin_token(headers.get(ADMIN_HEADER.lower())):
+        return "requested"
+    if sample_rate > 0 and random.random() < sample_rate:
+        return "sampled"
+    return None
+
+
+class ProfilingMiddleware:
+    """
+    Pure ASGI middleware profiling selected requests end to end.
+
+    The profile covers the whole response, so a streamed /movi/chat turn is
+    profiled until its last token. The id is returned in the X-Movi-Profile-Id
+    header; the profile is written once the response has finished.
+    """
+
+    def __init__(
+        self,
+        app: Callable[..., Awaitable[None]],
+        store: ProfileStore = profile_store,
+        sample_rate: float = PROFILE_SAMPLE_RATE,
+        engine: str = PROFILER
+    ):
+        self.app = app
+        self.store = store
+        self.sample_rate = sample_rate
+        self.engine = engine
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        reason = profile_reason(scope, self.sample_rate)
+        if reason is None or not _profiling_lock.acquire(blocking=False):
+            await self.app(scope, receive, send)
+            return
+
+        profile_id = self.store.new_id()
+        status_code = 500
+
+        async def send_wrapper(message: Message) -> None:
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+                message["headers"] = [*message.get("headers", []), (b"x-movi-profile-id", profile_id.encode())]
+            await send(message)
+
+        profiler = create_profiler(self.engine)
+        started = time.perf_counter()
+        try:
+            profiler.start()
+            try:
+                await self.app(scope, receive, send_wrapper)
+            finally:
+                profiler.stop()
+
+            meta = {
+                "id": profile_id,
+                "created": time.time(),
+                "method": scope.get("method", "GET"),
+                "path": scope.get("path", ""),
+                "route": route_label(scope),
+                "status": status_code,
+                "duration_ms": round((time.perf_counter() - started) * 1000, 2),
+                "reason": reason,
+                "engine": self.engine,
+            }
+            # Rendering and the disk write would stall every other request on the loop
+            await asyncio.to_thread(self._save, profiler, meta)
+        finally:
+            _profiling_lock.release()
+
+    def _save(self, profiler: Any, meta: Dict[str, Any]) -> None:
+        try:
+            self.store.save(meta, profiler.render())
+        except OSError as e:
+            logger.warning("Failed to save profile %s: %s", meta["id"], e)
+        else:
+            logger.info(
+                "Profiled %s %s (%.0fms, %s) -> %s",
+                meta["method"], meta["path"], meta["duration_ms"], meta["reason"], meta["id"]
+            )
+
+
+def install_profiling(app: Any) -> None:
+    """Attach the profiling middleware (no-op if MOVI_PROFILING=false)."""
+    if PROFILING_ENABLED:
+        app.add_middleware(ProfilingMiddleware)
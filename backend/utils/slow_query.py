@@ -0,0 +1,218 @@
+"""
+Slow Query Log
+Records SQL statements above a latency threshold with their parameters and calling CRUD function,
+keeps a rolling top-N of the worst offenders and captures their query plans
+"""
+import os
+import sys
+import threading
+import time
+from dataclasses import dataclass, field
+from typing import Any, Dict, List, Optional, Tuple
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+SLOW_QUERY_LOG_ENABLED = os.getenv("MOVI_SLOW_QUERY_LOG", "true").lower() == "true"
+SLOW_QUERY_THRESHOLD_MS = float(os.getenv("MOVI_SLOW_QUERY_MS", "100"))
+SLOW_QUERY_TOP_N = int(os.getenv("MOVI_SLOW_QUERY_TOP_N", "20"))
+SLOW_QUERY_EXPLAIN = os.getenv("MOVI_SLOW_QUERY_EXPLAIN", "true").lower() == "true"
+
+# Module prefixes searched (innermost first) when attributing a statement to its caller
+CALLER_PREFIXES = ("crud.", "Agents.tools", "routes.")
+MAX_PARAM_CHARS = 200
+# Statements that can be EXPLAINed without side effects
+EXPLAINABLE = ("SELECT", "INSERT", "UPDATE", "DELETE", "WITH")
+
+
+@dataclass
+class SlowQuery:
+    """Aggregated slow executions of one statement from one caller"""
+    statement: str
+    caller: str
+    count: int = 0
+    total_ms: float = 0.0
+    max_ms: float = 0.0
+    last_ms: float = 0.0
+    # Parameters of the slowest execution
+    parameters: Any = None
+    last_seen: float = field(default_factory=time.time)
+    plan: Optional[List[str]] = None
+
+    def info(self) -> Dict[str, Any]:
+        return {
+            "statement": self.statement,
+            "caller": self.caller,
+            "count": self.count,
+            "avg_ms": round(self.total_ms / self.count, 2) if self.count else 0.0,
+            "max_ms": round(self.max_ms, 2),
+            "last_ms": round(self.last_ms, 2),
+            "parameters": self.parameters,
+            "last_seen": self.last_seen,
+            "plan": self.plan,
+        }
+
+
+def _truncate_parameters(parameters: Any) -> Any:
+    # Keep big blobs (images, long text) out of the log
+    if isinstance(parameters, dict):
+        return {k: _truncate_parameters(v) for k, v in parameters.items()}
+    if isinstance(parameters, (list, tuple)):
+        return [_truncate_parameters(v) for v in parameters]
+    if isinstance(parameters, (int, float, bool)) or parameters is None:
+        return parameters
+    text = str(parameters)
+    return text if len(text) <= MAX_PARAM_CHARS else text[:MAX_PARAM_CHARS] + "…"
+
+
+def find_caller(prefixes: Tuple[str, ...] = CALLER_PREFIXES) -> str:
+    """
+    Innermost application function on the stack issuing the query.
+
+    Returns:
+        "crud.vehicle.get_vehicles"-style name (first match of the prefixes in
+        order of preference), or "unknown"
+    """
+    frames = []
+    frame = sys._getframe(1)
+    while frame is not None:
+        module = frame.f_globals.get("__name__", "")
+        # Tests import the backend as a package ("backend.crud.vehicle")
+        if module.startswith("backend."):
+            module = module[len("backend."):]
+        frames.append((module, frame.f_code.co_name))
+        frame = frame.f_back
+
+    for prefix in prefixes:
+        for module, function in frames:
+            if module.startswith(prefix):
+                return f"{module}.{function}"
+    return "unknown"
+
+
+def explain(connection: Any, statement: str, parameters: Any) -> Optional[List[str]]:
+    """
+    Query plan of a statement, run on the same DBAPI connection (None if not explainable).
+
+    EXPLAIN QUERY PLAN on SQLite (one line per plan step), plain EXPLAIN
+    elsewhere; neither executes the statement.
+    """
+    if not statement.lstrip().upper().startswith(EXPLAINABLE):
+        return None
+    dialect = connection.dialect.name
+    prefix = "EXPLAIN QUERY PLAN " if dialect == "sqlite" else "EXPLAIN "
+    cursor = connection.connection.cursor()
+    try:
+        cursor.execute(prefix + statement, parameters)
+        rows = cursor.fetchall()
+    except Exception as e:
+        return [f"EXPLAIN failed: {str(e)}"]
+    finally:
+        cursor.close()
+    if dialect == "sqlite":
+        # (id, parent, notused, detail)
+        return [str(row[-1]) for row in rows]
+    return [" ".join(str(col) for col in row) for row in rows]
+
+
+class SlowQueryLog:
+    """
+    Rolling top-N of the slowest statements, grouped by (statement, caller).
+
+    When a group enters the top-N its plan is captured once; when the table
+    is full, the group with the lowest maximum duration is evicted.
+    """
+
+    def __init__(
+        self,
+        threshold_ms: float = SLOW_QUERY_THRESHOLD_MS,
+        top_n: int = SLOW_QUERY_TOP_N,
+        capture_plans: bool = SLOW_QUERY_EXPLAIN
+    ):
+        self.threshold_ms = threshold_ms
+        self.top_n = top_n
+        self.capture_plans = capture_plans
+        self.slow_count = 0
+        self._entries: Dict[Tuple[str, str], SlowQuery] = {}
+        self._lock = threading.Lock()
+
+    def record(self, statement: str, parameters: Any, duration_ms: float, caller: str) -> Optional[SlowQuery]:
+        """
+        Record one execution (ignored below the threshold).
+
+        Returns:
+            The entry it was aggregated into if it is (still) in the top-N, else None
+        """
+        if duration_ms < self.threshold_ms:
+            return None
+
+        key = (" ".join(statement.split()), caller)
+        with self._lock:
+            self.slow_count += 1
+            entry = self._entries.get(key)
+            if entry is None:
+                if len(self._entries) >= self.top_n:
+                    weakest = min(self._entries.values(), key=lambda e: e.max_ms)
+                    if weakest.max_ms >= duration_ms:
+                        return None
+                    del self._entries[(weakest.statement, weakest.caller)]
+                entry = SlowQuery(statement=key[0], caller=caller)
+                self._entries[key] = entry
+                print(f"🐢 Slow query ({duration_ms:.0f} ms) from {caller}: {key[0][:120]}")
+
+            entry.count += 1
+            entry.total_ms += duration_ms
+            entry.last_ms = duration_ms
+            entry.last_seen = time.time()
+            if duration_ms >= entry.max_ms:
+                entry.max_ms = duration_ms
+                entry.parameters = _truncate_parameters(parameters)
+            return entry
+
+    def top(self, limit: Optional[int] = None) -> List[Dict[str, Any]]:
+        """Entries ordered by maximum duration, slowest first."""
+        with self._lock:
+            entries = sorted(self._entries.values(), key=lambda e: e.max_ms, reverse=True)
+            return [entry.info() for entry in entries[:limit]]
+
+    def reset(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self.slow_count = 0
+
+    # ------------------------------------------------------------------
+    # SQLAlchemy engine events
+    # ------------------------------------------------------------------
+
+    def _before_cursor_execute(self, conn, cursor, statement, parameters, context, executemany) -> None:
+        # On the execution context, not the connection: a failed statement never
+        # reaches after_cursor_execute and must not leave state on a pooled connection
+        context._movi_slow_query_start = time.perf_counter()
+
+    def _after_cursor_execute(self, conn, cursor, statement, parameters, context, executemany) -> None:
+        started = getattr(context, "_movi_slow_query_start", None)
+        if started is None:
+            return
+        duration_ms = (time.perf_counter() - started) * 1000
+        if duration_ms < self.threshold_ms:
+            return
+        if executemany and parameters:
+            parameters = parameters[0]
+        entry = self.record(statement, parameters, duration_ms, find_caller())
+        if entry is not None and entry.plan is None and self.capture_plans:
+            entry.plan = explain(conn, statement, parameters)
+
+    def install(self, engine: Engine) -> None:
+        """Listen to statements on this engine (idempotent)."""
+        if not event.contains(engine, "before_cursor_execute", self._before_cursor_execute):
+            event.listen(engine, "before_cursor_execute", self._before_cursor_execute)
+            event.listen(engine, "after_cursor_execute", self._after_cursor_execute)
+
+
+# Shared by the engine listener and the admin endpoint
+slow_query_log = SlowQueryLog()
+
+
+def install_slow_query_log(engine: Engine) -> None:
+    """Attach the shared slow-query log (no-op if MOVI_SLOW_QUERY_LOG=false)."""
+    if SLOW_QUERY_LOG_ENABLED:
+        slow_query_log.install(engine)
@@ -0,0 +1,186 @@
+"""
+TTS Cache for Voice Features
+Content-addressed cache of synthesized speech (normalized text + voice → audio) with a memory and a disk tier
+"""
+import hashlib
+import os
+import re
+import tempfile
+import threading
+import unicodedata
+from typing import Dict, Optional
+from utils.cache import LRUCache, record_cache
+from utils.phrases import CONFIRMATION_QUESTION, NO_RESPONSE_TEXT
+
+TTS_CACHE_ENABLED = os.getenv("MOVI_TTS_CACHE", "true").lower() == "true"
+TTS_CACHE_MEMORY_ITEMS = int(os.getenv("MOVI_TTS_CACHE_MEMORY_ITEMS", "512"))
+TTS_CACHE_DIR = os.getenv(
+    "MOVI_TTS_CACHE_DIR",
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", ".tts_cache")
+)
+# MOVI_TTS_CACHE_DIR="" or MOVI_TTS_CACHE_DISK_MB=0 disables the disk tier
+TTS_CACHE_DISK_MB = int(os.getenv("MOVI_TTS_CACHE_DISK_MB", "200"))
+# Disk usage is checked every N writes rather than on each one
+PRUNE_EVERY_WRITES = 50
+
+# Phrases the assistant says verbatim, synthesized at startup
+PREWARM_PHRASES = [CONFIRMATION_QUESTION, NO_RESPONSE_TEXT]
+
+WHITESPACE = re.compile(r"\s+")
+
+
+def normalize_text(text: str) -> str:
+    """
+    Canonical form of a phrase for cache lookups.
+
+    Case and punctuation are kept because they change how TTS pronounces
+    the text; only Unicode form and whitespace are normalized.
+    """
+    return WHITESPACE.sub(" ", unicodedata.normalize("NFKC", text)).strip()
+
+
+class TTSCache:
+    """
+    Two-tier cache of TTS output.
+
+    The memory tier is an LRU of recent phrases; the disk tier survives
+    restarts and is shared by all workers on the host. Keys include a
+    namespace (TTS model/backend) so changing the engine never serves
+    stale audio. Disk files are named by key with the backend's output
+    format as extension (mp3, wav).
+
+    get() and contains() may read the disk tier; async callers use
+    get_memory() inline and run the rest in a thread.
+    """
+
+    def __init__(
+        self,
+        namespace: str = "openai:tts-1",
+        memory_items: int = TTS_CACHE_MEMORY_ITEMS,
+        disk_dir: Optional[str] = TTS_CACHE_DIR,
+        disk_max_mb: int = TTS_CACHE_DISK_MB,
+        audio_format: str = "mp3"
+    ):
+        self.namespace = namespace
+        self.audio_format = audio_format
+        self._memory: LRUCache[bytes] = LRUCache(memory_items)
+        self._disk_dir = disk_dir if disk_dir and disk_max_mb > 0 else None
+        self._disk_max_bytes = disk_max_mb * 1024 * 1024
+        self._writes = 0
+        self._lock = threading.Lock()
+        self._stats = {"memory_hits": 0, "disk_hits": 0, "misses": 0}
+
+    def key(self, text: str, voice: str) -> str:
+        """Content address for (text, voice) under this cache's namespace."""
+        raw = f"{self.namespace}\x00{voice}\x00{normalize_text(text)}"
+        return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self._disk_dir, key[:2], f"{key}.{self.audio_format}")
+
+    def _count(self, stat: str) -> None:
+        with self._lock:
+            self._stats[stat] += 1
+
+    def get_memory(self, text: str, voice: str) -> Optional[bytes]:
+        """Memory tier only (no file I/O, safe on the event loop); misses are not counted."""
+        audio = self._memory.get(self.key(text, voice))
+        if audio is not None:
+            self._count("memory_hits")
+            record_cache("tts", True)
+        return audio
+
+    def get(self, text: str, voice: str) -> Optional[bytes]:
+        """
+        Look up synthesized audio.
+
+        Returns:
+            Audio bytes (audio_format), or None on a miss
+        """
+        audio = self.get_memory(text, voice)
+        if audio is not None:
+            return audio
+
+        key = self.key(text, voice)
+        if self._disk_dir:
+            try:
+                with open(self._path(key), "rb") as f:
+                    audio = f.read()
+            except OSError:
+                audio = None
+            if audio:
+                self._memory.put(key, audio)
+                self._count("disk_hits")
+                record_cache("tts", True)
+                return audio
+
+        self._count("misses")
+        record_cache("tts", False)
+        return None
+
+    def contains(self, text: str, voice: str) -> bool:
+        """Cheap membership test that does not update hit statistics."""
+        key = self.key(text, voice)
+        if self._memory.get(key) is not None:
+            return True
+        return bool(self._disk_dir) and os.path.exists(self._path(key))
+
+    def put(self, text: str, voice: str, audio: bytes) -> None:
+        """Store audio in both tiers (disk write is atomic)."""
+        if not audio:
+            return
+        key = self.key(text, voice)
+        self._memory.put(key, audio)
+        if not self._disk_dir:
+            return
+
+        path = self._path(key)
+        try:
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path), suffix=".tmp")
+            with os.fdopen(fd, "wb") as f:
+                f.write(audio)
+            os.replace(tmp_path, path)
+        except OSError as e:
+            print(f"⚠️  TTS cache write failed: {str(e)}")
+            return
+
+        with self._lock:
+            self._writes += 1
+            should_prune = self._writes % PRUNE_EVERY_WRITES == 0
+        if should_prune:
+            self.prune()
+
+    def prune(self) -> None:
+        """Delete the least recently written files until the disk tier fits its budget."""
+        if not self._disk_dir or not os.path.isdir(self._disk_dir):
+            return
+        files = []
+        for root, _, names in os.walk(self._disk_dir):
+            for name in names:
+                path = os.path.join(root, name)
+                try:
+                    stat = os.stat(path)
+                except OSError:
+                    continue
+                files.append((stat.st_mtime, stat.st_size, path))
+
+        total = sum(size for _, size, _ in files)
+        for _, size, path in sorted(files):
+            if total <= self._disk_max_bytes:
+                break
+            try:
+                os.remove(path)
+                total -= size
+            except OSError:
+                pass
+
+    def clear(self) -> None:
+        """Drop the memory tier (the disk tier is left alone)."""
+        self._memory.clear()
+
+    def stats(self) -> Dict[str, int]:
+        """Hit/miss counters and memory tier size."""
+        with self._lock:
+            return {**self._stats, "memory_items": len(self._memory)}
+
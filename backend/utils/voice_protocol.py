@@ -0,0 +1,86 @@
+"""
+Binary Framing for the Voice WebSocket (protocol v2)
+Audio travels in binary frames with an 8-byte header; JSON is kept for control messages
+"""
+import struct
+from dataclasses import dataclass
+from typing import Dict, Union
+
+PROTOCOL_VERSION = 2
+
+# Header: version, kind, codec, flags (1 byte each), sequence number (uint32, big-endian)
+HEADER = struct.Struct(">BBBBI")
+HEADER_SIZE = HEADER.size
+
+# Frame kinds
+FRAME_AUDIO = 0x01      # client → server: a chunk of the current utterance
+FRAME_AUDIO_END = 0x02  # client → server: last chunk, the utterance is complete
+FRAME_TTS = 0x03        # server → client: synthesized audio for one sentence
+
+# Codec ids carried in the header
+CODECS: Dict[int, str] = {
+    0x00: "webm",
+    0x01: "ogg",
+    0x02: "wav",
+    0x03: "mp3",
+    0x04: "mp4",
+    0x05: "flac",
+}
+CODEC_IDS: Dict[str, int] = {name: codec_id for codec_id, name in CODECS.items()}
+
+
+class FrameError(ValueError):
+    """Raised for binary frames that do not follow the v2 layout"""
+
+
+@dataclass
+class Frame:
+    """A parsed v2 frame; payload is a view into the received buffer (no copy)"""
+    kind: int
+    codec: str
+    seq: int
+    payload: memoryview
+
+
+def parse_frame(data: Union[bytes, bytearray, memoryview]) -> Frame:
+    """
+    Parse a binary frame without copying the payload.
+
+    Args:
+        data: Raw WebSocket binary message
+
+    Returns:
+        Frame whose payload is a memoryview slice of data
+
+    Raises:
+        FrameError: If the frame is too short, has the wrong version or an unknown kind/codec
+    """
+    view = memoryview(data)
+    if len(view) < HEADER_SIZE:
+        raise FrameError(f"Frame shorter than the {HEADER_SIZE}-byte header")
+
+    version, kind, codec_id, _flags, seq = HEADER.unpack_from(view)
+    if version != PROTOCOL_VERSION:
+        raise FrameError(f"Unsupported frame version {version}")
+    if kind not in (FRAME_AUDIO, FRAME_AUDIO_END, FRAME_TTS):
+        raise FrameError(f"Unknown frame kind {kind}")
+    if codec_id not in CODECS:
+        raise FrameError(f"Unknown codec id {codec_id}")
+
+    return Frame(kind=kind, codec=CODECS[codec_id], seq=seq, payload=view[HEADER_SIZE:])
+
+
+def encode_frame(kind: int, codec: str, seq: int, payload: bytes) -> bytes:
+    """
+    Build a binary frame (header + payload).
+
+    Args:
+        kind: FRAME_AUDIO, FRAME_AUDIO_END or FRAME_TTS
+        codec: Codec name from CODECS
+        seq: Sequence number (wraps at 2**32)
+        payload: Audio bytes
+
+    Returns:
+        Frame ready for websocket.send_bytes
+    """
+    return HEADER.pack(PROTOCOL_VERSION, kind, CODEC_IDS[codec], 0, seq & 0xFFFFFFFF) + payload
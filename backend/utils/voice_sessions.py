@@ -0,0 +1,394 @@
+"""
+Voice Session Manager
+Per-worker and global session limits, idle/max-duration reaping and per-session latency metrics
+"""
+import asyncio
+import math
+import os
+import threading
+import time
+import uuid
+from collections import deque
+from dataclasses import dataclass, field
+from datetime import datetime
+from typing import Any, Deque, Dict, List, NoReturn, Optional
+
+try:
+    import redis  # optional, enables the global (cross-worker) session limit
+except ImportError:
+    redis = None
+
+VOICE_MAX_SESSIONS = int(os.getenv("MOVI_VOICE_MAX_SESSIONS", "50"))
+# Limit across all workers; needs MOVI_REDIS_URL (0 disables)
+VOICE_GLOBAL_MAX_SESSIONS = int(os.getenv("MOVI_VOICE_GLOBAL_MAX_SESSIONS", "0"))
+REDIS_URL = os.getenv("MOVI_REDIS_URL", "")
+VOICE_IDLE_TIMEOUT = float(os.getenv("MOVI_VOICE_IDLE_TIMEOUT_S", "120"))
+VOICE_MAX_DURATION = float(os.getenv("MOVI_VOICE_MAX_DURATION_S", "1800"))
+VOICE_REAP_INTERVAL = float(os.getenv("MOVI_VOICE_REAP_INTERVAL_S", "15"))
+# Recent samples kept per stage for percentiles
+LATENCY_WINDOW = int(os.getenv("MOVI_VOICE_LATENCY_WINDOW", "1000"))
+
+# Turn stages timed per session
+STAGES = ("stt", "graph", "tts", "first_audio", "turn")
+
+
+class VoiceSessionLimitExceeded(Exception):
+    """Raised when a new voice session would exceed the worker or global limit"""
+
+
+def percentile(samples: List[float], pct: float) -> float:
+    """Nearest-rank percentile of samples (0.0 when empty)."""
+    if not samples:
+        return 0.0
+    ordered = sorted(samples)
+    index = min(len(ordered) - 1, max(0, math.ceil(pct / 100 * len(ordered)) - 1))
+    return ordered[index]
+
+
+@dataclass
+class StageLatency:
+    """Running latency totals for one stage of one session"""
+    count: int = 0
+    total: float = 0.0
+    max: float = 0.0
+    last: float = 0.0
+
+    def add(self, seconds: float) -> None:
+        self.count += 1
+        self.total += seconds
+        self.max = max(self.max, seconds)
+        self.last = seconds
+
+    def summary(self) -> Dict[str, float]:
+        return {
+            "count": self.count,
+            "avg_ms": round(self.total / self.count * 1000, 1) if self.count else 0.0,
+            "max_ms": round(self.max * 1000, 1),
+            "last_ms": round(self.last * 1000, 1),
+        }
+
+
+@dataclass
+class VoiceSession:
+    """One connected voice client"""
+    session_id: str
+    websocket: Any
+    context_page: str = "unknown"
+    created_at: datetime = field(default_factory=datetime.now)
+    started: float = field(default_factory=time.monotonic)
+    last_activity: float = field(default_factory=time.monotonic)
+    turns: int = 0
+    latency: Dict[str, StageLatency] = field(default_factory=lambda: {stage: StageLatency() for stage in STAGES})
+
+    def info(self) -> Dict[str, Any]:
+        now = time.monotonic()
+        return {
+            "session_id": self.session_id,
+            "context_page": self.context_page,
+            "created_at": self.created_at.isoformat(),
+            "age_s": round(now - self.started, 1),
+            "idle_s": round(now - self.last_activity, 1),
+            "turns": self.turns,
+            "latency": {stage: stats.summary() for stage, stats in self.latency.items()},
+        }
+
+
+class GlobalSessionLimiter:
+    """
+    Cross-worker session cap backed by a Redis sorted set.
+
+    Members are "<worker>:<session_id>" scored by their last heartbeat;
+    entries not refreshed within the stale window (crashed workers) are
+    dropped before counting.
+    """
+
+    KEY = "movi:voice:sessions"
+    ACQUIRE_SCRIPT = """
+    redis.call('ZREMRANGEBYSCORE', KEYS[1], '-inf', ARGV[1])
+    if redis.call('ZSCORE', KEYS[1], ARGV[3]) then
+        redis.call('ZADD', KEYS[1], ARGV[2], ARGV[3])
+        return 1
+    end
+    if redis.call('ZCARD', KEYS[1]) >= tonumber(ARGV[4]) then
+        return 0
+    end
+    redis.call('ZADD', KEYS[1], ARGV[2], ARGV[3])
+    return 1
+    """
+
+    def __init__(self, client: Any, limit: int, stale_after: float):
+        self.client = client
+        self.limit = limit
+        self.stale_after = stale_after
+        self.worker_id = uuid.uuid4().hex[:8]
+        self._acquire = client.register_script(self.ACQUIRE_SCRIPT)
+
+    def _member(self, session_id: str) -> str:
+        return f"{self.worker_id}:{session_id}"
+
+    def acquire(self, session_id: str) -> bool:
+        now = time.time()
+        return bool(self._acquire(
+            keys=[self.KEY],
+            args=[now - self.stale_after, now, self._member(session_id), self.limit],
+        ))
+
+    def heartbeat(self, session_ids: List[str]) -> None:
+        if session_ids:
+            now = time.time()
+            self.client.zadd(self.KEY, {self._member(sid): now for sid in session_ids})
+
+    def release(self, session_id: str) -> None:
+        self.client.zrem(self.KEY, self._member(session_id))
+
+    def count(self) -> int:
+        return int(self.client.zcount(self.KEY, time.time() - self.stale_after, "+inf"))
+
+
+def create_global_limiter() -> Optional[GlobalSessionLimiter]:
+    """Redis-backed limiter when configured and available, else None (worker limit only)."""
+    if VOICE_GLOBAL_MAX_SESSIONS <= 0 or not REDIS_URL:
+        return None
+    if redis is None:
+        print("⚠️  MOVI_VOICE_GLOBAL_MAX_SESSIONS needs the redis package; using the per-worker limit only")
+        return None
+    client = redis.Redis.from_url(REDIS_URL)
+    return GlobalSessionLimiter(client, VOICE_GLOBAL_MAX_SESSIONS, stale_after=VOICE_REAP_INTERVAL * 4)
+
+
+class VoiceSessionManager:
+    """
+    Tracks active voice sessions on this worker.
+
+    Enforces the per-worker (and optional global) session limit, reaps
+    sessions that are idle or have exceeded their maximum duration on an
+    asyncio timer, and keeps per-session and worker-wide latency
+    breakdowns for STT, graph and TTS.
+    """
+
+    def __init__(
+        self,
+        max_sessions: int = VOICE_MAX_SESSIONS,
+        idle_timeout: float = VOICE_IDLE_TIMEOUT,
+        max_duration: float = VOICE_MAX_DURATION,
+        reap_interval: float = VOICE_REAP_INTERVAL,
+        global_limiter: Optional[GlobalSessionLimiter] = None
+    ):
+        self.max_sessions = max_sessions
+        self.idle_timeout = idle_timeout
+        self.max_duration = max_duration
+        self.reap_interval = reap_interval
+        self.global_limiter = global_limiter
+        self.active_sessions: Dict[str, VoiceSession] = {}
+        self._latency: Dict[str, Deque[float]] = {stage: deque(maxlen=LATENCY_WINDOW) for stage in STAGES}
+        self._counters = {"created": 0, "rejected": 0, "reaped_idle": 0, "reaped_max_duration": 0}
+        self._lock = threading.Lock()
+        self._reaper: Optional[asyncio.Task] = None
+        # New sessions waiting on the global limiter
+        self._pending = 0
+
+    def create_session(self, session_id: str, websocket: Any, context_page: str = "unknown") -> VoiceSession:
+        """
+        Register a session, enforcing the limits.
+
+        Re-initializing an existing session (same id) updates it in place.
+        Blocks on Redis with a global limiter; async code uses acreate_session.
+
+        Raises:
+            VoiceSessionLimitExceeded: If the worker or global limit is reached
+        """
+        existing = self._reuse_or_check_limit(session_id, websocket, context_page)
+        if existing is not None:
+            return existing
+        if self.global_limiter and not self.global_limiter.acquire(session_id):
+            self._reject("Voice capacity reached, try again shortly")
+        return self._register(session_id, websocket, context_page)
+
+    async def acreate_session(self, session_id: str, websocket: Any, context_page: str = "unknown") -> VoiceSession:
+        """Async variant of create_session; the Redis call runs in a worker thread."""
+        existing = self._reuse_or_check_limit(session_id, websocket, context_page)
+        if existing is not None:
+            return existing
+        if self.global_limiter:
+            # Counted against the worker limit while the slot is being acquired
+            self._pending += 1
+            try:
+                acquired = await asyncio.to_thread(self.global_limiter.acquire, session_id)
+            finally:
+                self._pending -= 1
+            if not acquired:
+                self._reject("Voice capacity reached, try again shortly")
+            # The same session may have been registered while we waited
+            existing = self._reuse_or_check_limit(session_id, websocket, context_page, check_limit=False)
+            if existing is not None:
+                return existing
+        return self._register(session_id, websocket, context_page)
+
+    def _reuse_or_check_limit(
+        self,
+        session_id: str,
+        websocket: Any,
+        context_page: str,
+        check_limit: bool = True
+    ) -> Optional[VoiceSession]:
+        """Update and return an existing session, or enforce the worker limit for a new one."""
+        existing = self.active_sessions.get(session_id)
+        if existing is not None:
+            existing.websocket = websocket
+            existing.context_page = context_page
+            self.touch(session_id)
+            return existing
+        if check_limit and len(self.active_sessions) + self._pending >= self.max_sessions:
+            self._reject("Too many voice sessions on this server, try again shortly")
+        return None
+
+    def _reject(self, message: str) -> NoReturn:
+        self._counters["rejected"] += 1
+        raise VoiceSessionLimitExceeded(message)
+
+    def _register(self, session_id: str, websocket: Any, context_page: str) -> VoiceSession:
+        session = VoiceSession(session_id=session_id, websocket=websocket, context_page=context_page)
+        self.active_sessions[session_id] = session
+        self._counters["created"] += 1
+        self._ensure_reaper()
+        print(f"🎤 Voice session created: {session_id}")
+        return session
+
+    def get_session(self, session_id: str) -> Optional[VoiceSession]:
+        return self.active_sessions.get(session_id)
+
+    def remove_session(self, session_id: str, websocket: Any = None) -> None:
+        """
+        Forget a session; with websocket given, only if it still belongs to that connection.
+
+        Blocks on Redis with a global limiter; async code uses aremove_session.
+        """
+        if self._forget(session_id, websocket) and self.global_limiter:
+            self._release_global(session_id)
+
+    async def aremove_session(self, session_id: str, websocket: Any = None) -> None:
+        """Async variant of remove_session; the Redis call runs in a worker thread."""
+        if self._forget(session_id, websocket) and self.global_limiter:
+            await asyncio.to_thread(self._release_global, session_id)
+
+    def _forget(self, session_id: str, websocket: Any) -> bool:
+        """Drop the session locally; True if it was removed."""
+        session = self.active_sessions.get(session_id)
+        removed = session is not None and (websocket is None or session.websocket is websocket)
+        if removed:
+            del self.active_sessions[session_id]
+            print(f"🛑 Voice session ended: {session_id}")
+        if not self.active_sessions and self._reaper is not None:
+            # Restarted by the next create_session
+            self._reaper.cancel()
+            self._reaper = None
+        return removed
+
+    def _release_global(self, session_id: str) -> None:
+        try:
+            self.global_limiter.release(session_id)
+        except Exception as e:
+            print(f"⚠️  Failed to release global voice slot: {str(e)}")
+
+    def update_context(self, session_id: str, context_page: str):
+        if session_id in self.active_sessions:
+            self.active_sessions[session_id].context_page = context_page
+
+    def touch(self, session_id: Optional[str]) -> None:
+        """Mark activity so the session is not reaped as idle."""
+        session = self.active_sessions.get(session_id) if session_id else None
+        if session is not None:
+            session.last_activity = time.monotonic()
+
+    def record_latency(self, session_id: Optional[str], stage: str, seconds: float) -> None:
+        """Record how long one stage of a turn took (stt, graph, tts, first_audio, turn)."""
+        with self._lock:
+            self._latency[stage].append(seconds)
+        session = self.active_sessions.get(session_id) if session_id else None
+        if session is not None:
+            session.latency[stage].add(seconds)
+            if stage == "turn":
+                session.turns += 1
+
+    # ------------------------------------------------------------------
+    # Reaping
+    # ------------------------------------------------------------------
+
+    def _ensure_reaper(self) -> None:
+        if self._reaper is None or self._reaper.done():
+            self._reaper = asyncio.get_running_loop().create_task(self._reap_forever())
+
+    async def _reap_forever(self) -> None:
+        while self.active_sessions:
+            await asyncio.sleep(self.reap_interval)
+            await self.reap()
+            if self.global_limiter:
+                try:
+                    await asyncio.to_thread(self.global_limiter.heartbeat, list(self.active_sessions))
+                except Exception as e:
+                    print(f"⚠️  Voice session heartbeat failed: {str(e)}")
+
+    async def reap(self) -> List[str]:
+        """
+        Close sessions that are idle too long or past their maximum duration.
+
+        Returns:
+            Ids of the reaped sessions
+        """
+        now = time.monotonic()
+        expired = []
+        for session in list(self.active_sessions.values()):
+            if now - session.started > self.max_duration:
+                expired.append((session, "max_duration", "Maximum session duration reached"))
+            elif now - session.last_activity > self.idle_timeout:
+                expired.append((session, "idle", "Session idle timeout"))
+
+        for session, reason, message in expired:
+            self._counters[f"reaped_{reason}"] += 1
+            print(f"⏱️  Reaping voice session {session.session_id} ({reason})")
+            try:
+                await session.websocket.send_json({"type": "session_expired", "reason": reason, "message": message})
+                await session.websocket.close(code=1000, reason=message)
+            except Exception:
+                pass  # Client already gone
+            await self.aremove_session(session.session_id)
+        return [session.session_id for session, _, _ in expired]
+
+    # ------------------------------------------------------------------
+    # Metrics
+    # ------------------------------------------------------------------
+
+    def metrics(self) -> Dict[str, Any]:
+        """
+        Session counts, limits, reaping counters and latency percentiles per stage.
+
+        Reads the global count from Redis when a global limiter is set (blocking).
+        """
+        with self._lock:
+            samples = {stage: list(values) for stage, values in self._latency.items()}
+
+        global_active = None
+        if self.global_limiter:
+            try:
+                global_active = self.global_limiter.count()
+            except Exception as e:
+                print(f"⚠️  Failed to read global voice sessions: {str(e)}")
+
+        return {
+            "active_sessions": len(self.active_sessions),
+            "max_sessions": self.max_sessions,
+            "global_active_sessions": global_active,
+            "global_max_sessions": self.global_limiter.limit if self.global_limiter else None,
+            "idle_timeout_s": self.idle_timeout,
+            "max_duration_s": self.max_duration,
+            **self._counters,
+            "latency_ms": {
+                stage: {
+                    "count": len(values),
+                    "p50": round(percentile(values, 50) * 1000, 1),
+                    "p95": round(percentile(values, 95) * 1000, 1),
+                    "p99": round(percentile(values, 99) * 1000, 1),
+                }
+                for stage, values in samples.items()
+            },
+        }
@@ -0,0 +1,237 @@
+"""
+Offline Agent Benchmark for MoveInSync
+Runs dataset queries through the real graph, checkpointer, tools and DB with a deterministic fake LLM,
+concurrently, and reports agent overhead separately from (simulated) model time. No network needed.
+"""
+import sys
+import os
+import asyncio
+import json
+import random
+import tempfile
+import time
+import uuid
+from typing import Any, Dict, List, Optional
+from dataclasses import dataclass, asdict
+from datetime import datetime
+import warnings
+warnings.filterwarnings("ignore")
+
+# Path setup
+PROJECT_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+BACKEND_PATH = os.path.join(PROJECT_ROOT, "backend")
+sys.path.insert(0, PROJECT_ROOT)
+sys.path.insert(0, BACKEND_PATH)
+
+# Must be set before the graph (and its LLM) is imported
+os.environ["MOVI_LLM_BACKEND"] = "fake"
+os.environ.setdefault("OPENAI_API_KEY", "sk-bench")
+os.environ.setdefault("LANGSMITH_TRACING", "false")
+
+from evals.bench_api import SCALES, percentile, seed_dataset
+
+import httpx
+
+
+@dataclass
+class TurnResult:
+    """One benchmarked agent turn"""
+    case_id: str
+    total_ms: float
+    model_ms: float
+    overhead_ms: float
+    tool_ms: float
+    db_ms: float
+    db_queries: int
+    model_calls: int
+    prompt_tokens: int
+    completion_tokens: int
+    interrupted: bool = False
+    error: Optional[str] = None
+
+
+def load_cases(dataset_path: str) -> List[Dict[str, Any]]:
+    """Every dataset case that has a user input (all categories)."""
+    with open(dataset_path, 'r') as f:
+        dataset = json.load(f)
+    cases = []
+    for category, tests in dataset.items():
+        for test in tests:
+            if isinstance(test, dict) and test.get("input"):
+                cases.append({
+                    "id": test.get("id", f"{category}_{len(cases)}"),
+                    "input": test["input"],
+                    "context_page": test.get("context_page", "busDashboard"),
+                })
+    return cases
+
+
+async def run_turn(graph: Any, case: Dict[str, Any]) -> TurnResult:
+    """
+    Run one case on its own thread id, accounting model, tool and DB time.
+
+    Overhead is total minus model time: graph scheduling, checkpointer,
+    tools and DB.
+    """
+    from Agents.state import initial_state
+    from Agents.telemetry import TurnAccounting
+    from utils.instrumentation import collect_db_stats
+
+    accounting = TurnAccounting()
+    config = {
+        "configurable": {"thread_id": f"bench-{case['id']}-{uuid.uuid4().hex[:8]}"},
+        "callbacks": [accounting],
+    }
+    error = None
+    interrupted = False
+    with collect_db_stats() as db_stats:
+        started = time.perf_counter()
+        try:
+            await graph.ainvoke(initial_state(case["input"], case["context_page"]), config=config)
+            interrupted = bool((await graph.aget_state(config)).next)
+        except Exception as e:
+            error = str(e)
+        total = time.perf_counter() - started
+
+    return TurnResult(
+        case_id=case["id"],
+        total_ms=round(total * 1000, 2),
+        model_ms=round(accounting.model_seconds * 1000, 2),
+        overhead_ms=round((total - accounting.model_seconds) * 1000, 2),
+        tool_ms=round(accounting.tool_seconds * 1000, 2),
+        db_ms=round(db_stats.db_time * 1000, 2),
+        db_queries=db_stats.queries,
+        model_calls=accounting.model_calls,
+        prompt_tokens=accounting.prompt_tokens,
+        completion_tokens=accounting.completion_tokens,
+        interrupted=interrupted,
+        error=error,
+    )
+
+
+async def run_cases(graph: Any, cases: List[Dict[str, Any]], concurrency: int) -> List[TurnResult]:
+    """Run cases with at most `concurrency` turns in flight."""
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def bounded(case: Dict[str, Any]) -> TurnResult:
+        async with semaphore:
+            return await run_turn(graph, case)
+
+    return await asyncio.gather(*(bounded(case) for case in cases))
+
+
+def summarize(results: List[TurnResult], wall_seconds: float) -> Dict[str, Any]:
+    """Percentiles per component plus throughput and overhead share."""
+    summary: Dict[str, Any] = {
+        "turns": len(results),
+        "errors": sum(1 for r in results if r.error),
+        "interrupted": sum(1 for r in results if r.interrupted),
+        "wall_s": round(wall_seconds, 3),
+        "throughput_turns": round(len(results) / wall_seconds, 2) if wall_seconds else 0.0,
+    }
+    for component in ("total_ms", "model_ms", "overhead_ms", "tool_ms", "db_ms"):
+        values = [getattr(r, component) for r in results]
+        summary[component] = {
+            "mean": round(sum(values) / len(values), 2) if values else 0.0,
+            "p50": round(percentile(values, 50), 2),
+            "p95": round(percentile(values, 95), 2),
+            "p99": round(percentile(values, 99), 2),
+        }
+    total = sum(r.total_ms for r in results)
+    summary["overhead_share"] = round(sum(r.overhead_ms for r in results) / total, 3) if total else 0.0
+    return summary
+
+
+def print_report(summary: Dict[str, Any], latency_ms: float, concurrency: int) -> None:
+    print("\n" + "="*70)
+    print("📊 MOVI AGENT OVERHEAD BENCHMARK (fake LLM)")
+    print("="*70)
+    print(f"\n  Turns:              {summary['turns']} (errors: {summary['errors']}, interrupted: {summary['interrupted']})")
+    print(f"  Concurrency:        {concurrency}")
+    print(f"  Model latency:      {latency_ms:.0f}ms per call (simulated)")
+    print(f"  Throughput:         {summary['throughput_turns']:.1f} turns/s")
+    print(f"  Overhead share:     {summary['overhead_share'] * 100:.1f}% of turn time")
+    print(f"\n{'component':14s} {'mean':>9s} {'p50':>9s} {'p95':>9s} {'p99':>9s}")
+    for component in ("total_ms", "model_ms", "overhead_ms", "tool_ms", "db_ms"):
+        stats = summary[component]
+        print(f"{component:14s} {stats['mean']:9.1f} {stats['p50']:9.1f} {stats['p95']:9.1f} {stats['p99']:9.1f}")
+    print("\n" + "="*70)
+
+
+async def prepare_database(scale: str, tmp_dir: str, seed: int) -> None:
+    """
+    Point the app and the agent tools at a fresh SQLite file seeded with
+    synthetic data (test.db is never touched).
+    """
+    from sqlalchemy import create_engine
+    import database
+    from backend.main import app
+    from backend.models import Base
+    from utils.instrumentation import instrument_engine
+
+    engine = create_engine(f"sqlite:///{os.path.join(tmp_dir, 'bench_agent.db')}", connect_args={"check_same_thread": False})
+    Base.metadata.create_all(bind=engine)
+    instrument_engine(engine)
+    # Tools open sessions with SessionLocal; rebinding it moves them to the bench DB
+    database.SessionLocal.configure(bind=engine)
+
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench", timeout=60) as client:
+        await seed_dataset(client, SCALES[scale], random.Random(seed))
+
+
+async def main():
+    """Main entry point"""
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Offline Movi agent overhead benchmark")
+    parser.add_argument("--dataset", default="evals/dataset.json", help="Path to eval dataset")
+    parser.add_argument("--repeat", type=int, default=5, help="Times each dataset case is run")
+    parser.add_argument("--concurrency", type=int, default=8, help="Concurrent agent turns")
+    parser.add_argument("--latency-ms", type=float, default=300, help="Simulated model latency per LLM call")
+    parser.add_argument("--token-delay-ms", type=float, default=0, help="Simulated delay between streamed tokens")
+    parser.add_argument("--scale", default="small", choices=list(SCALES), help="Synthetic dataset size")
+    parser.add_argument("--seed", type=int, default=42, help="Random seed for the synthetic data")
+    parser.add_argument("--max-overhead-p95-ms", type=float, default=None, help="Fail if overhead p95 exceeds this")
+    parser.add_argument("--output", default=None, help="Write per-turn results and summary to this JSON file")
+
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        await prepare_database(args.scale, tmp, args.seed)
+
+        from backend.Agents import graph as graph_module
+        graph_module.llm.latency_ms = args.latency_ms
+        graph_module.llm.token_delay_ms = args.token_delay_ms
+
+        cases = load_cases(args.dataset) * args.repeat
+        print(f"🚀 Running {len(cases)} turns (concurrency {args.concurrency}, model latency {args.latency_ms:.0f}ms)")
+
+        started = time.perf_counter()
+        results = await run_cases(graph_module.app, cases, args.concurrency)
+        summary = summarize(results, time.perf_counter() - started)
+
+    print_report(summary, args.latency_ms, args.concurrency)
+
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump({
+                "timestamp": datetime.now().isoformat(),
+                "config": vars(args),
+                "summary": summary,
+                "results": [asdict(r) for r in results],
+            }, f, indent=2)
+        print(f"\n💾 Results saved to {args.output}")
+
+    exit_code = 0
+    if summary["errors"]:
+        print(f"❌ {summary['errors']} turns failed")
+        exit_code = 1
+    if args.max_overhead_p95_ms is not None and summary["overhead_ms"]["p95"] > args.max_overhead_p95_ms:
+        print(f"❌ Overhead p95 {summary['overhead_ms']['p95']:.1f}ms exceeds {args.max_overhead_p95_ms:.1f}ms")
+        exit_code = 1
+    sys.exit(exit_code)
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
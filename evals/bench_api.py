@@ -0,0 +1,573 @@
+"""
+REST API Benchmark Suite for MoveInSync
+Synthetic data at configurable scale, scripted workloads against the FastAPI app, p50/p95/p99 and throughput,
+and regression detection against a stored baseline.
+"""
+import sys
+import os
+import asyncio
+import json
+import math
+import random
+import tempfile
+import time
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Tuple
+from dataclasses import dataclass, asdict, field
+from datetime import datetime
+import warnings
+warnings.filterwarnings("ignore")
+
+# Path setup
+PROJECT_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+BACKEND_PATH = os.path.join(PROJECT_ROOT, "backend")
+sys.path.insert(0, PROJECT_ROOT)
+sys.path.insert(0, BACKEND_PATH)
+
+# The app imports the agent graph; the benchmark never calls the LLM
+os.environ.setdefault("OPENAI_API_KEY", "sk-bench")
+os.environ.setdefault("LANGSMITH_TRACING", "false")
+os.environ.setdefault("MOVI_AUDIO_BACKEND", "fake")
+
+import httpx
+
+# Import aliasing
+import importlib
+
+def alias(name: str, real_name: str):
+    try:
+        module = importlib.import_module(real_name)
+        sys.modules[name] = module
+    except Exception:
+        pass
+
+alias("models", "backend.models")
+alias("database", "backend.database")
+alias("crud", "backend.crud")
+alias("routes", "backend.routes")
+alias("Agents", "backend.Agents")
+
+
+# Entity counts per scale; "stops_per_path" is the path length
+SCALES: Dict[str, Dict[str, int]] = {
+    "small": {"stops": 200, "paths": 40, "stops_per_path": 6, "routes": 80, "trips": 200,
+              "vehicles": 60, "drivers": 60, "deployments": 150},
+    "medium": {"stops": 1000, "paths": 200, "stops_per_path": 8, "routes": 400, "trips": 1000,
+               "vehicles": 300, "drivers": 300, "deployments": 800},
+    "large": {"stops": 5000, "paths": 1000, "stops_per_path": 10, "routes": 2000, "trips": 5000,
+              "vehicles": 1500, "drivers": 1500, "deployments": 4000},
+}
+
+# p95 may grow / throughput may drop by this fraction before it counts as a regression
+REGRESSION_TOLERANCE = 0.25
+
+LIVE_STATUSES = ["scheduled", "in_progress", "completed", "delayed", "cancelled"]
+AREAS = ["Koramangala", "Whitefield", "Indiranagar", "Electronic City", "Marathahalli",
+         "HSR Layout", "Hebbal", "Yelahanka", "Jayanagar", "BTM Layout"]
+
+
+# ----------------------------------------------------------------------
+# Synthetic data generators
+# ----------------------------------------------------------------------
+
+def generate_stops(n: int, rng: random.Random, offset: int = 0) -> List[Dict[str, Any]]:
+    """Stops scattered around Bangalore."""
+    return [
+        {
+            "name": f"{rng.choice(AREAS)} Stop {offset + i}",
+            "latitude": round(12.85 + rng.random() * 0.25, 6),
+            "longitude": round(77.50 + rng.random() * 0.25, 6),
+        }
+        for i in range(n)
+    ]
+
+
+def generate_paths(n: int, stop_ids: List[int], stops_per_path: int, rng: random.Random) -> List[Dict[str, Any]]:
+    """Paths over random, distinct stops."""
+    length = min(stops_per_path, len(stop_ids))
+    return [
+        {
+            "path_name": f"Path-{i}",
+            "stops": [
+                {"stop_id": stop_id, "stop_order": order}
+                for order, stop_id in enumerate(rng.sample(stop_ids, length), 1)
+            ],
+        }
+        for i in range(n)
+    ]
+
+
+def generate_routes(n: int, path_ids: List[int], rng: random.Random) -> List[Dict[str, Any]]:
+    """Routes on random paths with shift times across the day."""
+    return [
+        {
+            "path_id": rng.choice(path_ids),
+            "route_display_name": f"{rng.choice(AREAS)} Route {i}",
+            "shift_time": f"{rng.randint(5, 22):02d}:{rng.choice([0, 15, 30, 45]):02d}:00",
+            "direction": rng.choice(["up", "down"]),
+            "capacity": rng.choice([20, 30, 40, 50]),
+            "allocated_waitlist": rng.randint(0, 5),
+        }
+        for i in range(n)
+    ]
+
+
+def generate_trips(n: int, route_ids: List[int], rng: random.Random) -> List[Dict[str, Any]]:
+    """Daily trips with random booking levels and live statuses."""
+    return [
+        {
+            "route_id": rng.choice(route_ids),
+            "display_name": f"Trip {i} - {rng.choice(AREAS)}",
+            "booking_status_percentage": round(rng.random() * 100, 1),
+            "live_status": rng.choice(LIVE_STATUSES),
+        }
+        for i in range(n)
+    ]
+
+
+def generate_vehicles(n: int, rng: random.Random, offset: int = 0) -> List[Dict[str, Any]]:
+    """Buses and cabs with unique license plates."""
+    vehicles = []
+    for i in range(n):
+        vehicle_type = rng.choice(["bus", "cab"])
+        vehicles.append({
+            "license_plate": f"KA{(offset + i) % 100:02d}BX{offset + i:05d}",
+            "type": vehicle_type,
+            "capacity": rng.choice([30, 40, 50]) if vehicle_type == "bus" else rng.choice([4, 6]),
+            "status": "active",
+        })
+    return vehicles
+
+
+def generate_drivers(n: int, rng: random.Random, offset: int = 0) -> List[Dict[str, Any]]:
+    """Drivers with unique phone numbers."""
+    first = ["Ravi", "Suresh", "Anil", "Kiran", "Manoj", "Deepak", "Arun", "Vijay"]
+    last = ["Kumar", "Reddy", "Rao", "Sharma", "Naidu", "Gowda"]
+    return [
+        {"name": f"{rng.choice(first)} {rng.choice(last)} {offset + i}", "phone_number": f"9{offset + i:09d}"}
+        for i in range(n)
+    ]
+
+
+def generate_deployments(
+    n: int,
+    trip_ids: List[int],
+    vehicle_ids: List[int],
+    driver_ids: List[int],
+    rng: random.Random
+) -> List[Dict[str, Any]]:
+    """Deployments without vehicle/driver conflicts on the same trip."""
+    seen = set()
+    deployments = []
+    while len(deployments) < n and len(seen) < len(trip_ids) * min(len(vehicle_ids), len(driver_ids)):
+        trip_id = rng.choice(trip_ids)
+        vehicle_id = rng.choice(vehicle_ids)
+        driver_id = rng.choice(driver_ids)
+        if (trip_id, vehicle_id) in seen or (trip_id, "d", driver_id) in seen:
+            continue
+        seen.add((trip_id, vehicle_id))
+        seen.add((trip_id, "d", driver_id))
+        deployments.append({"trip_id": trip_id, "vehicle_id": vehicle_id, "driver_id": driver_id})
+    return deployments
+
+
+@dataclass
+class SeededData:
+    """Ids created while seeding, used by the workloads"""
+    stop_ids: List[int] = field(default_factory=list)
+    path_ids: List[int] = field(default_factory=list)
+    route_ids: List[int] = field(default_factory=list)
+    trip_ids: List[int] = field(default_factory=list)
+    vehicle_ids: List[int] = field(default_factory=list)
+    driver_ids: List[int] = field(default_factory=list)
+    seed_seconds: float = 0.0
+
+
+async def _post(client: httpx.AsyncClient, url: str, payload: Any) -> Any:
+    response = await client.post(url, json=payload)
+    if response.status_code >= 400:
+        raise RuntimeError(f"POST {url} failed ({response.status_code}): {response.text[:200]}")
+    return response.json()
+
+
+async def seed_dataset(client: httpx.AsyncClient, sizes: Dict[str, int], rng: random.Random, batch: int = 500) -> SeededData:
+    """
+    Create the synthetic dataset through the REST API (bulk endpoints where available).
+
+    Args:
+        client: Client bound to the app or a live server
+        sizes: Entity counts (see SCALES)
+        rng: Seeded random generator (same seed, same data)
+        batch: Rows per bulk request
+
+    Returns:
+        SeededData with the created ids
+    """
+    data = SeededData()
+    started = time.perf_counter()
+
+    async def bulk(url: str, rows: List[Dict[str, Any]], id_field: str) -> List[int]:
+        ids = []
+        for i in range(0, len(rows), batch):
+            ids.extend(item[id_field] for item in await _post(client, url, rows[i:i + batch]))
+        return ids
+
+    data.stop_ids = await bulk("/stops/bulk", generate_stops(sizes["stops"], rng), "stop_id")
+    for path in generate_paths(sizes["paths"], data.stop_ids, sizes["stops_per_path"], rng):
+        data.path_ids.append((await _post(client, "/paths/", path))["path_id"])
+    data.route_ids = await bulk("/routes/bulk", generate_routes(sizes["routes"], data.path_ids, rng), "route_id")
+    data.trip_ids = await bulk("/trips/bulk", generate_trips(sizes["trips"], data.route_ids, rng), "trip_id")
+    data.vehicle_ids = await bulk("/vehicles/bulk", generate_vehicles(sizes["vehicles"], rng), "vehicle_id")
+    data.driver_ids = await bulk("/drivers/bulk", generate_drivers(sizes["drivers"], rng), "driver_id")
+    await bulk(
+        "/deployments/bulk",
+        generate_deployments(sizes["deployments"], data.trip_ids, data.vehicle_ids, data.driver_ids, rng),
+        "deployment_id"
+    )
+    data.seed_seconds = time.perf_counter() - started
+    return data
+
+
+# ----------------------------------------------------------------------
+# Workloads
+# ----------------------------------------------------------------------
+
+class Workload:
+    """
+    One scripted operation, run repeatedly.
+
+    An operation may issue several requests (a dashboard refresh loads
+    several lists at once); its latency is the wall time of the whole
+    operation. Responses with a status in `accepted` count as success.
+    """
+
+    def __init__(self, name: str, operation: Callable[..., Awaitable[List[int]]], accepted: Tuple[int, ...] = (200, 201, 204)):
+        self.name = name
+        self.operation = operation
+        self.accepted = accepted
+
+
+async def dashboard_refresh(client: httpx.AsyncClient, data: SeededData, rng: random.Random, counter: int) -> List[int]:
+    """What the dashboard loads on every refresh."""
+    responses = await asyncio.gather(
+        client.get("/trips/all"),
+        client.get("/deployments/all"),
+        client.get("/vehicles/available"),
+        client.get("/drivers/available"),
+        client.get("/trips/count/total"),
+    )
+    return [r.status_code for r in responses]
+
+
+async def search(client: httpx.AsyncClient, data: SeededData, rng: random.Random, counter: int) -> List[int]:
+    """One search box query against a random entity."""
+    term = rng.choice(AREAS)[:rng.randint(3, 6)]
+    url, params = rng.choice([
+        ("/stops/search", {"search_term": term}),
+        ("/routes/search/name", {"query": term}),
+        ("/trips/search/name", {"query": term}),
+        ("/drivers/search/name", {"name": rng.choice(["Ravi", "Kumar", "Rao"])}),
+    ])
+    response = await client.get(url, params=params)
+    return [response.status_code]
+
+
+async def bulk_seeding(client: httpx.AsyncClient, data: SeededData, rng: random.Random, counter: int) -> List[int]:
+    """Bulk import of new stops and vehicles (ids offset so plates never collide)."""
+    offset = 1_000_000 + counter * 100
+    stops = await client.post("/stops/bulk", json=generate_stops(50, rng, offset))
+    vehicles = await client.post("/vehicles/bulk", json=generate_vehicles(10, rng, offset))
+    return [stops.status_code, vehicles.status_code]
+
+
+async def deployment_churn(client: httpx.AsyncClient, data: SeededData, rng: random.Random, counter: int) -> List[int]:
+    """Assign a vehicle and driver to a trip, then remove the assignment."""
+    created = await client.post("/deployments/", json={
+        "trip_id": rng.choice(data.trip_ids),
+        "vehicle_id": rng.choice(data.vehicle_ids),
+        "driver_id": rng.choice(data.driver_ids),
+    })
+    if created.status_code != 201:
+        return [created.status_code]
+    deleted = await client.delete(f"/deployments/{created.json()['deployment_id']}")
+    return [created.status_code, deleted.status_code]
+
+
+WORKLOADS: Dict[str, Workload] = {
+    "dashboard_refresh": Workload("dashboard_refresh", dashboard_refresh),
+    "search": Workload("search", search),
+    "bulk_seeding": Workload("bulk_seeding", bulk_seeding),
+    # 400: random pick already deployed to that trip (a rejected, not failed, request)
+    "deployment_churn": Workload("deployment_churn", deployment_churn, accepted=(200, 201, 400)),
+}
+
+
+# ----------------------------------------------------------------------
+# Measurement
+# ----------------------------------------------------------------------
+
+def percentile(samples: List[float], pct: float) -> float:
+    """Nearest-rank percentile of samples (0.0 when empty)."""
+    if not samples:
+        return 0.0
+    ordered = sorted(samples)
+    index = min(len(ordered) - 1, max(0, math.ceil(pct / 100 * len(ordered)) - 1))
+    return ordered[index]
+
+
+@dataclass
+class WorkloadResult:
+    """Latency and throughput of one workload"""
+    name: str
+    operations: int
+    errors: int
+    concurrency: int
+    duration_s: float
+    throughput_ops: float
+    mean_ms: float
+    p50_ms: float
+    p95_ms: float
+    p99_ms: float
+    max_ms: float
+
+    def to_dict(self) -> Dict:
+        return asdict(self)
+
+
+async def run_workload(
+    client: httpx.AsyncClient,
+    workload: Workload,
+    data: SeededData,
+    operations: int,
+    concurrency: int,
+    seed: int = 0
+) -> WorkloadResult:
+    """
+    Run `operations` operations with at most `concurrency` in flight.
+
+    Returns:
+        WorkloadResult with latency percentiles and operations per second
+    """
+    rng = random.Random(seed)
+    semaphore = asyncio.Semaphore(concurrency)
+    latencies: List[float] = []
+    errors = 0
+
+    async def one(counter: int):
+        nonlocal errors
+        async with semaphore:
+            started = time.perf_counter()
+            try:
+                statuses = await workload.operation(client, data, rng, counter)
+                if any(status not in workload.accepted for status in statuses):
+                    errors += 1
+            except Exception:
+                errors += 1
+            latencies.append((time.perf_counter() - started) * 1000)
+
+    started = time.perf_counter()
+    await asyncio.gather(*(one(i) for i in range(operations)))
+    duration = time.perf_counter() - started
+
+    return WorkloadResult(
+        name=workload.name,
+        operations=operations,
+        errors=errors,
+        concurrency=concurrency,
+        duration_s=round(duration, 3),
+        throughput_ops=round(operations / duration, 2) if duration else 0.0,
+        mean_ms=round(sum(latencies) / len(latencies), 2) if latencies else 0.0,
+        p50_ms=round(percentile(latencies, 50), 2),
+        p95_ms=round(percentile(latencies, 95), 2),
+        p99_ms=round(percentile(latencies, 99), 2),
+        max_ms=round(max(latencies), 2) if latencies else 0.0,
+    )
+
+
+def check_regression(
+    results: List[WorkloadResult],
+    baseline: Optional[Dict],
+    tolerance: float = REGRESSION_TOLERANCE
+) -> List[str]:
+    """
+    Compare p95 latency and throughput per workload against the baseline.
+
+    Returns:
+        Human-readable regressions (empty when none)
+    """
+    if not baseline:
+        return []
+    regressions = []
+    for result in results:
+        base = baseline.get("workloads", {}).get(result.name)
+        if not base:
+            continue
+        if base.get("p95_ms") and result.p95_ms > base["p95_ms"] * (1 + tolerance):
+            regressions.append(f"{result.name} p95 regressed: {base['p95_ms']:.1f}ms → {result.p95_ms:.1f}ms")
+        if base.get("throughput_ops") and result.throughput_ops < base["throughput_ops"] * (1 - tolerance):
+            regressions.append(
+                f"{result.name} throughput regressed: {base['throughput_ops']:.1f} → {result.throughput_ops:.1f} ops/s"
+            )
+        if result.errors > base.get("errors", 0):
+            regressions.append(f"{result.name} errors increased: {base.get('errors', 0)} → {result.errors}")
+    return regressions
+
+
+def print_report(results: List[WorkloadResult], data: SeededData, regressions: List[str]) -> int:
+    """Print the benchmark table; returns the exit code."""
+    print("\n" + "="*86)
+    print("📊 MOVEINSYNC REST API BENCHMARK")
+    print("="*86)
+    print(f"\n🌱 Seeding took {data.seed_seconds:.2f}s")
+    print(f"\n{'workload':20s} {'ops':>6s} {'err':>5s} {'ops/s':>9s} {'p50 ms':>9s} {'p95 ms':>9s} {'p99 ms':>9s} {'max ms':>9s}")
+    for r in results:
+        print(f"{r.name:20s} {r.operations:6d} {r.errors:5d} {r.throughput_ops:9.1f} "
+              f"{r.p50_ms:9.1f} {r.p95_ms:9.1f} {r.p99_ms:9.1f} {r.max_ms:9.1f}")
+
+    if regressions:
+        print(f"\n⚠️  REGRESSIONS DETECTED:")
+        for reg in regressions:
+            print(f"  ❌ {reg}")
+        print("\n" + "="*86)
+        return 1
+    print(f"\n✅ No regressions detected")
+    print("\n" + "="*86)
+    return 0
+
+
+# ----------------------------------------------------------------------
+# Targets
+# ----------------------------------------------------------------------
+
+def create_local_app(db_path: str) -> Any:
+    """
+    The FastAPI app with its DB dependency pointed at a fresh SQLite file,
+    so the benchmark never touches test.db.
+    """
+    from sqlalchemy import create_engine
+    from sqlalchemy.orm import sessionmaker
+    import database
+    from backend.main import app
+    from backend.models import Base
+
+    engine = create_engine(f"sqlite:///{db_path}", connect_args={"check_same_thread": False})
+    Base.metadata.create_all(bind=engine)
+    session_factory = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+
+    def get_bench_db():
+        db = session_factory()
+        try:
+            yield db
+        finally:
+            db.close()
+
+    app.dependency_overrides[database.get_db] = get_bench_db
+    return app
+
+
+async def run_benchmark(
+    scale: str = "small",
+    sizes: Optional[Dict[str, int]] = None,
+    workloads: Optional[List[str]] = None,
+    operations: int = 200,
+    concurrency: int = 10,
+    seed: int = 42,
+    url: Optional[str] = None
+) -> Tuple[List[WorkloadResult], SeededData]:
+    """
+    Seed the dataset and run the workloads.
+
+    Args:
+        scale: Key of SCALES (ignored when sizes is given)
+        sizes: Explicit entity counts
+        workloads: Names from WORKLOADS (default: all)
+        operations: Operations per workload
+        concurrency: Operations in flight per workload
+        seed: Random seed for data and workloads
+        url: Benchmark a running server instead of the in-process app
+            (seeds into that server's database: use a disposable one)
+    """
+    sizes = sizes or SCALES[scale]
+    names = workloads or list(WORKLOADS)
+    limits = httpx.Limits(max_connections=concurrency * 5)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        if url:
+            client = httpx.AsyncClient(base_url=url, limits=limits, timeout=60)
+        else:
+            app = create_local_app(os.path.join(tmp, "bench.db"))
+            client = httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://bench", timeout=60)
+
+        async with client:
+            data = await seed_dataset(client, sizes, random.Random(seed))
+            results = []
+            for name in names:
+                print(f"⏱️  {name} ({operations} ops, concurrency {concurrency})...")
+                results.append(await run_workload(client, WORKLOADS[name], data, operations, concurrency, seed))
+
+        if not url:
+            app.dependency_overrides.clear()
+    return results, data
+
+
+async def main():
+    """Main entry point"""
+    import argparse
+
+    parser = argparse.ArgumentParser(description="MoveInSync REST API Benchmark Suite")
+    parser.add_argument("--scale", default="small", choices=list(SCALES), help="Synthetic dataset size")
+    parser.add_argument("--workloads", default=",".join(WORKLOADS), help="Comma-separated workloads to run")
+    parser.add_argument("--operations", type=int, default=200, help="Operations per workload")
+    parser.add_argument("--concurrency", type=int, default=10, help="Concurrent operations per workload")
+    parser.add_argument("--seed", type=int, default=42, help="Random seed (same seed, same data)")
+    parser.add_argument("--url", default=None, help="Benchmark a running server (writes to its database!)")
+    parser.add_argument("--baseline", default="evals/bench_baseline.json", help="Path to baseline results")
+    parser.add_argument("--tolerance", type=float, default=REGRESSION_TOLERANCE, help="Allowed p95/throughput drift")
+    parser.add_argument("--save-baseline", action="store_true", help="Save current run as new baseline")
+
+    args = parser.parse_args()
+
+    results, data = await run_benchmark(
+        scale=args.scale,
+        workloads=[w.strip() for w in args.workloads.split(",") if w.strip()],
+        operations=args.operations,
+        concurrency=args.concurrency,
+        seed=args.seed,
+        url=args.url,
+    )
+
+    baseline = None
+    try:
+        with open(args.baseline, 'r') as f:
+            baseline = json.load(f)
+        if baseline.get("scale") != args.scale or baseline.get("concurrency") != args.concurrency:
+            print(f"ℹ️  Baseline was recorded with scale={baseline.get('scale')}, "
+                  f"concurrency={baseline.get('concurrency')}; comparison may be meaningless")
+    except FileNotFoundError:
+        print(f"ℹ️  No baseline found at {args.baseline}")
+
+    regressions = check_regression(results, baseline, args.tolerance)
+    exit_code = print_report(results, data, regressions)
+
+    report = {
+        "timestamp": datetime.now().isoformat(),
+        "scale": args.scale,
+        "concurrency": args.concurrency,
+        "operations": args.operations,
+        "seed_seconds": round(data.seed_seconds, 3),
+        "workloads": {r.name: r.to_dict() for r in results},
+    }
+    results_file = f"evals/bench_results_{datetime.now().strftime('%Y%m%d_%H%M%S')}.json"
+    with open(results_file, 'w') as f:
+        json.dump({**report, "regressions": regressions}, f, indent=2)
+    print(f"\n💾 Results saved to {results_file}")
+
+    if args.save_baseline:
+        with open(args.baseline, 'w') as f:
+            json.dump(report, f, indent=2)
+        print(f"✅ Baseline saved to {args.baseline}")
+
+    sys.exit(exit_code)
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,143 @@
+"""
+Startup-Time Benchmark for MoveInSync
+Measures cold import of the backend app, time to the first served request (startup hook included) and
+the deferred agent initialization in fresh interpreters, with and without the Movi agent routes
+"""
+import sys
+import os
+import json
+import statistics
+import subprocess
+import tempfile
+from typing import Any, Dict, List, Optional
+from datetime import datetime
+
+PROJECT_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+BACKEND_PATH = os.path.join(PROJECT_ROOT, "backend")
+
+# Modules that should only load once the agent is used
+HEAVY_MODULES = ("langchain_openai", "langchain_core", "langgraph", "openai", "Agents.graph")
+
+# Runs in a fresh interpreter (cwd is a temp dir, so the app's SQLite file lands there)
+CHILD = """
+import json, sys, time
+started = time.perf_counter()
+sys.path.insert(0, {backend!r})
+import main
+imported = time.perf_counter()
+from fastapi.testclient import TestClient
+with TestClient(main.app) as client:
+    client.get("/health")
+    first_request = time.perf_counter()
+heavy = [m for m in {heavy!r} if m in sys.modules]
+modules = len(sys.modules)
+agent_init_ms = None
+if {agent!r}:
+    from Agents.runtime import get_agent_runtime
+    agent_started = time.perf_counter()
+    get_agent_runtime()
+    agent_init_ms = (time.perf_counter() - agent_started) * 1000
+print(json.dumps({{
+    "import_ms": (imported - started) * 1000,
+    "first_request_ms": (first_request - started) * 1000,
+    "agent_init_ms": agent_init_ms,
+    "modules": modules,
+    "heavy_modules": heavy,
+}}))
+"""
+
+SCENARIOS = {
+    "full": {"MOVI_AGENT_ENABLED": "true"},
+    "crud_only": {"MOVI_AGENT_ENABLED": "false"},
+}
+
+
+def run_once(scenario: str, tmp_dir: str) -> Dict[str, Any]:
+    """One cold start in a new interpreter."""
+    agent = SCENARIOS[scenario]["MOVI_AGENT_ENABLED"] == "true"
+    env = {
+        **os.environ,
+        **SCENARIOS[scenario],
+        "OPENAI_API_KEY": os.environ.get("OPENAI_API_KEY", "sk-bench"),
+        "LANGSMITH_TRACING": "false",
+        # Timed separately below; background prewarms would race the heavy-module check
+        "MOVI_AGENT_PREWARM": "false",
+        "MOVI_TTS_PREWARM": "false",
+    }
+    code = CHILD.format(backend=BACKEND_PATH, heavy=HEAVY_MODULES, agent=agent)
+    completed = subprocess.run(
+        [sys.executable, "-c", code], cwd=tmp_dir, env=env, capture_output=True, text=True, timeout=300
+    )
+    if completed.returncode != 0:
+        raise RuntimeError(f"{scenario} start failed:\n{completed.stderr[-2000:]}")
+    # The app prints banners; the measurement is the last line
+    return json.loads(completed.stdout.strip().splitlines()[-1])
+
+
+def summarize(runs: List[Dict[str, Any]]) -> Dict[str, Any]:
+    """Median/min per timing, module counts from the last run."""
+    summary: Dict[str, Any] = {"runs": len(runs)}
+    for key in ("import_ms", "first_request_ms", "agent_init_ms"):
+        values = [run[key] for run in runs if run[key] is not None]
+        if values:
+            summary[key] = {"median": round(statistics.median(values), 1), "min": round(min(values), 1)}
+    summary["modules"] = runs[-1]["modules"]
+    summary["heavy_modules"] = runs[-1]["heavy_modules"]
+    return summary
+
+
+def print_report(results: Dict[str, Dict[str, Any]]) -> None:
+    print("\n" + "="*70)
+    print("📊 MOVEINSYNC BACKEND STARTUP BENCHMARK")
+    print("="*70)
+    for scenario, summary in results.items():
+        print(f"\n🚀 {scenario} ({summary['runs']} cold starts)")
+        print(f"  Import main:        {summary['import_ms']['median']:.0f}ms (min {summary['import_ms']['min']:.0f}ms)")
+        print(f"  First request:      {summary['first_request_ms']['median']:.0f}ms (min {summary['first_request_ms']['min']:.0f}ms)")
+        if "agent_init_ms" in summary:
+            print(f"  Agent init (lazy):  {summary['agent_init_ms']['median']:.0f}ms (min {summary['agent_init_ms']['min']:.0f}ms)")
+        print(f"  Modules loaded:     {summary['modules']}")
+        heavy = ", ".join(summary["heavy_modules"]) or "none"
+        print(f"  LLM stack at start: {heavy}")
+    print("\n" + "="*70)
+
+
+def main() -> None:
+    """Main entry point"""
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Backend cold-start benchmark")
+    parser.add_argument("--runs", type=int, default=5, help="Cold starts per scenario")
+    parser.add_argument("--scenarios", default=",".join(SCENARIOS), help="Comma-separated scenarios")
+    parser.add_argument("--max-import-ms", type=float, default=None, help="Fail if median import time exceeds this")
+    parser.add_argument("--output", default=None, help="Write the summary to this JSON file")
+
+    args = parser.parse_args()
+    scenarios = [name.strip() for name in args.scenarios.split(",") if name.strip()]
+
+    results: Dict[str, Dict[str, Any]] = {}
+    with tempfile.TemporaryDirectory() as tmp:
+        for scenario in scenarios:
+            print(f"⏱️  {scenario}: {args.runs} cold starts...")
+            results[scenario] = summarize([run_once(scenario, tmp) for _ in range(args.runs)])
+
+    print_report(results)
+
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump({"timestamp": datetime.now().isoformat(), "config": vars(args), "results": results}, f, indent=2)
+        print(f"\n💾 Results saved to {args.output}")
+
+    exit_code = 0
+    for scenario, summary in results.items():
+        if summary["heavy_modules"]:
+            print(f"❌ {scenario}: LLM stack imported at startup ({', '.join(summary['heavy_modules'])})")
+            exit_code = 1
+        if args.max_import_ms is not None and summary["import_ms"]["median"] > args.max_import_ms:
+            print(f"❌ {scenario}: import {summary['import_ms']['median']:.0f}ms exceeds {args.max_import_ms:.0f}ms")
+            exit_code = 1
+    sys.exit(exit_code)
+
+
+if __name__ == "__main__":
+    main()
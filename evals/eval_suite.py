@@ -5,9 +5,12 @@ Measures tool selection accuracy, entity extraction, HITL behavior, and regressi
 import sys
 import os
 import asyncio
+import hashlib
+import inspect
 import json
 import time
-from typing import Dict, List, Tuple, Optional
+import uuid
+from typing import Any, Awaitable, Callable, Dict, List, Tuple, Optional
 from dataclasses import dataclass, asdict
 from datetime import datetime
 import warnings
@@ -37,11 +40,97 @@ alias("Agents", "backend.Agents")
 
 # Import agent
 try:
-    from backend.Agents.graph import app as agent_graph
-    from backend.Agents.state import MoviState
+    from backend.Agents.graph import app as agent_graph, llm as agent_llm
+    from backend.Agents.state import MoviState, initial_state
 except Exception as e:
     print(f"❌ Cannot import agent: {e}")
     agent_graph = None
+    agent_llm = None
+
+CACHE_PATH = "evals/.eval_cache.json"
+
+
+def agent_fingerprint() -> str:
+    """
+    Hash of everything that shapes the agent's answer besides the model:
+    the intent/response prompt builders, tool names/descriptions and the
+    HITL tool set. Editing any of them invalidates cached results.
+    """
+    try:
+        from backend.Agents import nodes
+        from backend.Agents.tools import ALL_TOOLS
+    except Exception:
+        return "unavailable"
+    parts = [
+        inspect.getsource(nodes._build_intent_messages),
+        inspect.getsource(nodes._build_response_messages),
+        json.dumps(sorted(nodes.HIGH_IMPACT_TOOLS)),
+        *(f"{tool.name}: {tool.description}" for tool in ALL_TOOLS),
+    ]
+    return hashlib.sha256("\n".join(parts).encode("utf-8")).hexdigest()[:16]
+
+
+class EvalCache:
+    """
+    Agent outputs keyed on (case input, prompt hash, model), persisted as JSON.
+
+    Only the agent's output is cached, never the verdict, so changing a
+    case's expectations re-scores it without calling the model again.
+    """
+
+    def __init__(self, path: str = CACHE_PATH, prompt_hash: str = "", model: str = "", enabled: bool = True):
+        self.path = path
+        self.prompt_hash = prompt_hash
+        self.model = model
+        self.enabled = enabled
+        self.hits = 0
+        self._entries: Dict[str, Dict] = self._load() if enabled else {}
+
+    def _load(self) -> Dict[str, Dict]:
+        try:
+            with open(self.path, 'r') as f:
+                return json.load(f)
+        except (FileNotFoundError, json.JSONDecodeError):
+            return {}
+
+    def key(self, user_msg: str, context_page: str) -> str:
+        payload = json.dumps([user_msg, context_page, self.prompt_hash, self.model])
+        return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+    def get(self, key: str) -> Optional[Dict]:
+        if not self.enabled:
+            return None
+        entry = self._entries.get(key)
+        if entry is not None:
+            self.hits += 1
+        return entry
+
+    def put(self, key: str, value: Dict) -> None:
+        if self.enabled:
+            self._entries[key] = value
+
+    def save(self) -> None:
+        if self.enabled:
+            with open(self.path, 'w') as f:
+                json.dump(self._entries, f)
+
+
+def in_shard(test_id: str, shard: Optional[Tuple[int, int]]) -> bool:
+    """Stable assignment of a case to shard (index, count) by hashing its id."""
+    if shard is None:
+        return True
+    index, count = shard
+    return int(hashlib.sha1(test_id.encode("utf-8")).hexdigest(), 16) % count == index
+
+
+def parse_shard(value: Optional[str]) -> Optional[Tuple[int, int]]:
+    """"1/4" -> (1, 4); shards are numbered from 0."""
+    if not value:
+        return None
+    index, count = (int(part) for part in value.split("/"))
+    if not 0 <= index < count:
+        raise ValueError(f"Invalid shard {value}: expected i/N with 0 <= i < N")
+    return index, count
 
 
 @dataclass
@@ -58,6 +147,7 @@ class EvalResult:
     error: Optional[str] = None
     hitl_triggered: bool = False
     expected_hitl: bool = False
+    cached: bool = False
 
 
 @dataclass
@@ -97,15 +187,34 @@ class EvalMetrics:
         return asdict(self)
 
 
+def load_results(paths: List[str]) -> List[EvalResult]:
+    """EvalResults from one or more saved results files (e.g. one per shard)."""
+    results = []
+    for path in paths:
+        with open(path, 'r') as f:
+            results.extend(EvalResult(**r) for r in json.load(f)["results"])
+    return results
+
+
 class MoviEvaluator:
     """Comprehensive evaluator for Movi AI agent"""
 
-    def __init__(self, dataset_path: str = "evals/dataset.json", baseline_path: str = "evals/baseline.json"):
+    def __init__(
+        self,
+        dataset_path: str = "evals/dataset.json",
+        baseline_path: str = "evals/baseline.json",
+        concurrency: int = 4,
+        cache: Optional[EvalCache] = None,
+        shard: Optional[Tuple[int, int]] = None
+    ):
         self.dataset_path = dataset_path
         self.baseline_path = baseline_path
         self.dataset = self._load_dataset()
         self.baseline = self._load_baseline()
         self.results: List[EvalResult] = []
+        self.concurrency = max(1, concurrency)
+        self.cache = cache or EvalCache(enabled=False)
+        self.shard = shard
 
     def _load_dataset(self) -> Dict:
         """Load evaluation dataset"""
@@ -131,7 +240,53 @@ class MoviEvaluator:
             json.dump(metrics.to_dict(), f, indent=2)
         print(f"✅ Baseline saved to {self.baseline_path}")
 
-    async def _run_agent(self, user_msg: str, context_page: str = "buses") -> Tuple[Optional[str], Optional[Dict], bool, float]:
+    async def _run_agent_cached(
+        self,
+        user_msg: str,
+        context_page: str = "buses",
+        case_id: str = "case"
+    ) -> Tuple[Optional[str], Optional[Dict], bool, float, bool]:
+        """
+        _run_agent through the result cache.
+        Returns: (tool_name, entities, hitl_triggered, latency_ms, cached)
+        """
+        key = self.cache.key(user_msg, context_page)
+        entry = self.cache.get(key)
+        if entry is not None:
+            return entry["tool_name"], entry["entities"], entry["hitl_triggered"], entry["latency_ms"], True
+
+        tool_name, entities, hitl_triggered, latency_ms = await self._run_agent(user_msg, context_page, case_id)
+        # Failed runs (no tool) are retried next time rather than cached
+        if tool_name is not None:
+            self.cache.put(key, {
+                "tool_name": tool_name,
+                "entities": entities,
+                "hitl_triggered": hitl_triggered,
+                "latency_ms": latency_ms
+            })
+        return tool_name, entities, hitl_triggered, latency_ms, False
+
+    async def _run_cases(
+        self,
+        test_cases: List[Dict],
+        evaluate_case: Callable[[int, Dict], Awaitable[EvalResult]]
+    ) -> List[EvalResult]:
+        """Evaluate this shard's cases concurrently (bounded by the semaphore), in dataset order."""
+        semaphore = asyncio.Semaphore(self.concurrency)
+        selected = [test for test in test_cases if in_shard(test["id"], self.shard)]
+
+        async def bounded(idx: int, test: Dict) -> EvalResult:
+            async with semaphore:
+                return await evaluate_case(idx, test)
+
+        return list(await asyncio.gather(*(bounded(idx, test) for idx, test in enumerate(selected, 1))))
+
+    async def _run_agent(
+        self,
+        user_msg: str,
+        context_page: str = "buses",
+        case_id: str = "case"
+    ) -> Tuple[Optional[str], Optional[Dict], bool, float]:
         """
         Run agent and extract predicted tool, entities, and HITL status
         Returns: (tool_name, entities, hitl_triggered, latency_ms)
@@ -139,23 +294,12 @@ class MoviEvaluator:
         if agent_graph is None:
             return None, None, False, 0.0
 
-        session_id = f"eval-{int(time.time() * 1000)}"
+        # Unique per case and run, so concurrent cases never share a checkpoint
+        session_id = f"eval-{case_id}-{uuid.uuid4().hex[:8]}"
         config = {"configurable": {"thread_id": session_id}}
 
-        input_data = {
-            "user_msg": user_msg,
-            "current_page": context_page,
-            "messages": [],
-            "image_base64": None,
-            "image_content": None,
-            "intent": None,
-            "tool_name": None,
-            "entities": None,
-            "needs_user_input": False,
-            "consequences": None,
-            "awaiting_confirmation": False,
-            "tool_result": None
-        }
+        # Same initial state as a production turn (AgentRuntime.build_input)
+        input_data = initial_state(user_msg, context_page)
 
         start_time = time.time()
 
@@ -170,7 +314,7 @@ class MoviEvaluator:
             entities = result.get("entities", {})
 
             # Check if HITL was triggered (check graph state)
-            state = agent_graph.get_state(config)
+            state = await agent_graph.aget_state(config)
             hitl_triggered = bool(state.next)  # If next is not empty, we're interrupted
 
             return tool_name, entities, hitl_triggered, latency_ms
@@ -188,7 +332,7 @@ class MoviEvaluator:
             if "get_config outside" in error_str or "runnable context" in error_str:
                 print(f"⚠️  Agent error (HITL attempted): {e}")
                 try:
-                    state = agent_graph.get_state(config)
+                    state = await agent_graph.aget_state(config)
                     tool_name = state.values.get("tool_name")
                     entities = state.values.get("entities", {})
                 except Exception:
@@ -235,12 +379,11 @@ class MoviEvaluator:
 
     async def evaluate_tool_selection(self) -> List[EvalResult]:
         """Evaluate tool selection accuracy"""
-        results = []
         test_cases = self.dataset.get("tool_selection", [])
 
         print(f"\n🔧 Testing Tool Selection ({len(test_cases)} cases)...")
 
-        for idx, test in enumerate(test_cases, 1):
+        async def evaluate_case(idx: int, test: Dict) -> EvalResult:
             test_id = test["id"]
             user_input = test["input"]
             expected_tool = test["expected_tool"]
@@ -250,8 +393,8 @@ class MoviEvaluator:
             category = test.get("category", "unknown")
 
             # Run agent
-            predicted_tool, predicted_entities, hitl_triggered, latency = await self._run_agent(
-                user_input, context_page
+            predicted_tool, predicted_entities, hitl_triggered, latency, cached = await self._run_agent_cached(
+                user_input, context_page, test_id
             )
 
             # Check tool match
@@ -277,33 +420,33 @@ class MoviEvaluator:
                 latency_ms=latency,
                 hitl_triggered=hitl_triggered,
                 expected_hitl=expected_hitl,
+                cached=cached,
                 error=None if passed else f"Tool: {tool_correct}, Entities: {entities_correct}, HITL: {hitl_correct}"
             )
 
-            results.append(result)
-
             # Print progress
             status = "✅" if passed else "❌"
-            print(f"  {status} {idx}/{len(test_cases)}: {test_id} - {user_input[:50]}...")
+            print(f"  {status} {idx}/{len(test_cases)}: {test_id} - {user_input[:50]}...{' (cached)' if cached else ''}")
             if not passed:
                 print(f"     Expected: {expected_tool}, Got: {predicted_tool}")
 
-        return results
+            return result
+
+        return await self._run_cases(test_cases, evaluate_case)
 
     async def evaluate_context_awareness(self) -> List[EvalResult]:
         """Evaluate context-aware tool selection"""
-        results = []
         test_cases = self.dataset.get("context_awareness", [])
 
         print(f"\n🎯 Testing Context Awareness ({len(test_cases)} cases)...")
 
-        for idx, test in enumerate(test_cases, 1):
+        async def evaluate_case(idx: int, test: Dict) -> EvalResult:
             test_id = test["id"]
             user_input = test["input"]
             context_page = test["context_page"]
             expected_tool = test.get("expected_tool")
 
-            predicted_tool, _, _, latency = await self._run_agent(user_input, context_page)
+            predicted_tool, _, _, latency, cached = await self._run_agent_cached(user_input, context_page, test_id)
 
             passed = predicted_tool == expected_tool
 
@@ -313,30 +456,30 @@ class MoviEvaluator:
                 category="context",
                 expected_tool=expected_tool,
                 predicted_tool=predicted_tool,
-                latency_ms=latency
+                latency_ms=latency,
+                cached=cached
             )
 
-            results.append(result)
-
             status = "✅" if passed else "❌"
-            print(f"  {status} {idx}/{len(test_cases)}: {test_id} (page: {context_page})")
+            print(f"  {status} {idx}/{len(test_cases)}: {test_id} (page: {context_page}){' (cached)' if cached else ''}")
 
-        return results
+            return result
+
+        return await self._run_cases(test_cases, evaluate_case)
 
     async def evaluate_hitl(self) -> List[EvalResult]:
         """Evaluate HITL trigger accuracy"""
-        results = []
         test_cases = self.dataset.get("hitl_validation", [])
 
         print(f"\n🛡️  Testing HITL Triggers ({len(test_cases)} cases)...")
 
-        for idx, test in enumerate(test_cases, 1):
+        async def evaluate_case(idx: int, test: Dict) -> EvalResult:
             test_id = test["id"]
             user_input = test["input"]
             context_page = test.get("context_page", "buses")
             expected_hitl = test.get("expected_hitl", False)
 
-            _, _, hitl_triggered, latency = await self._run_agent(user_input, context_page)
+            _, _, hitl_triggered, latency, cached = await self._run_agent_cached(user_input, context_page, test_id)
 
             passed = hitl_triggered == expected_hitl
 
@@ -346,15 +489,16 @@ class MoviEvaluator:
                 category="hitl",
                 hitl_triggered=hitl_triggered,
                 expected_hitl=expected_hitl,
-                latency_ms=latency
+                latency_ms=latency,
+                cached=cached
             )
 
-            results.append(result)
-
             status = "✅" if passed else "❌"
-            print(f"  {status} {idx}/{len(test_cases)}: {test_id} - HITL: {hitl_triggered}")
+            print(f"  {status} {idx}/{len(test_cases)}: {test_id} - HITL: {hitl_triggered}{' (cached)' if cached else ''}")
+
+            return result
 
-        return results
+        return await self._run_cases(test_cases, evaluate_case)
 
     def calculate_metrics(self, results: List[EvalResult]) -> EvalMetrics:
         """Calculate comprehensive metrics from results"""
@@ -387,8 +531,8 @@ class MoviEvaluator:
         hitl_correct = sum(1 for r in hitl_tests if r.hitl_triggered == r.expected_hitl)
         hitl_accuracy = (hitl_correct / len(hitl_tests)) * 100 if hitl_tests else 0.0
 
-        # Latency metrics
-        latencies = [r.latency_ms for r in results if r.latency_ms]
+        # Latency metrics (cached results replay an old latency, so they are left out)
+        latencies = [r.latency_ms for r in results if r.latency_ms and not r.cached]
         avg_latency = sum(latencies) / len(latencies) if latencies else 0.0
         max_latency = max(latencies) if latencies else 0.0
         p95_latency = sorted(latencies)[int(len(latencies) * 0.95)] if latencies else 0.0
@@ -524,13 +668,24 @@ class MoviEvaluator:
         print(f"📅 Timestamp: {datetime.now().isoformat()}")
         print(f"📁 Dataset: {self.dataset_path}")
 
+        if self.shard:
+            print(f"🧩 Shard: {self.shard[0]}/{self.shard[1]}")
+        print(f"⚙️  Concurrency: {self.concurrency}, cache: {'on' if self.cache.enabled else 'off'}")
+
         all_results = []
 
         # Run all evaluation categories
         all_results.extend(await self.evaluate_tool_selection())
         all_results.extend(await self.evaluate_context_awareness())
         all_results.extend(await self.evaluate_hitl())
+        self.cache.save()
+        if self.cache.hits:
+            print(f"\n♻️  {self.cache.hits} cases reused from cache ({self.cache.path})")
+
+        return self.report(all_results, save_baseline=save_baseline)
 
+    def report(self, all_results: List[EvalResult], save_baseline: bool = False) -> int:
+        """Score, compare against the baseline, print and save a set of results"""
         # Calculate metrics
         metrics = self.calculate_metrics(all_results)
 
@@ -540,11 +695,13 @@ class MoviEvaluator:
         # Print report
         exit_code = self.print_report(metrics, regressions)
 
-        # Save results
-        results_file = f"evals/results_{datetime.now().strftime('%Y%m%d_%H%M%S')}.json"
+        # Save results (one file per shard, so parallel shards never overwrite each other)
+        suffix = f"_shard{self.shard[0]}of{self.shard[1]}" if self.shard else ""
+        results_file = f"evals/results_{datetime.now().strftime('%Y%m%d_%H%M%S')}{suffix}.json"
         with open(results_file, 'w') as f:
             json.dump({
                 "timestamp": datetime.now().isoformat(),
+                "shard": list(self.shard) if self.shard else None,
                 "metrics": metrics.to_dict(),
                 "results": [asdict(r) for r in all_results],
                 "regressions": regressions
@@ -566,11 +723,32 @@ async def main():
     parser.add_argument("--dataset", default="evals/dataset.json", help="Path to eval dataset")
     parser.add_argument("--baseline", default="evals/baseline.json", help="Path to baseline metrics")
     parser.add_argument("--save-baseline", action="store_true", help="Save current run as new baseline")
+    parser.add_argument("--concurrency", type=int, default=4, help="Cases evaluated concurrently")
+    parser.add_argument("--cache", default=CACHE_PATH, help="Result cache file")
+    parser.add_argument("--no-cache", action="store_true", help="Re-run every case, ignoring the cache")
+    parser.add_argument("--shard", default=None, help="Run only shard i of N (e.g. 0/4), for splitting across processes")
+    parser.add_argument("--merge", nargs="+", default=None, metavar="RESULTS",
+                        help="Combine shard results files into one report instead of running")
 
     args = parser.parse_args()
 
-    evaluator = MoviEvaluator(dataset_path=args.dataset, baseline_path=args.baseline)
-    exit_code = await evaluator.run_full_evaluation(save_baseline=args.save_baseline)
+    cache = EvalCache(
+        path=args.cache,
+        prompt_hash=agent_fingerprint(),
+        model=getattr(agent_llm, "model_name", None) or "unknown",
+        enabled=not args.no_cache
+    )
+    evaluator = MoviEvaluator(
+        dataset_path=args.dataset,
+        baseline_path=args.baseline,
+        concurrency=args.concurrency,
+        cache=cache,
+        shard=parse_shard(args.shard)
+    )
+    if args.merge:
+        exit_code = evaluator.report(load_results(args.merge), save_baseline=args.save_baseline)
+    else:
+        exit_code = await evaluator.run_full_evaluation(save_baseline=args.save_baseline)
 
     sys.exit(exit_code)
 
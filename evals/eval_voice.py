@@ -5,6 +5,7 @@ import os
 import asyncio
 import warnings
 import base64
+import json
 import importlib
 import traceback
 
@@ -31,6 +32,10 @@ BACKEND_PATH = os.path.join(PROJECT_ROOT, "backend")
 sys.path.insert(0, PROJECT_ROOT)
 sys.path.insert(0, BACKEND_PATH)
 
+# Deterministic STT/TTS so the eval never calls Whisper or TTS
+os.environ.setdefault("MOVI_AUDIO_BACKEND", "fake")
+os.environ.setdefault("MOVI_FAKE_STT_TEXT", "Test voice message")
+
 
 # ---------------- MODULE ALIASES ----------------
 def alias(name, real):
@@ -90,6 +95,12 @@ class DummyWebSocket:
             raise Exception("No more messages")
         return self.messages.pop(0)
 
+    async def receive(self):
+        return {"type": "websocket.receive", "text": json.dumps(await self.receive_json())}
+
+    async def send_bytes(self, data):
+        clean_print(f"📤 Server Audio: {len(data)} bytes")
+
     async def send_json(self, data):
         clean_print(f"📤 Server Response: {data}")
 
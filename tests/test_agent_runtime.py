@@ -0,0 +1,255 @@
+"""
+Unit tests for the shared agent runtime
+Graph invocation, interrupts/resume, session locking and the NDJSON/voice adapters
+"""
+import pytest
+import sys
+import os
+import asyncio
+import json
+from types import SimpleNamespace
+
+# Path setup
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "backend"))
+
+from langgraph.types import Command
+
+from backend.Agents.runtime import AgentRuntime, AgentTurn, NDJSONAdapter, VoiceAdapter, is_approval
+from backend.Agents.session_locks import SessionBusy, SessionLockManager, acquire_lock
+
+
+def token_event(content: str, node: str = "response") -> dict:
+    return {
+        "event": "on_chat_model_stream",
+        "metadata": {"langgraph_node": node},
+        "data": {"chunk": SimpleNamespace(content=content)},
+    }
+
+
+class FakeGraph:
+    """Stands in for the compiled graph: scripted state and streamed events"""
+
+    def __init__(self, states, events=None, delay: float = 0):
+        self.states = list(states)
+        self.events = events or [token_event("Hello"), token_event("ignored", node="intent")]
+        self.delay = delay
+        self.inputs = []
+        self.active = 0
+        self.max_active = 0
+
+    async def aget_state(self, config):
+        return self.states.pop(0) if len(self.states) > 1 else self.states[0]
+
+    async def astream_events(self, graph_input, config=None, version="v2"):
+        self.inputs.append(graph_input)
+        self.active += 1
+        self.max_active = max(self.max_active, self.active)
+        try:
+            for event in self.events:
+                await asyncio.sleep(self.delay)
+                yield event
+        finally:
+            self.active -= 1
+
+
+def state(messages=None, interrupt=None, next_nodes=()):
+    tasks = [SimpleNamespace(interrupts=[SimpleNamespace(value=interrupt)] if interrupt else [])]
+    return SimpleNamespace(values={"messages": messages or []}, next=next_nodes, tasks=tasks)
+
+
+async def collect(generator):
+    return [item async for item in generator]
+
+
+class TestAgentRuntime:
+    """Tests for turn execution"""
+
+    @pytest.mark.asyncio
+    async def test_new_turn_streams_response_tokens_and_trims_history(self):
+        graph = FakeGraph([state(messages=list(range(14)))])
+        runtime = AgentRuntime(graph, locks=SessionLockManager())
+
+        events = await collect(runtime.stream(AgentTurn(session_id="s1", message="show trips")))
+
+        assert events == [{"type": "token", "content": "Hello"}]
+        assert graph.inputs[0]["user_msg"] == "show trips"
+        assert graph.inputs[0]["messages"] == list(range(4, 14))
+
+    @pytest.mark.asyncio
+    async def test_new_turn_resets_every_state_key(self):
+        """The runtime and the evals share initial_state, which covers all of MoviState"""
+        from backend.Agents.state import MoviState
+
+        graph = FakeGraph([state()])
+        runtime = AgentRuntime(graph, locks=SessionLockManager())
+
+        await collect(runtime.stream(AgentTurn(session_id="s1", message="show trips")))
+
+        assert set(graph.inputs[0]) == set(MoviState.__annotations__)
+        assert graph.inputs[0]["tool_calls"] is None and graph.inputs[0]["tool_results"] is None
+
+    @pytest.mark.asyncio
+    async def test_pending_interrupt_is_resumed_and_reported(self):
+        consequence = {"tool_name": "delete_trip", "has_consequences": True}
+        graph = FakeGraph([state(interrupt=consequence, next_nodes=("consequence",)),
+                           state(interrupt=consequence, next_nodes=("consequence",))])
+        runtime = AgentRuntime(graph, locks=SessionLockManager())
+
+        events = await collect(runtime.stream(AgentTurn(session_id="s1", message="Yes.")))
+
+        assert isinstance(graph.inputs[0], Command)
+        assert graph.inputs[0].resume is True
+        assert events[-1] == {"type": "confirmation", "consequence_data": consequence}
+
+    @pytest.mark.asyncio
+    async def test_abandoned_run_without_interrupt_starts_fresh(self):
+        graph = FakeGraph([state(next_nodes=("tool_call",))])
+        runtime = AgentRuntime(graph, locks=SessionLockManager())
+
+        await collect(runtime.stream(AgentTurn(session_id="s1", message="yes")))
+
+        assert isinstance(graph.inputs[0], dict)
+
+    @pytest.mark.asyncio
+    async def test_turns_on_same_session_are_serialized(self):
+        graph = FakeGraph([state()], delay=0.01)
+        runtime = AgentRuntime(graph, locks=SessionLockManager())
+
+        await asyncio.gather(
+            collect(runtime.stream(AgentTurn(session_id="same", message="a"))),
+            collect(runtime.stream(AgentTurn(session_id="same", message="b"))),
+        )
+        assert graph.max_active == 1
+
+        await asyncio.gather(
+            collect(runtime.stream(AgentTurn(session_id="one", message="a"))),
+            collect(runtime.stream(AgentTurn(session_id="two", message="b"))),
+        )
+        assert graph.max_active == 2
+
+    @pytest.mark.asyncio
+    async def test_supersede_cancels_in_flight_turn(self):
+        graph = FakeGraph([state()], events=[token_event("one"), token_event("two")], delay=0.05)
+        runtime = AgentRuntime(graph, locks=SessionLockManager(policy="wait"))
+
+        first = asyncio.ensure_future(collect(runtime.stream(AgentTurn(session_id="s", message="a"))))
+        await asyncio.sleep(0.07)
+        second = await collect(runtime.stream(AgentTurn(session_id="s", message="b", on_busy="supersede")))
+
+        assert await first == [{"type": "token", "content": "one"}, {"type": "superseded"}]
+        assert second == [{"type": "token", "content": "one"}, {"type": "token", "content": "two"}]
+        assert graph.max_active == 1
+
+    @pytest.mark.asyncio
+    async def test_supersede_waits_for_running_tool(self):
+        import threading
+        from langchain_core.tools import tool
+        from backend.Agents.nodes import _aexecute_tool
+
+        release = threading.Event()
+        log = []
+
+        @tool
+        def slow_write() -> str:
+            """Blocks in its executor thread until released"""
+            release.wait(5)
+            log.append("write done")
+            return "done"
+
+        class ToolGraph(FakeGraph):
+            async def astream_events(self, graph_input, config=None, version="v2"):
+                self.inputs.append(list(log))
+                yield token_event(str(await _aexecute_tool("slow_write", {}, [slow_write])))
+
+        graph = ToolGraph([state()])
+        runtime = AgentRuntime(graph, locks=SessionLockManager(policy="wait"))
+
+        first = asyncio.ensure_future(collect(runtime.stream(AgentTurn(session_id="s", message="a"))))
+        await asyncio.sleep(0.05)
+        second = asyncio.ensure_future(collect(runtime.stream(AgentTurn(session_id="s", message="b", on_busy="supersede"))))
+        await asyncio.sleep(0.05)
+
+        # The first turn is cancelled, but its tool still runs: the second turn waits
+        assert len(graph.inputs) == 1
+        assert not second.done()
+        release.set()
+
+        assert await first == [{"type": "superseded"}]
+        assert await second == [{"type": "token", "content": "done"}]
+        assert graph.inputs == [[], ["write done"]]
+
+    @pytest.mark.asyncio
+    async def test_late_acquire_does_not_leak_lock(self):
+        lock = asyncio.Lock()
+        await lock.acquire()
+
+        assert not await acquire_lock(lock, 0.01)
+
+        waiter = asyncio.ensure_future(acquire_lock(lock, 1))
+        await asyncio.sleep(0.01)
+        # The lock is handed to the waiter just as the waiter is cancelled
+        lock.release()
+        waiter.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await waiter
+        await asyncio.sleep(0.01)
+
+        assert not lock.locked()
+
+    @pytest.mark.asyncio
+    async def test_wait_times_out_with_session_busy(self):
+        locks = SessionLockManager(policy="wait", timeout=0.05)
+
+        async with locks.hold("s"):
+            with pytest.raises(SessionBusy):
+                async with locks.hold("s"):
+                    pass
+
+        assert not locks.is_busy("s")
+
+    @pytest.mark.asyncio
+    async def test_busy_session_reported_as_ndjson(self):
+        # The runtime catches the SessionBusy of the module it imported
+        from backend.Agents import runtime as runtime_module
+        locks = runtime_module.SessionLockManager(timeout=0.01)
+        runtime = AgentRuntime(FakeGraph([state()]), locks=locks)
+
+        async with locks.hold("s"):
+            lines = await collect(NDJSONAdapter().stream(runtime.stream(AgentTurn(session_id="s", message="a"))))
+
+        assert json.loads(lines[0])["type"] == "busy"
+
+    def test_approval_words(self):
+        assert is_approval(" Okay! ")
+        assert is_approval("yep")
+        assert not is_approval("no")
+
+
+class TestAdapters:
+    """Tests for channel output adapters"""
+
+    @pytest.mark.asyncio
+    async def test_ndjson_adapter(self):
+        async def events():
+            yield {"type": "token", "content": "Hi"}
+            yield {"type": "confirmation", "consequence_data": {"tool_name": "delete_trip"}}
+            raise RuntimeError("boom")
+
+        lines = [json.loads(line) for line in await collect(NDJSONAdapter().stream(events()))]
+
+        assert lines[0] == {"type": "token", "content": "Hi"}
+        assert lines[1]["type"] == "confirmation"
+        assert lines[1]["payload"]["message"].endswith("Do you want to proceed? (yes/no)")
+        assert lines[2] == {"type": "error", "content": "boom"}
+
+    @pytest.mark.asyncio
+    async def test_voice_adapter(self):
+        async def events():
+            yield {"type": "confirmation", "consequence_data": {"tool_name": "delete_trip"}}
+
+        voice_events = await collect(VoiceAdapter().stream(events()))
+
+        assert voice_events[0]["type"] == "confirmation"
+        assert voice_events[0]["consequence_info"] == {"tool_name": "delete_trip"}
+        assert "delete_trip" in voice_events[0]["text"]
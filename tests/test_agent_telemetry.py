@@ -0,0 +1,143 @@
+"""
+Unit tests for local agent telemetry
+Node timing, interrupts, LLM latency/token accounting, tool latency, cache hits and the JSONL trace
+"""
+import pytest
+import sys
+import os
+import json
+import inspect
+from typing import TypedDict
+
+# Path setup
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "backend"))
+
+from langchain_core.language_models.fake_chat_models import GenericFakeChatModel
+from langchain_core.messages import AIMessage
+from langchain_core.runnables import RunnableConfig
+from langgraph.checkpoint.memory import MemorySaver
+from langgraph.graph import StateGraph
+from langgraph.types import interrupt
+from prometheus_client import REGISTRY
+
+from backend.Agents import telemetry
+from backend.utils.tts_cache import TTSCache
+
+
+def sample(name: str, **labels) -> float:
+    return REGISTRY.get_sample_value(name, labels) or 0.0
+
+
+@pytest.fixture
+def trace_file(tmp_path):
+    path = tmp_path / "trace.jsonl"
+    telemetry.set_trace_sink(telemetry.TraceSink(str(path)))
+    yield path
+    telemetry.set_trace_sink(None)
+
+
+def read_trace(path):
+    return [json.loads(line) for line in path.read_text().splitlines()]
+
+
+class State(TypedDict, total=False):
+    value: int
+
+
+class TestTimedNode:
+    """Tests for per-node timing and interrupt counting"""
+
+    def test_sync_node_is_timed(self, trace_file):
+        before = sample("movi_agent_node_duration_seconds_count", node="t_sync", status="ok")
+
+        node = telemetry.timed_node("t_sync", lambda s: {"value": 1})
+
+        assert node({}) == {"value": 1}
+        assert sample("movi_agent_node_duration_seconds_count", node="t_sync", status="ok") == before + 1
+        assert read_trace(trace_file)[0]["kind"] == "node"
+
+    @pytest.mark.asyncio
+    async def test_async_node_keeps_config_signature(self):
+        async def node(state: State, config: RunnableConfig) -> State:
+            raise ValueError("boom")
+
+        wrapped = telemetry.timed_node("t_async", node)
+
+        assert "config" in inspect.signature(wrapped).parameters
+        with pytest.raises(ValueError):
+            await wrapped({}, {})
+        assert sample("movi_agent_node_duration_seconds_count", node="t_async", status="error") == 1
+
+    def test_interrupt_counted_with_thread_id(self, trace_file):
+        def confirm(state: State) -> State:
+            interrupt({"tool_name": "t_delete_trip"})
+            return {"value": 2}
+
+        graph = StateGraph(State)
+        graph.add_node("confirm", telemetry.timed_node("confirm", confirm))
+        graph.set_entry_point("confirm")
+        graph.set_finish_point("confirm")
+        app = graph.compile(checkpointer=MemorySaver())
+        before = sample("movi_agent_interrupts_total", tool="t_delete_trip")
+
+        app.invoke({"value": 1}, {"configurable": {"thread_id": "trace-thread"}})
+
+        assert sample("movi_agent_interrupts_total", tool="t_delete_trip") == before + 1
+        records = read_trace(trace_file)
+        assert {r["kind"] for r in records} == {"interrupt", "node"}
+        assert all(r["thread_id"] == "trace-thread" for r in records)
+
+
+class TestLLMTelemetry:
+    """Tests for the LLM callback handler"""
+
+    def test_tokens_and_latency_recorded(self, trace_file):
+        model = GenericFakeChatModel(
+            messages=iter([AIMessage(content="hi there", usage_metadata={
+                "input_tokens": 12, "output_tokens": 3, "total_tokens": 15
+            })]),
+            callbacks=[telemetry.LLMTelemetryHandler()],
+        )
+        before = sample("movi_llm_tokens_total", model="unknown", node="none", kind="prompt")
+
+        model.invoke("hello")
+
+        assert sample("movi_llm_tokens_total", model="unknown", node="none", kind="prompt") == before + 12
+        record = read_trace(trace_file)[0]
+        assert record["kind"] == "llm"
+        assert record["completion_tokens"] == 3
+
+    def test_streamed_call_records_first_token(self):
+        model = GenericFakeChatModel(
+            messages=iter([AIMessage(content="one two three")]),
+            callbacks=[telemetry.LLMTelemetryHandler()],
+        )
+        before = sample("movi_llm_time_to_first_token_seconds_count", model="unknown", node="none")
+
+        chunks = list(model.stream("hello"))
+
+        assert len(chunks) > 1
+        assert sample("movi_llm_time_to_first_token_seconds_count", model="unknown", node="none") == before + 1
+
+
+class TestToolAndCacheMetrics:
+    """Tests for tool latency and cache hit counters"""
+
+    def test_record_tool(self, trace_file):
+        telemetry.record_tool("t_get_trips", 0.02)
+
+        assert sample("movi_agent_tool_duration_seconds_count", tool="t_get_trips", status="ok") == 1
+        assert read_trace(trace_file)[0]["duration_ms"] == 20.0
+
+    def test_tts_cache_hits_and_misses(self):
+        cache = TTSCache(disk_dir="")
+        hits = sample("movi_cache_requests_total", cache="tts", result="hit")
+        misses = sample("movi_cache_requests_total", cache="tts", result="miss")
+
+        cache.get("Hello", "alloy")
+        cache.put("Hello", "alloy", b"mp3")
+        cache.get("Hello", "alloy")
+
+        assert sample("movi_cache_requests_total", cache="tts", result="hit") == hits + 1
+        assert sample("movi_cache_requests_total", cache="tts", result="miss") == misses + 1
@@ -0,0 +1,184 @@
+"""
+Unit tests for read/write session routing
+Replica reads, primary writes and read-your-writes stickiness for HTTP requests and Movi tool calls
+"""
+import pytest
+import sys
+import os
+import itertools
+import time
+
+# Path setup
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "backend"))
+
+from fastapi import Depends, FastAPI, HTTPException
+from fastapi.testclient import TestClient
+from langchain_core.tools import tool
+from sqlalchemy import create_engine
+from sqlalchemy.engine import Engine
+from sqlalchemy.orm import Session
+
+import database
+from backend.Agents import nodes
+from backend.models import Base, Stop
+from utils.db_routing import ReplicaRoutingMiddleware, StickySessions, routed, session_scope
+
+
+def make_engine(path) -> Engine:
+    engine = create_engine(f"sqlite:///{path}", connect_args={"check_same_thread": False})
+    Base.metadata.create_all(engine)
+    return engine
+
+
+@pytest.fixture
+def dbs(tmp_path, monkeypatch):
+    """Primary and one replica that has not caught up (no rows)"""
+    primary = make_engine(tmp_path / "primary.db")
+    replica = make_engine(tmp_path / "replica.db")
+    with Session(primary) as db:
+        db.add(Stop(name="Gavipuram", latitude=12.9, longitude=77.5))
+        db.commit()
+
+    monkeypatch.setattr(database, "replica_engines", [replica])
+    monkeypatch.setattr(database, "_replica_cycle", itertools.cycle([replica]))
+    database.SessionLocal.configure(bind=primary)
+    yield primary, replica
+    database.SessionLocal.configure(bind=database.engine)
+
+
+def stop_count() -> int:
+    db = database.SessionLocal()
+    try:
+        return db.query(Stop).count()
+    finally:
+        db.close()
+
+
+def make_client(sticky: StickySessions) -> TestClient:
+    app = FastAPI()
+
+    @app.get("/stops/count")
+    def count(db: Session = Depends(database.get_db)):
+        return {"count": db.query(Stop).count()}
+
+    @app.post("/stops")
+    def create(db: Session = Depends(database.get_db)):
+        db.add(Stop(name=f"Stop {time.perf_counter_ns()}", latitude=1.0, longitude=2.0))
+        db.commit()
+        return {"ok": True}
+
+    @app.delete("/stops/missing")
+    def missing():
+        raise HTTPException(status_code=404, detail="Not found")
+
+    app.add_middleware(ReplicaRoutingMiddleware, sticky=sticky)
+    return TestClient(app)
+
+
+class TestRoutingSession:
+    """Tests for choosing the engine inside a session"""
+
+    def test_primary_by_default(self, dbs):
+        assert stop_count() == 1
+
+    def test_reads_replica_and_writes_primary(self, dbs):
+        primary, _ = dbs
+        token = database.use_replica.set(True)
+        try:
+            db = database.SessionLocal()
+            assert db.query(Stop).count() == 0
+            db.add(Stop(name="Temple", latitude=1.0, longitude=2.0))
+            db.commit()
+            db.close()
+        finally:
+            database.use_replica.reset(token)
+
+        with Session(primary) as db:
+            assert db.query(Stop).count() == 2
+
+
+class TestReplicaRoutingMiddleware:
+    """Tests for HTTP routing and read-your-writes"""
+
+    def test_get_reads_from_replica(self, dbs):
+        client = make_client(StickySessions(seconds=60))
+
+        assert client.get("/stops/count").json() == {"count": 0}
+
+    def test_reads_own_writes_per_session(self, dbs):
+        client = make_client(StickySessions(seconds=60))
+
+        client.post("/stops", headers={"X-Movi-Session": "a"})
+
+        assert client.get("/stops/count", headers={"X-Movi-Session": "a"}).json() == {"count": 2}
+        assert client.get("/stops/count", headers={"X-Movi-Session": "b"}).json() == {"count": 0}
+
+    def test_write_without_header_issues_session_cookie(self, dbs):
+        client = make_client(StickySessions(seconds=60))
+
+        response = client.post("/stops")
+
+        assert "movi_session" in response.cookies
+        assert client.get("/stops/count").json() == {"count": 2}
+
+    def test_shared_address_is_not_sticky(self, dbs):
+        """Callers behind one proxy/NAT do not inherit each other's stickiness"""
+        sticky = StickySessions(seconds=60)
+        writer, other = make_client(sticky), make_client(sticky)
+
+        writer.post("/stops")
+
+        assert other.get("/stops/count").json() == {"count": 0}
+
+    def test_stickiness_expires(self, dbs):
+        client = make_client(StickySessions(seconds=0.05))
+
+        client.post("/stops")
+        time.sleep(0.1)
+
+        assert client.get("/stops/count").json() == {"count": 0}
+
+    def test_failed_write_is_not_sticky(self, dbs):
+        client = make_client(StickySessions(seconds=60))
+
+        assert client.delete("/stops/missing").status_code == 404
+        assert client.get("/stops/count").json() == {"count": 0}
+
+    def test_primary_without_replicas(self, dbs, monkeypatch):
+        monkeypatch.setattr(database, "replica_engines", [])
+        client = make_client(StickySessions(seconds=60))
+
+        assert client.get("/stops/count").json() == {"count": 1}
+
+
+class TestToolRouting:
+    """Tests for Movi tool calls"""
+
+    def test_routed_write_makes_agent_session_sticky(self, dbs):
+        sticky = StickySessions(seconds=60)
+
+        with session_scope("movi:s1"):
+            with routed(True, sticky):
+                assert stop_count() == 0
+            with routed(False, sticky):
+                assert stop_count() == 1
+            with routed(True, sticky):
+                assert stop_count() == 1
+        with session_scope("movi:s2"), routed(True, sticky):
+            assert stop_count() == 0
+
+    def test_read_only_tool_uses_replica(self, dbs):
+        @tool
+        def list_all_stops() -> str:
+            """Count stops"""
+            return str(stop_count())
+
+        @tool
+        def create_new_stop() -> str:
+            """Count stops from a write tool"""
+            return str(stop_count())
+
+        tools = [list_all_stops, create_new_stop]
+        assert nodes._execute_tool("list_all_stops", {}, tools) == "0"
+        assert nodes._execute_tool("create_new_stop", {}, tools) == "1"
@@ -0,0 +1,110 @@
+"""
+Unit tests for the offline fake LLM
+Scripted/recorded/heuristic replies, streaming, latency and per-turn model accounting
+"""
+import pytest
+import sys
+import os
+import json
+import time
+
+# Path setup
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "backend"))
+
+from langchain_core.messages import HumanMessage, SystemMessage
+
+from backend.Agents.fake_llm import FakeChatModel, ResponseRecorder, heuristic_intent, load_recordings, prompt_hash
+from backend.Agents.telemetry import TurnAccounting
+
+INTENT_PROMPT = [
+    SystemMessage(content="You are Movi's intent classifier.\n\nAvailable Tools:\n"
+                          "- list_all_vehicles: List vehicles\n- delete_trip: Delete a trip\n"),
+    HumanMessage(content="Please delete the trip Bulk - 00:01"),
+]
+
+
+class TestFakeChatModel:
+    """Tests for reply resolution"""
+
+    def test_heuristic_intent_picks_matching_tool(self):
+        parsed = json.loads(heuristic_intent(INTENT_PROMPT))
+
+        assert parsed["tool_name"] == "delete_trip"
+        assert parsed["entities"] == {}
+
+    def test_script_per_node_is_replayed_in_order(self):
+        model = FakeChatModel(script={"response": ["first", "second"]})
+        prompt = [HumanMessage(content="hi")]
+
+        replies = [model.invoke(prompt).content for _ in range(3)]
+
+        assert replies == ["first", "second", "second"]
+
+    def test_recordings_take_precedence(self):
+        model = FakeChatModel(recordings={prompt_hash(INTENT_PROMPT): "recorded"}, script={"intent": ["scripted"]})
+
+        assert model.invoke(INTENT_PROMPT).content == "recorded"
+        assert model.calls == 1
+
+    def test_latency_and_usage(self):
+        model = FakeChatModel(latency_ms=30)
+
+        started = time.perf_counter()
+        reply = model.invoke([HumanMessage(content="show all trips")])
+
+        assert time.perf_counter() - started >= 0.03
+        assert reply.usage_metadata["input_tokens"] == 3
+
+    @pytest.mark.asyncio
+    async def test_streaming_chunks_carry_usage(self):
+        model = FakeChatModel(script={"response": ["one two three"]})
+
+        chunks = [chunk async for chunk in model.astream([HumanMessage(content="hi")])]
+
+        merged = chunks[0]
+        for chunk in chunks[1:]:
+            merged += chunk
+        assert len(chunks) >= 3
+        assert merged.content == "one two three"
+        assert merged.usage_metadata["output_tokens"] == 3
+
+
+class TestRecordingAndAccounting:
+    """Tests for the recorder and per-turn accounting"""
+
+    def test_recorder_round_trip(self, tmp_path):
+        path = str(tmp_path / "recordings.jsonl")
+        live = FakeChatModel(script={"intent": ["live reply"]}, callbacks=[ResponseRecorder(path)])
+        live.invoke(INTENT_PROMPT)
+
+        replay = FakeChatModel(recordings=load_recordings(path))
+
+        assert replay.invoke(INTENT_PROMPT).content == "live reply"
+
+    @pytest.mark.asyncio
+    async def test_turn_accounting_measures_model_time(self):
+        model = FakeChatModel(latency_ms=20)
+        accounting = TurnAccounting()
+
+        await model.ainvoke([HumanMessage(content="a b")], {"callbacks": [accounting]})
+        await model.ainvoke([HumanMessage(content="c")], {"callbacks": [accounting]})
+
+        assert accounting.model_calls == 2
+        assert accounting.model_seconds >= 0.04
+        assert accounting.prompt_tokens == 3
+
+    def test_turn_accounting_counts_failed_tools(self):
+        from langchain_core.tools import tool
+
+        @tool
+        def broken(value: str) -> str:
+            """Always fails"""
+            raise ValueError(value)
+
+        accounting = TurnAccounting()
+        with pytest.raises(ValueError):
+            broken.invoke({"value": "x"}, {"callbacks": [accounting]})
+
+        assert accounting.tool_calls == 1
+        assert accounting.tool_seconds > 0
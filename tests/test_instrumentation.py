@@ -0,0 +1,99 @@
+"""
+Unit tests for request instrumentation
+Server-Timing headers, per-request DB accounting and the Prometheus endpoint
+"""
+import pytest
+import sys
+import os
+
+# Path setup
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "backend"))
+
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+from sqlalchemy import create_engine, text
+from sqlalchemy.pool import StaticPool
+
+# Imported the way main.py does, so metrics are registered once
+from utils import instrumentation
+from routes.metrics import router as metrics_router
+
+
+@pytest.fixture
+def instrumented_client():
+    """App with two DB-backed routes on an in-memory engine"""
+    engine = create_engine("sqlite://", connect_args={"check_same_thread": False}, poolclass=StaticPool)
+    instrumentation.instrument_engine(engine)
+    instrumentation.instrument_engine(engine)  # idempotent
+
+    app = FastAPI()
+    app.add_middleware(instrumentation.InstrumentationMiddleware)
+    app.include_router(metrics_router)
+
+    @app.get("/items/{item_id}")
+    def get_item(item_id: int):
+        with engine.connect() as conn:
+            conn.execute(text("SELECT 1"))
+            conn.execute(text("SELECT :id"), {"id": item_id})
+        return {"id": item_id}
+
+    @app.get("/no-db")
+    async def no_db():
+        return {"ok": True}
+
+    return TestClient(app)
+
+
+class TestInstrumentationMiddleware:
+    """Tests for the ASGI middleware"""
+
+    def test_server_timing_counts_queries(self, instrumented_client):
+        response = instrumented_client.get("/items/7")
+
+        timing = response.headers["server-timing"]
+        assert timing.startswith("app;dur=")
+        assert 'desc="2 queries"' in timing
+
+    def test_request_without_db(self, instrumented_client):
+        response = instrumented_client.get("/no-db")
+
+        assert 'desc="0 queries"' in response.headers["server-timing"]
+
+    def test_metrics_use_route_templates(self, instrumented_client):
+        instrumented_client.get("/items/1")
+        instrumented_client.get("/items/2")
+        instrumented_client.get("/missing")
+
+        body = instrumented_client.get("/metrics").text
+
+        assert 'movi_http_request_duration_seconds_count{method="GET",route="/items/{item_id}",status="200"}' in body
+        assert 'route="/items/1"' not in body
+        assert 'route="unmatched",status="404"' in body
+        assert 'movi_db_queries_per_request_sum{route="/items/{item_id}"}' in body
+        assert 'movi_db_queries_total{operation="SELECT"}' in body
+
+    def test_operation_label(self):
+        assert instrumentation._operation("  select * from trips") == "SELECT"
+        assert instrumentation._operation("") == "OTHER"
+
+    def test_metric_is_created_once(self):
+        from prometheus_client import Counter
+
+        first = instrumentation.metric(Counter, "movi_test_dedup_total", "Test counter")
+        again = instrumentation.metric(Counter, "movi_test_dedup_total", "Test counter")
+
+        assert again is first
+
+    def test_failed_statement_leaves_no_timing_state(self):
+        engine = create_engine("sqlite://", connect_args={"check_same_thread": False}, poolclass=StaticPool)
+        instrumentation.instrument_engine(engine)
+
+        with instrumentation.collect_db_stats() as stats:
+            with engine.connect() as conn:
+                with pytest.raises(Exception):
+                    conn.execute(text("SELECT * FROM missing_table"))
+                conn.execute(text("SELECT 1"))
+                assert not any(key.startswith("movi_") for key in conn.info)
+
+        assert stats.queries == 1
@@ -13,6 +13,7 @@ sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "backend"))
 
 from backend.Agents.state import MoviState
 from backend.Agents.nodes import intent_node, consequence_node, tool_call_node, response_node
+from backend.Agents.nodes import aintent_node, atool_call_node, aresponse_node
 from backend.Agents.tools import ALL_TOOLS
 
 
@@ -163,6 +164,217 @@ class TestAgentNodes:
         assert len(result["messages"]) > 0
 
 
+class TestAsyncAgentNodes:
+    """Test async node variants used by astream_events"""
+
+    @pytest.fixture
+    def async_llm(self):
+        llm = MagicMock()
+        llm.ainvoke = AsyncMock(return_value=MagicMock(
+            content='{"intent": "query", "tool_name": "get_all_trips", "entities": {}}'
+        ))
+        return llm
+
+    @pytest.fixture
+    def sample_state(self) -> MoviState:
+        return {
+            "user_msg": "Show me all trips",
+            "current_page": "buses",
+            "messages": [],
+            "image_base64": None,
+            "image_content": None,
+            "intent": None,
+            "tool_name": None,
+            "entities": None,
+            "needs_user_input": False,
+            "consequences": None,
+            "awaiting_confirmation": False,
+            "tool_result": None
+        }
+
+    @pytest.mark.asyncio
+    async def test_aintent_node_uses_ainvoke(self, sample_state, async_llm):
+        """Async intent node awaits ainvoke and never calls blocking invoke"""
+        result = await aintent_node(sample_state, async_llm, ALL_TOOLS)
+
+        assert result["tool_name"] == "get_all_trips"
+        async_llm.ainvoke.assert_awaited_once()
+        async_llm.invoke.assert_not_called()
+
+    @pytest.mark.asyncio
+    async def test_atool_call_node_unknown_tool(self, sample_state):
+        """Async tool node reports unknown tools without raising"""
+        sample_state["tool_name"] = "does_not_exist"
+        sample_state["entities"] = {}
+
+        result = await atool_call_node(sample_state, ALL_TOOLS)
+
+        assert "not found" in result["tool_result"]
+
+    @pytest.mark.asyncio
+    async def test_atool_call_node_executes_tool(self, sample_state):
+        """Async tool node awaits the tool with normalized entities"""
+        tool = MagicMock()
+        tool.name = "get_trip_status"
+        tool.ainvoke = AsyncMock(return_value="Trip OK")
+        sample_state["tool_name"] = "get_trip_status"
+        sample_state["entities"] = {"trip_name": "Morning Shift"}
+
+        result = await atool_call_node(sample_state, [tool])
+
+        assert result["tool_result"] == "Trip OK"
+        assert tool.ainvoke.await_args.args[0] == {"trip_display_name": "Morning Shift"}
+
+    @pytest.mark.asyncio
+    async def test_aresponse_node_appends_message(self, sample_state):
+        """Async response node appends the assistant reply"""
+        llm = MagicMock()
+        llm.ainvoke = AsyncMock(return_value=MagicMock(content="Here are your trips"))
+
+        result = await aresponse_node(sample_state, llm)
+
+        assert result["messages"][-1].content == "Here are your trips"
+
+
+class TestMultiToolPlans:
+    """Tests for multi-step tool plans"""
+
+    @staticmethod
+    def _mock_tool(name, result, calls):
+        tool = MagicMock()
+        tool.name = name
+
+        def _invoke(args):
+            calls.append(name)
+            return result
+
+        tool.invoke.side_effect = _invoke
+        return tool
+
+    def test_intent_node_parses_tool_calls(self):
+        """Intent node exposes the full plan and mirrors the first step"""
+        llm = MagicMock()
+        llm.invoke.return_value = MagicMock(content=(
+            '{"intent": "multi", "tool_calls": ['
+            '{"tool_name": "delete_trip", "entities": {"trip_name": "A"}}, '
+            '{"tool_name": "get_unassigned_vehicles", "entities": {}}]}'
+        ))
+        state = {"user_msg": "Delete A and list free buses", "current_page": "busDashboard", "messages": []}
+
+        result = intent_node(state, llm, ALL_TOOLS)
+
+        assert [c["tool_name"] for c in result["tool_calls"]] == ["delete_trip", "get_unassigned_vehicles"]
+        assert result["tool_name"] == "delete_trip"
+        assert result["entities"] == {"trip_name": "A"}
+
+    def test_plan_batches_keep_writes_ordered(self):
+        """Consecutive reads are batched; writes are barriers"""
+        from backend.Agents.nodes import _plan_batches
+
+        steps = [
+            {"tool_name": "get_all_trips"},
+            {"tool_name": "list_all_drivers"},
+            {"tool_name": "delete_trip"},
+            {"tool_name": "get_unassigned_vehicles"},
+            {"tool_name": "delete_deployment", "cancelled": True},
+        ]
+
+        batches = _plan_batches(steps)
+
+        assert [[s["tool_name"] for s in b] for b in batches] == [
+            ["get_all_trips", "list_all_drivers"],
+            ["delete_trip"],
+            ["get_unassigned_vehicles"],
+        ]
+
+    def test_tool_call_node_runs_plan_in_order(self):
+        """Multi-step plans report results in plan order, including cancelled steps"""
+        calls = []
+        tools = [
+            self._mock_tool("delete_trip", "deleted", calls),
+            self._mock_tool("get_unassigned_vehicles", "V1", calls),
+            self._mock_tool("list_all_drivers", "D1", calls),
+        ]
+        state = {
+            "tool_calls": [
+                {"tool_name": "delete_trip", "entities": {"trip_name": "A"}},
+                {"tool_name": "delete_trip", "entities": {"trip_name": "B"}, "cancelled": True},
+                {"tool_name": "get_unassigned_vehicles", "entities": {}},
+                {"tool_name": "list_all_drivers", "entities": {}},
+            ]
+        }
+
+        result = tool_call_node(state, tools)
+
+        assert calls[0] == "delete_trip"
+        assert sorted(calls[1:]) == ["get_unassigned_vehicles", "list_all_drivers"]
+        assert [r["result"] for r in result["tool_results"]] == [
+            "deleted", "Action cancelled by user.", "V1", "D1"
+        ]
+        assert "[4] list_all_drivers" in result["tool_result"]
+
+    @pytest.mark.asyncio
+    async def test_atool_call_node_runs_plan(self):
+        """Async executor awaits every non-cancelled step"""
+        tools = []
+        for name, output in [("get_all_trips", "T1"), ("list_all_drivers", "D1")]:
+            tool = MagicMock()
+            tool.name = name
+            tool.ainvoke = AsyncMock(return_value=output)
+            tools.append(tool)
+        state = {
+            "tool_calls": [
+                {"tool_name": "get_all_trips", "entities": {}},
+                {"tool_name": "list_all_drivers", "entities": {}},
+            ]
+        }
+
+        result = await atool_call_node(state, tools)
+
+        assert [r["result"] for r in result["tool_results"]] == ["T1", "D1"]
+
+    @staticmethod
+    def _reject_all(monkeypatch):
+        """Plan whose every step the user rejects at the confirmation prompt"""
+        from backend.Agents import nodes
+
+        monkeypatch.setattr(nodes, "interrupt", lambda payload: False)
+        monkeypatch.setattr(nodes, "_fetch_consequences", lambda tool_name, entities: None)
+        state = {
+            "tool_calls": [
+                {"tool_name": "delete_trip", "entities": {"trip_name": "A"}},
+                {"tool_name": "delete_trip", "entities": {"trip_name": "B"}},
+            ],
+            "tool_name": "delete_trip",
+            "entities": {"trip_name": "A"},
+            "tool_result": None,
+        }
+        return consequence_node(state)
+
+    def test_tool_call_node_keeps_cancellation_when_all_rejected(self, monkeypatch):
+        """Rejecting every step reaches the response node as a cancellation"""
+        calls = []
+        state = self._reject_all(monkeypatch)
+
+        result = tool_call_node(state, [self._mock_tool("delete_trip", "deleted", calls)])
+
+        assert calls == []
+        assert result["tool_result"] == "Action cancelled by user."
+
+    @pytest.mark.asyncio
+    async def test_atool_call_node_keeps_cancellation_when_all_rejected(self, monkeypatch):
+        """Async executor also leaves the cancellation in place"""
+        tool = MagicMock()
+        tool.name = "delete_trip"
+        tool.ainvoke = AsyncMock(return_value="deleted")
+        state = self._reject_all(monkeypatch)
+
+        result = await atool_call_node(state, [tool])
+
+        tool.ainvoke.assert_not_called()
+        assert result["tool_result"] == "Action cancelled by user."
+
+
 class TestAgentIntegration:
     """Integration tests for complete agent flow"""
 
@@ -234,6 +446,80 @@ class TestHITLBehavior:
         pytest.skip("Requires mock of LangGraph interrupt mechanism")
 
 
+class TestConfirmationMessages:
+    """Tests for HITL confirmation message rendering"""
+
+    def test_template_includes_consequence_details(self):
+        from backend.Agents.confirmation import render_confirmation
+
+        message = render_confirmation({
+            "has_consequences": True,
+            "details": "The trip 'Bulk - 00:01' is already 40% booked by employees.",
+            "tool_name": "remove_vehicle_from_trip",
+            "affected_entity": "Bulk - 00:01",
+        })
+
+        assert message.startswith("You are about to remove the assigned vehicle and driver from trip 'Bulk - 00:01'.")
+        assert "40% booked" in message
+        assert message.endswith("Do you want to proceed? (yes/no)")
+
+    def test_template_fallback_and_step_prefix(self):
+        from backend.Agents.confirmation import render_confirmation
+
+        message = render_confirmation({
+            "type": "confirmation_required",
+            "tool_name": "delete_deployment",
+            "step": 2,
+            "total_steps": 3,
+        })
+
+        assert message == "Step 2 of 3: You are about to execute: delete_deployment\n\nDo you want to proceed? (yes/no)"
+
+    @pytest.mark.asyncio
+    async def test_llm_rewrite_is_cached(self):
+        from backend.Agents import confirmation
+
+        confirmation.rewrite_cache.clear()
+        llm = MagicMock()
+        llm.ainvoke = AsyncMock(return_value=MagicMock(content="Heads up: 40% booked. Continue?"))
+        data = {"has_consequences": True, "details": "40% booked", "tool_name": "delete_trip", "affected_entity": "A"}
+
+        with patch.object(confirmation, "get_chat_model", return_value=llm):
+            first = await confirmation.arender_confirmation(data, rewrite=True)
+            second = await confirmation.arender_confirmation(data, rewrite=True)
+
+        assert first == second == "Heads up: 40% booked. Continue?"
+        llm.ainvoke.assert_awaited_once()
+
+    @pytest.mark.asyncio
+    async def test_non_text_rewrite_falls_back_to_template(self):
+        from backend.Agents import confirmation
+
+        confirmation.rewrite_cache.clear()
+        llm = MagicMock()
+        llm.ainvoke = AsyncMock(return_value=MagicMock(content=[{"type": "text", "text": "partial"}]))
+        data = {"has_consequences": True, "details": "d", "tool_name": "delete_trip", "affected_entity": "A"}
+
+        with patch.object(confirmation, "get_chat_model", return_value=llm):
+            message = await confirmation.arender_confirmation(data, rewrite=True)
+
+        assert message == confirmation.render_confirmation(data)
+        assert confirmation.rewrite_cache.get(confirmation._cache_key(data)) is None
+
+    @pytest.mark.asyncio
+    async def test_llm_rewrite_disabled_returns_template(self):
+        from backend.Agents import confirmation
+
+        with patch.object(confirmation, "get_chat_model") as get_model:
+            message = await confirmation.arender_confirmation(
+                {"has_consequences": True, "details": "d", "tool_name": "delete_trip", "affected_entity": "A"},
+                rewrite=False,
+            )
+
+        get_model.assert_not_called()
+        assert "delete trip 'A'" in message
+
+
 class TestToolPageFiltering:
     """Tests for page-aware tool filtering"""
 
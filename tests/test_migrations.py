@@ -0,0 +1,119 @@
+"""
+Unit tests for schema migrations
+Migrations match the models, the startup schema check, online index builds and batched backfills
+"""
+import pytest
+import sys
+import os
+
+# Path setup
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "backend"))
+
+from alembic.autogenerate import compare_metadata
+from alembic.operations import Operations
+from alembic.runtime.migration import MigrationContext
+from alembic.script import ScriptDirectory
+from sqlalchemy import create_engine, inspect, text
+
+from backend.models import Base
+from utils import migrations
+from utils.migrations import SchemaOutOfDate, batched_backfill, create_index_online, drop_index_online, ensure_schema
+
+
+@pytest.fixture
+def engine(tmp_path):
+    engine = create_engine(f"sqlite:///{tmp_path / 'movi.db'}")
+    yield engine
+    engine.dispose()
+
+
+def run_ops(engine, func):
+    """Run migration-script helpers the way Alembic does (op proxy, migration transaction)"""
+    with engine.connect() as connection:
+        context = MigrationContext.configure(connection)
+        with Operations.context(context), context.begin_transaction():
+            result = func()
+        connection.commit()
+    return result
+
+
+class TestMigrations:
+    """Tests for the migration scripts"""
+
+    def test_migrations_match_models(self, engine):
+        migrations.upgrade(engine)
+
+        with engine.connect() as connection:
+            diff = compare_metadata(MigrationContext.configure(connection), Base.metadata)
+
+        assert diff == []
+
+    def test_heads_match_alembic(self):
+        script = ScriptDirectory.from_config(migrations.alembic_config())
+
+        assert migrations.head_revisions() == set(script.get_heads())
+
+
+class TestSchemaCheck:
+    """Tests for the startup check"""
+
+    def test_empty_database_is_created(self, engine):
+        ensure_schema(engine, check=True)
+
+        assert "vehicles" in inspect(engine).get_table_names()
+        assert migrations.current_revisions(engine) == migrations.head_revisions()
+
+    def test_create_all_database_is_stamped(self, engine):
+        Base.metadata.create_all(bind=engine)
+
+        ensure_schema(engine, check=True)
+
+        assert migrations.current_revisions(engine) == {migrations.BASELINE_REVISION}
+
+    def test_out_of_date_schema_refused(self, engine, monkeypatch):
+        migrations.upgrade(engine)
+        monkeypatch.setattr(migrations, "head_revisions", lambda: {"0002"})
+
+        with pytest.raises(SchemaOutOfDate, match="alembic upgrade head"):
+            ensure_schema(engine, check=True, auto_migrate=False)
+
+    def test_check_can_be_disabled(self, engine):
+        ensure_schema(engine, check=False)
+
+        assert inspect(engine).get_table_names() == []
+
+
+class TestMigrationHelpers:
+    """Tests for the helpers used by migration scripts"""
+
+    def test_create_and_drop_index_are_idempotent(self, engine):
+        migrations.upgrade(engine)
+
+        run_ops(engine, lambda: create_index_online("ix_deployments_trip_id", "deployments", ["trip_id"]))
+        run_ops(engine, lambda: create_index_online("ix_deployments_trip_id", "deployments", ["trip_id"]))
+        assert "ix_deployments_trip_id" in {ix["name"] for ix in inspect(engine).get_indexes("deployments")}
+
+        run_ops(engine, lambda: drop_index_online("ix_deployments_trip_id", "deployments"))
+        run_ops(engine, lambda: drop_index_online("ix_deployments_trip_id", "deployments"))
+        assert "ix_deployments_trip_id" not in {ix["name"] for ix in inspect(engine).get_indexes("deployments")}
+
+    def test_batched_backfill(self, engine):
+        migrations.upgrade(engine)
+        with engine.begin() as connection:
+            for i in range(7):
+                status = "retired" if i == 3 else None
+                connection.execute(
+                    text("INSERT INTO vehicles (license_plate, status) VALUES (:plate, :status)"),
+                    {"plate": f"KA01{i:04d}", "status": status}
+                )
+
+        updated = run_ops(engine, lambda: batched_backfill(
+            "vehicles", "vehicle_id", "status = :status", where="status IS NULL",
+            params={"status": "active"}, batch_size=2
+        ))
+
+        with engine.connect() as connection:
+            statuses = [row[0] for row in connection.execute(text("SELECT status FROM vehicles ORDER BY vehicle_id"))]
+        assert updated == 6
+        assert statuses == ["active"] * 3 + ["retired"] + ["active"] * 3
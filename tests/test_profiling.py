@@ -0,0 +1,159 @@
+"""
+Unit tests for request profiling
+Admin-flagged and sampled profiles, both engines, on-disk storage and the download endpoint
+"""
+import pytest
+import sys
+import os
+import marshal
+import time
+
+# Path setup
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "backend"))
+
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from utils import admin
+from utils.profiling import ProfileStore, ProfilingMiddleware
+from routes import admin as admin_routes
+
+ADMIN = {"X-Admin-Token": "secret"}
+
+
+def busy_bulk_insert(seconds: float) -> int:
+    """Stand-in for a CPU-heavy CRUD function"""
+    deadline = time.perf_counter() + seconds
+    count = 0
+    while time.perf_counter() < deadline:
+        count += 1
+    return count
+
+
+@pytest.fixture
+def store(tmp_path, monkeypatch):
+    store = ProfileStore(str(tmp_path / "profiles"), keep=5)
+    monkeypatch.setattr(admin_routes, "profile_store", store)
+    monkeypatch.setattr(admin, "ADMIN_TOKEN", "secret")
+    return store
+
+
+def make_client(store: ProfileStore, sample_rate: float = 0.0, engine: str = "sampling") -> TestClient:
+    app = FastAPI()
+
+    @app.post("/deployments/bulk")
+    def bulk():
+        return {"count": busy_bulk_insert(0.05)}
+
+    @app.get("/async")
+    async def async_endpoint():
+        return {"count": busy_bulk_insert(0.01)}
+
+    app.include_router(admin_routes.router)
+    app.add_middleware(ProfilingMiddleware, store=store, sample_rate=sample_rate, engine=engine)
+    return TestClient(app)
+
+
+class TestProfilingMiddleware:
+    """Tests for choosing and capturing profiles"""
+
+    def test_not_profiled_by_default(self, store):
+        response = make_client(store).post("/deployments/bulk")
+
+        assert "x-movi-profile-id" not in response.headers
+        assert store.list() == []
+
+    def test_flag_requires_admin_token(self, store):
+        client = make_client(store)
+
+        client.post("/deployments/bulk", headers={"X-Movi-Profile": "1"})
+        client.post("/deployments/bulk?profile=1", headers={"X-Admin-Token": "wrong"})
+
+        assert store.list() == []
+
+    def test_sync_endpoint_profiled_in_threadpool(self, store):
+        response = make_client(store).post("/deployments/bulk", headers={"X-Movi-Profile": "1", **ADMIN})
+
+        profile_id = response.headers["x-movi-profile-id"]
+        meta = store.get(profile_id)
+        assert meta["route"] == "/deployments/bulk"
+        assert meta["reason"] == "requested"
+        assert meta["status"] == 200
+        with open(store.artifact_path(profile_id, "txt")) as f:
+            assert "busy_bulk_insert" in f.read()
+        with open(store.artifact_path(profile_id, "folded")) as f:
+            assert "busy_bulk_insert" in f.read()
+
+    def test_cprofile_engine_writes_pstats(self, store):
+        response = make_client(store, engine="cprofile").get("/async?profile=true", headers=ADMIN)
+
+        profile_id = response.headers["x-movi-profile-id"]
+        with open(store.artifact_path(profile_id, "prof"), "rb") as f:
+            stats = marshal.load(f)
+        assert any(func[2] == "busy_bulk_insert" for func in stats)
+
+    def test_profile_written_off_the_event_loop(self, store, monkeypatch):
+        import threading
+
+        threads = {}
+        save = store.save
+
+        def recording_save(meta, artifacts):
+            threads["save"] = threading.get_ident()
+            save(meta, artifacts)
+
+        monkeypatch.setattr(store, "save", recording_save)
+        app = FastAPI()
+
+        @app.get("/loop")
+        async def loop_thread():
+            threads["loop"] = threading.get_ident()
+            return {}
+
+        app.add_middleware(ProfilingMiddleware, store=store, sample_rate=1.0)
+        TestClient(app).get("/loop")
+
+        assert threads["save"] != threads["loop"]
+        assert len(store.list()) == 1
+
+    def test_sampling_rate(self, store):
+        client = make_client(store, sample_rate=1.0)
+
+        client.get("/async")
+        client.get("/admin/profiles", headers=ADMIN)
+
+        profiles = store.list()
+        assert len(profiles) == 1
+        assert profiles[0]["reason"] == "sampled"
+
+
+class TestProfileStore:
+    """Tests for storage and the admin endpoints"""
+
+    def test_keeps_newest_profiles(self, store):
+        for i in range(7):
+            store.save({"id": f"20260101-00000{i}-0000000{i}"}, {"txt": "tree"})
+
+        ids = [meta["id"] for meta in store.list()]
+        assert len(ids) == 5
+        assert ids[0] == "20260101-000006-00000006"
+
+    def test_rejects_invalid_ids(self, store):
+        assert store.artifact_path("../../etc/passwd", "txt") is None
+        assert not store.valid_id("20260101-000000-0000000g")
+
+    def test_list_download_and_clear(self, store):
+        client = make_client(store)
+        profile_id = client.post("/deployments/bulk", headers={"X-Movi-Profile": "1", **ADMIN}).headers["x-movi-profile-id"]
+
+        assert client.get("/admin/profiles").status_code == 403
+        assert client.get("/admin/profiles", headers=ADMIN).json()[0]["id"] == profile_id
+
+        download = client.get(f"/admin/profiles/{profile_id}?format=txt", headers=ADMIN)
+        assert download.status_code == 200
+        assert "busy_bulk_insert" in download.text
+        assert client.get(f"/admin/profiles/{profile_id}?format=prof", headers=ADMIN).status_code == 404
+
+        assert client.delete("/admin/profiles", headers=ADMIN).json() == {"deleted": 1}
+        assert store.list() == []
@@ -0,0 +1,130 @@
+"""
+Unit tests for the slow-query log
+Caller attribution, query plan capture, rolling top-N and the admin endpoint
+"""
+import pytest
+import sys
+import os
+
+# Path setup
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "backend"))
+
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import StaticPool
+
+from backend.models import Base
+from backend.crud import vehicle as crud_vehicle
+from utils import admin
+from utils.slow_query import SlowQueryLog, slow_query_log
+from routes.admin import router as admin_router
+
+
+@pytest.fixture
+def db_session():
+    """In-memory database with the Movi schema"""
+    engine = create_engine("sqlite://", connect_args={"check_same_thread": False}, poolclass=StaticPool)
+    Base.metadata.create_all(bind=engine)
+    session = sessionmaker(bind=engine)()
+    yield engine, session
+    session.close()
+
+
+class TestSlowQueryLog:
+    """Tests for recording and aggregation"""
+
+    def test_crud_query_recorded_with_caller_and_plan(self, db_session):
+        engine, session = db_session
+        log = SlowQueryLog(threshold_ms=0, top_n=10)
+        log.install(engine)
+        log.install(engine)  # idempotent
+
+        crud_vehicle.get_vehicle_by_license_plate(session, "KA01AB1234")
+        crud_vehicle.get_vehicle_by_license_plate(session, "KA01AB9999")
+
+        entry = next(e for e in log.top() if e["caller"] == "crud.vehicle.get_vehicle_by_license_plate")
+        assert entry["count"] == 2
+        assert "KA01AB" in str(entry["parameters"])
+        assert entry["statement"].startswith("SELECT")
+        assert any("vehicles" in step for step in entry["plan"])
+
+    def test_fast_queries_ignored(self, db_session):
+        engine, session = db_session
+        log = SlowQueryLog(threshold_ms=10_000)
+        log.install(engine)
+
+        crud_vehicle.get_all_vehicles(session)
+
+        assert log.top() == []
+        assert log.slow_count == 0
+
+    def test_failed_statement_leaves_no_timing_state(self, db_session):
+        from sqlalchemy import text
+
+        engine, _ = db_session
+        log = SlowQueryLog(threshold_ms=0, capture_plans=False)
+        log.install(engine)
+
+        with engine.connect() as conn:
+            with pytest.raises(Exception):
+                conn.execute(text("SELECT * FROM missing_table"))
+            conn.execute(text("SELECT 1"))
+            assert "movi_slow_query_start" not in conn.info
+
+        assert [e["statement"] for e in log.top()] == ["SELECT 1"]
+
+    def test_top_n_keeps_slowest(self):
+        log = SlowQueryLog(threshold_ms=10, top_n=2, capture_plans=False)
+
+        log.record("SELECT 1", (), 50, "crud.a.f")
+        log.record("SELECT 2", (), 20, "crud.b.g")
+        assert log.record("SELECT 3", (), 15, "crud.c.h") is None
+        log.record("SELECT 4", (), 80, "crud.d.i")
+        log.record("SELECT 5", (), 5, "crud.e.j")
+
+        assert [e["statement"] for e in log.top()] == ["SELECT 4", "SELECT 1"]
+        assert log.slow_count == 4
+
+    def test_long_parameters_truncated(self):
+        log = SlowQueryLog(threshold_ms=0, capture_plans=False)
+
+        entry = log.record("INSERT INTO t VALUES (?)", ("x" * 1000,), 1, "crud.a.f")
+
+        assert len(entry.parameters[0]) < 300
+
+
+class TestSlowQueryEndpoint:
+    """Tests for /admin/slow-queries"""
+
+    @pytest.fixture
+    def client(self, monkeypatch):
+        app = FastAPI()
+        app.include_router(admin_router)
+        slow_query_log.reset()
+        yield TestClient(app)
+        slow_query_log.reset()
+
+    def test_disabled_without_token(self, client, monkeypatch):
+        monkeypatch.setattr(admin, "ADMIN_TOKEN", "")
+
+        assert client.get("/admin/slow-queries").status_code == 404
+
+    def test_requires_token(self, client, monkeypatch):
+        monkeypatch.setattr(admin, "ADMIN_TOKEN", "secret")
+
+        assert client.get("/admin/slow-queries").status_code == 403
+        assert client.get("/admin/slow-queries", headers={"X-Admin-Token": "wrong"}).status_code == 403
+
+    def test_lists_and_resets(self, client, monkeypatch):
+        monkeypatch.setattr(admin, "ADMIN_TOKEN", "secret")
+        headers = {"X-Admin-Token": "secret"}
+        slow_query_log.record("SELECT * FROM vehicles", (), slow_query_log.threshold_ms + 1, "crud.vehicle.get_vehicles")
+
+        body = client.get("/admin/slow-queries", headers=headers).json()
+        assert body["queries"][0]["caller"] == "crud.vehicle.get_vehicles"
+
+        client.delete("/admin/slow-queries", headers=headers)
+        assert client.get("/admin/slow-queries", headers=headers).json()["queries"] == []
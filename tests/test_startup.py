@@ -0,0 +1,54 @@
+"""
+Startup tests
+The backend app imports without the LLM stack, and CRUD-only workers skip the Movi routes
+"""
+import sys
+import os
+import json
+import subprocess
+
+BACKEND_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "backend")
+
+HEAVY_MODULES = ("langchain_openai", "langgraph", "openai", "Agents.graph")
+
+CHILD = f"""
+import json, sys
+sys.path.insert(0, {BACKEND_PATH!r})
+import main
+print(json.dumps({{
+    "heavy": [m for m in {HEAVY_MODULES!r} if m in sys.modules],
+    "paths": sorted(main.app.openapi()["paths"]),
+    "audio_built": "routes.voice" in sys.modules and sys.modules["routes.voice"].get_audio_service.cache_info().currsize > 0,
+}}))
+"""
+
+
+def start_app(tmp_path, **env) -> dict:
+    """Import main in a fresh interpreter (its SQLite file goes to tmp_path)."""
+    completed = subprocess.run(
+        [sys.executable, "-c", CHILD],
+        cwd=tmp_path,
+        env={**os.environ, "LANGSMITH_TRACING": "false", **env},
+        capture_output=True,
+        text=True,
+        timeout=120,
+    )
+    assert completed.returncode == 0, completed.stderr
+    return json.loads(completed.stdout.strip().splitlines()[-1])
+
+
+class TestStartup:
+    """Tests for lazy agent initialization"""
+
+    def test_llm_stack_not_imported_at_startup(self, tmp_path):
+        started = start_app(tmp_path)
+
+        assert started["heavy"] == []
+        assert not started["audio_built"]
+        assert "/movi/chat" in started["paths"]
+
+    def test_agent_routes_can_be_disabled(self, tmp_path):
+        started = start_app(tmp_path, MOVI_AGENT_ENABLED="false")
+
+        assert "/movi/chat" not in started["paths"]
+        assert "/vehicles/" in started["paths"]
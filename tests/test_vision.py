@@ -0,0 +1,163 @@
+"""
+Unit tests for the vision pipeline
+Tests local image preprocessing and the content-hash analysis cache
+"""
+import base64
+import io
+import pytest
+import sys
+import os
+from unittest.mock import MagicMock, AsyncMock
+
+# Path setup
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "backend"))
+
+from PIL import Image
+
+from backend.utils.image_processing import preprocess_image, prepare_image_for_vision, target_size
+from backend.Agents import vision
+from backend.utils.cache import LRUCache
+
+
+def _png_base64(width: int, height: int) -> str:
+    buffer = io.BytesIO()
+    Image.new("RGBA", (width, height), (20, 40, 60, 255)).save(buffer, format="PNG")
+    return base64.b64encode(buffer.getvalue()).decode()
+
+
+class TestImagePreprocessing:
+    """Tests for local downscaling and re-encoding"""
+
+    def test_target_size_limits_long_and_short_side(self):
+        assert target_size(3840, 2160) == (1365, 768)
+        assert target_size(400, 300) == (400, 300)
+
+    def test_preprocess_downscales_large_screenshot(self):
+        raw = base64.b64decode(_png_base64(3000, 2000))
+
+        data, mime_type = preprocess_image(raw)
+
+        assert mime_type == "image/jpeg"
+        with Image.open(io.BytesIO(data)) as img:
+            assert img.size == (1152, 768)
+            assert img.mode == "RGB"
+
+    def test_prepare_falls_back_on_undecodable_bytes(self):
+        encoded, mime_type = prepare_image_for_vision(b"not an image")
+
+        assert base64.b64decode(encoded) == b"not an image"
+        assert mime_type == "image/jpeg"
+
+
+class TestVisionCache:
+    """Tests for reuse of analyses of identical screenshots"""
+
+    @pytest.fixture(autouse=True)
+    def clear_cache(self):
+        vision.analysis_cache.clear()
+        yield
+        vision.analysis_cache.clear()
+
+    def test_identical_images_reuse_analysis(self):
+        llm = MagicMock()
+        llm.invoke.return_value = MagicMock(content="Trip A is highlighted")
+        image = _png_base64(64, 64)
+
+        first = vision.analyze_image(image, llm=llm)
+        second = vision.analyze_image(f"data:image/png;base64,{image}", llm=llm)
+
+        assert first == second == "Trip A is highlighted"
+        llm.invoke.assert_called_once()
+
+    @pytest.mark.asyncio
+    async def test_async_analysis_uses_cache(self):
+        llm = MagicMock()
+        llm.ainvoke = AsyncMock(return_value=MagicMock(content="Dashboard table"))
+        image = _png_base64(32, 32)
+
+        await vision.aanalyze_image(image, llm=llm)
+        result = await vision.aanalyze_image(image, llm=llm)
+
+        assert result == "Dashboard table"
+        llm.ainvoke.assert_awaited_once()
+
+    def test_content_blocks_are_joined(self):
+        llm = MagicMock()
+        llm.invoke.return_value = MagicMock(content=[{"type": "text", "text": "Trip A "}, "circled"])
+
+        assert vision.analyze_image(_png_base64(16, 16), llm=llm, allow_ocr=False) == "Trip A circled"
+
+    def test_cache_evicts_least_recently_used(self):
+        cache = LRUCache(max_size=2)
+        cache.put("a", "1")
+        cache.put("b", "2")
+        cache.get("a")
+        cache.put("c", "3")
+
+        assert cache.get("b") is None
+        assert cache.get("a") == "1"
+
+
+class TestOcrFastPath:
+    """Tests for the local OCR stage in front of the vision model"""
+
+    @pytest.fixture(autouse=True)
+    def clear_cache(self):
+        vision.analysis_cache.clear()
+        yield
+        vision.analysis_cache.clear()
+
+    def test_parse_dashboard_row(self):
+        from backend.utils.ocr import parse_dashboard_row
+
+        row = parse_dashboard_row("Path2 - 19:45 IN PROGRESS 25%")
+
+        assert row.trip_name == "Path2 - 19:45"
+        assert row.status == "IN-PROGRESS"
+        assert row.booking_percentage == 25.0
+        assert parse_dashboard_row("Trip Name Status Booking") is None
+
+    def test_build_result_groups_lines(self):
+        from backend.utils.ocr import build_result
+
+        words = [
+            {"text": "Bulk", "conf": 95, "line": (1, 1, 1)},
+            {"text": "-", "conf": 90, "line": (1, 1, 1)},
+            {"text": "00:01", "conf": 92, "line": (1, 1, 1)},
+            {"text": "SCHEDULED", "conf": 96, "line": (1, 1, 1)},
+            {"text": "40%", "conf": 91, "line": (1, 1, 1)},
+        ]
+
+        result = build_result(words)
+
+        assert result.rows[0].trip_name == "Bulk - 00:01"
+        assert result.rows[0].status == "SCHEDULED"
+        assert result.is_confident
+
+    def test_confident_ocr_skips_vision_model(self, monkeypatch):
+        from backend.utils.ocr import OcrResult, DashboardRow
+
+        result = OcrResult(text="Bulk - 00:01 SCHEDULED 40%", confidence=95,
+                           rows=[DashboardRow("Bulk - 00:01", "SCHEDULED", 40.0)])
+        monkeypatch.setattr(vision.ocr, "extract_dashboard_text", lambda data: result)
+        llm = MagicMock()
+
+        analysis = vision.analyze_image(_png_base64(16, 16), llm=llm)
+
+        assert "Bulk - 00:01 (SCHEDULED, 40% booked)" in analysis
+        llm.invoke.assert_not_called()
+
+    def test_low_confidence_ocr_falls_back_to_vision(self, monkeypatch):
+        from backend.utils.ocr import OcrResult
+
+        monkeypatch.setattr(vision.ocr, "extract_dashboard_text",
+                            lambda data: OcrResult(text="???", confidence=20))
+        llm = MagicMock()
+        llm.invoke.return_value = MagicMock(content="Vision description")
+
+        assert vision.analyze_image(_png_base64(16, 16), llm=llm) == "Vision description"
+
+    def test_visual_emphasis_bypasses_ocr(self):
+        assert vision.needs_visual_reasoning("Remove the vehicle from the circled trip")
+        assert not vision.needs_visual_reasoning("What is the status of these trips?")
@@ -0,0 +1,586 @@
+"""
+Unit tests for the voice WebSocket pipeline
+STT, the agent graph and TTS are replaced with fakes so no external service is needed
+"""
+import pytest
+import sys
+import os
+import base64
+
+# Path setup
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "backend"))
+
+os.environ.setdefault("OPENAI_API_KEY", "sk-test")
+os.environ.setdefault("LANGSMITH_TRACING", "false")
+
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from backend.routes import voice
+from backend.utils.audio_processing import SentenceChunker
+from backend.utils.audio_service import AudioService, AudioServiceBusy
+from backend.utils.tts_cache import TTSCache
+from backend.utils import voice_protocol
+from backend.utils import audio_backends
+from backend.utils.voice_sessions import VoiceSessionManager, VoiceSessionLimitExceeded
+from unittest.mock import AsyncMock
+
+
+@pytest.fixture
+def voice_client(monkeypatch):
+    """Voice router with fake STT, TTS and agent reply"""
+    service = AudioService(
+        stt=lambda data, fmt="webm": "show all trips",
+        tts=lambda text, voice="nova": f"mp3:{text}".encode(),
+    )
+    monkeypatch.setattr(voice, "get_audio_service", lambda: service)
+
+    async def fake_reply(session_id, user_text, context_page):
+        for token in ["You have two trips today. ", "Bulk - 00:01 is 40% booked."]:
+            yield {"type": "token", "content": token}
+
+    monkeypatch.setattr(voice, "stream_agent_reply", fake_reply)
+
+    app = FastAPI()
+    app.include_router(voice.router)
+    return TestClient(app)
+
+
+class TestSentenceChunker:
+    """Tests for splitting streamed tokens into TTS sentences"""
+
+    def test_merges_short_sentences(self):
+        chunker = SentenceChunker(min_chars=20)
+        sentences = []
+        for token in ["Sure. ", "The trip is ", "40% booked. ", "Anything else"]:
+            sentences += chunker.feed(token)
+
+        assert sentences == ["Sure. The trip is 40% booked."]
+        assert chunker.flush() == ["Anything else"]
+
+
+def _wav(seconds_silence: float, seconds_tone: float, rate: int = 48000, channels: int = 2) -> bytes:
+    """Stereo WAV: silence, then a loud square wave, then silence"""
+    import io
+    import struct
+    import wave
+
+    frames = []
+    silence = int(rate * seconds_silence)
+    tone = int(rate * seconds_tone)
+    for i in range(silence + tone + silence):
+        value = 8000 if silence <= i < silence + tone and (i // 50) % 2 else (-8000 if silence <= i < silence + tone else 0)
+        frames.append(struct.pack("<" + "h" * channels, *([value] * channels)))
+
+    buffer = io.BytesIO()
+    with wave.open(buffer, "wb") as wav:
+        wav.setnchannels(channels)
+        wav.setsampwidth(2)
+        wav.setframerate(rate)
+        wav.writeframes(b"".join(frames))
+    return buffer.getvalue()
+
+
+class TestAudioPreprocessing:
+    """Tests for VAD trimming and normalization before STT"""
+
+    @pytest.fixture(autouse=True)
+    def no_ffmpeg(self, monkeypatch):
+        from backend.utils import audio_preprocess
+        monkeypatch.setattr(audio_preprocess, "FFMPEG", None)
+        monkeypatch.setattr(audio_preprocess, "webrtcvad", None)
+
+    def test_trims_silence_and_downmixes(self):
+        import io
+        import wave
+        from backend.utils.audio_preprocess import prepare_for_stt
+
+        original = _wav(seconds_silence=1.0, seconds_tone=0.6)
+
+        prepared = prepare_for_stt(original, "wav")
+
+        assert prepared.has_speech
+        assert prepared.format == "wav"
+        assert 500 <= prepared.speech_ms <= 700
+        with wave.open(io.BytesIO(prepared.data), "rb") as wav:
+            assert (wav.getnchannels(), wav.getframerate()) == (1, 16000)
+            assert wav.getnframes() / 16000 < 1.2
+        assert len(prepared.data) < len(original) / 5
+
+    def test_silence_is_dropped(self):
+        from backend.utils.audio_preprocess import prepare_for_stt
+
+        prepared = prepare_for_stt(_wav(seconds_silence=1.0, seconds_tone=0.0), "wav")
+
+        assert not prepared.has_speech
+
+    def test_undecodable_audio_passes_through(self):
+        from backend.utils.audio_preprocess import prepare_for_stt
+
+        prepared = prepare_for_stt(b"webm-bytes", "webm")
+
+        assert prepared.has_speech
+        assert prepared.data == b"webm-bytes"
+
+
+class TestAudioBackends:
+    """Tests for backend selection and the deterministic fakes"""
+
+    def test_selects_backends_by_name(self):
+        assert isinstance(audio_backends.get_stt_backend("fake"), audio_backends.FakeSTT)
+        assert isinstance(audio_backends.get_tts_backend("openai"), audio_backends.OpenAITTS)
+        with pytest.raises(ValueError):
+            audio_backends.get_stt_backend("nonexistent")
+
+    def test_fake_stt_echoes_scripted_text(self):
+        stt = audio_backends.FakeSTT(text="show all trips")
+
+        assert stt.transcribe(b"delete trip Bulk - 00:01") == "delete trip Bulk - 00:01"
+        assert stt.transcribe(b"\x1aE\xdf\xa3\x00\xff") == "show all trips"
+
+    def test_fake_tts_is_deterministic(self):
+        tts = audio_backends.FakeTTS()
+
+        assert tts.synthesize("Hello", "nova") == tts.synthesize("Hello", "nova")
+        assert tts.synthesize("Hello", "nova") != tts.synthesize("Hello", "alloy")
+
+    def test_local_backends_need_their_dependencies(self, monkeypatch):
+        monkeypatch.setitem(sys.modules, "faster_whisper", None)
+
+        with pytest.raises(RuntimeError):
+            audio_backends.LocalWhisperSTT()
+        with pytest.raises(RuntimeError):
+            audio_backends.PiperTTS(model_path="", binary=None)
+
+    def test_base_backends_are_abstract(self):
+        with pytest.raises(TypeError):
+            audio_backends.STTBackend()
+        with pytest.raises(TypeError):
+            audio_backends.TTSBackend()
+
+    def test_cache_namespace_differs_per_engine(self):
+        piper = audio_backends.PiperTTS(model_path="/models/en_US-amy-medium.onnx", binary="/usr/bin/piper")
+
+        assert piper.output_format == "wav"
+        assert piper.cache_namespace != audio_backends.OpenAITTS().cache_namespace
+
+
+class TestAudioService:
+    """Tests for bounded STT/TTS execution"""
+
+    @pytest.mark.asyncio
+    async def test_rejects_work_beyond_capacity(self):
+        import asyncio
+        import threading
+
+        release = threading.Event()
+
+        def slow_stt(data, fmt):
+            release.wait(2)
+            return "done"
+
+        service = AudioService(stt=slow_stt, tts=lambda t, v: b"", stt_workers=1, max_pending=0)
+        first = asyncio.ensure_future(service.transcribe(b"a"))
+        await asyncio.sleep(0.05)
+
+        with pytest.raises(AudioServiceBusy):
+            await service.transcribe(b"b")
+
+        release.set()
+        assert await first == "done"
+        assert service.stats()["stt"]["in_flight"] == 0
+
+    @pytest.mark.asyncio
+    async def test_cancelled_jobs_are_dropped_and_release_their_slot(self):
+        import asyncio
+        import threading
+
+        release = threading.Event()
+        synthesized = []
+
+        def slow_tts(text, voice):
+            release.wait(2)
+            synthesized.append(text)
+            return b"mp3"
+
+        service = AudioService(stt=lambda d, f: "", tts=slow_tts, tts_workers=1)
+        running = asyncio.ensure_future(service.synthesize("first"))
+        queued = asyncio.ensure_future(service.synthesize("second"))
+        await asyncio.sleep(0.05)
+
+        queued.cancel()
+        running.cancel()
+        await asyncio.sleep(0.05)
+        # The running job cannot be interrupted and keeps its slot until it ends
+        assert service.stats()["tts"]["in_flight"] == 1
+
+        release.set()
+        await asyncio.sleep(0.1)
+        assert synthesized == ["first"]
+        assert service.stats()["tts"]["in_flight"] == 0
+
+
+class TestTTSCache:
+    """Tests for the two-tier TTS cache"""
+
+    def test_normalized_text_hits_memory_then_disk(self, tmp_path):
+        cache = TTSCache(disk_dir=str(tmp_path))
+        cache.put("Do you want to proceed?  ", "nova", b"mp3")
+
+        assert cache.get(" Do you want   to proceed?", "nova") == b"mp3"
+        assert cache.get("Do you want to proceed?", "alloy") is None
+
+        # A fresh process only has the disk tier
+        restarted = TTSCache(disk_dir=str(tmp_path))
+        assert restarted.get("Do you want to proceed?", "nova") == b"mp3"
+        assert restarted.stats()["disk_hits"] == 1
+
+    def test_disk_files_use_backend_format(self, tmp_path):
+        cache = TTSCache(disk_dir=str(tmp_path), audio_format="wav")
+        cache.put("Hello", "nova", b"RIFF")
+
+        files = [f for _, _, names in os.walk(tmp_path) for f in names]
+        assert len(files) == 1 and files[0].endswith(".wav")
+
+    def test_memory_lookup_skips_disk_tier(self, tmp_path):
+        cache = TTSCache(disk_dir=str(tmp_path))
+        cache.put("Hello", "nova", b"mp3")
+        restarted = TTSCache(disk_dir=str(tmp_path))
+
+        assert restarted.get_memory("Hello", "nova") is None
+        assert cache.get_memory("Hello", "nova") == b"mp3"
+        assert restarted.stats()["misses"] == 0
+
+    def test_prune_keeps_disk_within_budget(self, tmp_path):
+        cache = TTSCache(disk_dir=str(tmp_path), disk_max_mb=1)
+        for i in range(3):
+            cache.put(f"phrase {i}", "nova", b"x" * 400 * 1024)
+
+        cache.prune()
+
+        files = [f for _, _, names in os.walk(tmp_path) for f in names]
+        assert len(files) == 2
+
+    @pytest.mark.asyncio
+    async def test_cached_phrases_skip_tts(self, tmp_path):
+        calls = []
+
+        def tts(text, voice="nova"):
+            calls.append(text)
+            return f"mp3:{text}".encode()
+
+        service = AudioService(stt=lambda d, f="webm": "", tts=tts, tts_cache=TTSCache(disk_dir=str(tmp_path)))
+
+        assert await service.prewarm(["Action cancelled by user."], "nova") == 1
+        assert await service.prewarm(["Action cancelled by user."], "nova") == 0
+        await service.synthesize("Action cancelled by user.", "nova")
+
+        assert calls == ["Action cancelled by user."]
+
+    @pytest.mark.asyncio
+    async def test_reply_reuses_cached_sentences(self, monkeypatch, tmp_path):
+        calls = []
+
+        def tts(text, voice="nova"):
+            calls.append(text)
+            return f"[{text}]".encode()
+
+        service = AudioService(stt=lambda d, f="webm": "", tts=tts, tts_cache=TTSCache(disk_dir=str(tmp_path)))
+        monkeypatch.setattr(voice, "get_audio_service", lambda: service)
+        await service.prewarm(["Do you want to proceed? (yes/no)"], voice.TTS_VOICE)
+
+        audio = await voice.synthesize_reply(
+            "You are about to delete trip 'Bulk - 00:01'.\n\nDo you want to proceed? (yes/no)"
+        )
+
+        assert audio == b"[You are about to delete trip 'Bulk - 00:01'.][Do you want to proceed? (yes/no)]"
+        assert calls == ["Do you want to proceed? (yes/no)", "You are about to delete trip 'Bulk - 00:01'."]
+
+    def test_prewarmed_phrases_are_spoken_verbatim(self):
+        from backend.Agents.confirmation import render_confirmation
+        from backend.utils.phrases import CONFIRMATION_QUESTION
+        from backend.utils.tts_cache import PREWARM_PHRASES
+
+        sentences = voice.split_sentences(render_confirmation({"tool_name": "delete_trip"}))
+
+        assert sentences[-1] == CONFIRMATION_QUESTION
+        assert set(PREWARM_PHRASES) == {CONFIRMATION_QUESTION, voice.NO_RESPONSE_TEXT}
+
+
+class TestVoiceSessionManager:
+    """Tests for session limits, reaping and latency metrics"""
+
+    @pytest.mark.asyncio
+    async def test_rejects_sessions_beyond_worker_limit(self):
+        manager = VoiceSessionManager(max_sessions=1)
+        manager.create_session("a", AsyncMock())
+
+        # Re-initializing an existing session does not count twice
+        manager.create_session("a", AsyncMock(), "busDashboard")
+        with pytest.raises(VoiceSessionLimitExceeded):
+            manager.create_session("b", AsyncMock())
+
+        assert manager.get_session("a").context_page == "busDashboard"
+        assert manager.metrics()["rejected"] == 1
+        manager.remove_session("a")
+
+    @pytest.mark.asyncio
+    async def test_global_limiter_runs_off_the_event_loop(self):
+        import threading
+
+        loop_thread = threading.get_ident()
+        calls = []
+
+        class Limiter:
+            limit = 1
+
+            def acquire(self, session_id):
+                calls.append(("acquire", threading.get_ident()))
+                return session_id == "a"
+
+            def release(self, session_id):
+                calls.append(("release", threading.get_ident()))
+
+        manager = VoiceSessionManager(global_limiter=Limiter())
+        await manager.acreate_session("a", AsyncMock())
+        with pytest.raises(VoiceSessionLimitExceeded):
+            await manager.acreate_session("b", AsyncMock())
+        await manager.aremove_session("a")
+
+        assert [name for name, _ in calls] == ["acquire", "acquire", "release"]
+        assert all(thread != loop_thread for _, thread in calls)
+        assert manager.active_sessions == {}
+
+    @pytest.mark.asyncio
+    async def test_reaps_idle_and_overlong_sessions(self):
+        manager = VoiceSessionManager(idle_timeout=60, max_duration=3600)
+        idle_ws, old_ws, fresh_ws = AsyncMock(), AsyncMock(), AsyncMock()
+        manager.create_session("idle", idle_ws)
+        manager.create_session("old", old_ws)
+        manager.create_session("fresh", fresh_ws)
+        manager.get_session("idle").last_activity -= 61
+        manager.get_session("old").started -= 3601
+
+        reaped = await manager.reap()
+
+        assert sorted(reaped) == ["idle", "old"]
+        assert list(manager.active_sessions) == ["fresh"]
+        idle_ws.close.assert_awaited_once()
+        assert idle_ws.send_json.await_args.args[0]["reason"] == "idle"
+        assert manager.metrics()["reaped_max_duration"] == 1
+        fresh_ws.close.assert_not_awaited()
+        manager.remove_session("fresh")
+
+    @pytest.mark.asyncio
+    async def test_latency_breakdown(self):
+        manager = VoiceSessionManager()
+        manager.create_session("s", AsyncMock())
+        for seconds in (0.1, 0.2, 0.3, 0.4):
+            manager.record_latency("s", "stt", seconds)
+        manager.record_latency("s", "turn", 1.0)
+
+        session = manager.get_session("s").info()
+        metrics = manager.metrics()
+
+        assert session["turns"] == 1
+        assert session["latency"]["stt"]["avg_ms"] == 250.0
+        assert metrics["latency_ms"]["stt"]["p50"] == 200.0
+        assert metrics["latency_ms"]["stt"]["p95"] == 400.0
+        manager.remove_session("s")
+
+    def test_websocket_rejected_when_full(self, voice_client, monkeypatch):
+        manager = voice.VoiceSessionManager(max_sessions=0)
+        monkeypatch.setattr(voice, "voice_sessions", manager)
+
+        with voice_client.websocket_connect("/movi/voice") as ws:
+            ws.send_json({"type": "init", "session_id": "over-limit"})
+            assert ws.receive_json()["type"] == "busy"
+
+    def test_turn_latency_reported_in_metrics(self, voice_client, monkeypatch):
+        monkeypatch.setattr(voice, "voice_sessions", voice.VoiceSessionManager())
+
+        with voice_client.websocket_connect("/movi/voice") as ws:
+            ws.send_json({"type": "init", "session_id": "timed"})
+            ws.receive_json()
+            ws.send_json({"type": "audio", "data": base64.b64encode(b"audio").decode(), "format": "webm"})
+            ws.receive_json()
+            assert ws.receive_json()["type"] == "audio_response"
+
+            sessions = voice_client.get("/movi/voice/sessions").json()
+            ws.send_json({"type": "close"})
+
+        metrics = voice_client.get("/movi/voice/metrics").json()
+        assert sessions["sessions"][0]["turns"] == 1
+        assert metrics["latency_ms"]["turn"]["count"] == 1
+        assert metrics["active_sessions"] == 0
+        assert "stt" in metrics["audio"]
+
+
+class TestVoiceProtocol:
+    """Tests for v2 binary frame encoding"""
+
+    def test_round_trip_without_payload_copy(self):
+        data = voice_protocol.encode_frame(voice_protocol.FRAME_AUDIO, "ogg", 7, b"opus-bytes")
+
+        frame = voice_protocol.parse_frame(data)
+
+        assert len(data) == voice_protocol.HEADER_SIZE + len(b"opus-bytes")
+        assert (frame.kind, frame.codec, frame.seq) == (voice_protocol.FRAME_AUDIO, "ogg", 7)
+        assert isinstance(frame.payload, memoryview)
+        assert frame.payload.obj is data
+        assert frame.payload.tobytes() == b"opus-bytes"
+
+    @pytest.mark.parametrize("data", [b"short", b"\x01\x01\x00\x00\x00\x00\x00\x00", b"\x02\x09\x00\x00\x00\x00\x00\x00"])
+    def test_rejects_malformed_frames(self, data):
+        with pytest.raises(voice_protocol.FrameError):
+            voice_protocol.parse_frame(data)
+
+
+class TestVoiceWebSocket:
+    """Tests for the voice WebSocket protocol"""
+
+    def test_streaming_turn_sends_binary_audio_per_sentence(self, voice_client):
+        with voice_client.websocket_connect("/movi/voice") as ws:
+            ws.send_json({"type": "init", "session_id": "voice-test", "context_page": "busDashboard"})
+            assert ws.receive_json()["type"] == "ready"
+
+            ws.send_json({"type": "audio_start", "format": "webm"})
+            ws.send_bytes(b"chunk-1")
+            ws.send_bytes(b"chunk-2")
+            ws.send_json({"type": "audio_end"})
+
+            assert ws.receive_json() == {"type": "transcription", "text": "show all trips"}
+
+            audio_frames = []
+            while True:
+                message = ws.receive()
+                if message.get("bytes") is not None:
+                    audio_frames.append(message["bytes"])
+                    continue
+                data = voice.json.loads(message["text"])
+                if data["type"] == "response_end":
+                    break
+
+            assert data["text"] == "You have two trips today. Bulk - 00:01 is 40% booked."
+            assert audio_frames == [
+                b"mp3:You have two trips today.",
+                b"mp3:Bulk - 00:01 is 40% booked.",
+            ]
+            ws.send_json({"type": "close"})
+
+    def test_v2_binary_protocol(self, voice_client):
+        with voice_client.websocket_connect("/movi/voice") as ws:
+            ws.send_json({"type": "init", "session_id": "voice-v2", "protocol": 2})
+            assert ws.receive_json()["protocol"] == 2
+
+            ws.send_bytes(voice_protocol.encode_frame(voice_protocol.FRAME_AUDIO, "ogg", 0, b"chunk-1"))
+            ws.send_bytes(voice_protocol.encode_frame(voice_protocol.FRAME_AUDIO_END, "ogg", 1, b"chunk-2"))
+
+            assert ws.receive_json()["type"] == "transcription"
+
+            tts_frames, control_types = [], []
+            while True:
+                message = ws.receive()
+                if message.get("bytes") is not None:
+                    tts_frames.append(voice_protocol.parse_frame(message["bytes"]))
+                    continue
+                data = voice.json.loads(message["text"])
+                control_types.append(data["type"])
+                if data["type"] == "response_end":
+                    break
+
+            assert "audio_chunk" not in control_types
+            assert [(f.kind, f.codec, f.seq) for f in tts_frames] == [
+                (voice_protocol.FRAME_TTS, "mp3", 0),
+                (voice_protocol.FRAME_TTS, "mp3", 1),
+            ]
+            assert tts_frames[0].payload.tobytes() == b"mp3:You have two trips today."
+            ws.send_json({"type": "close"})
+
+    def test_legacy_base64_turn(self, voice_client):
+        with voice_client.websocket_connect("/movi/voice") as ws:
+            ws.send_json({"type": "init", "session_id": "voice-legacy"})
+            ws.receive_json()
+            ws.send_json({"type": "audio", "data": base64.b64encode(b"audio").decode(), "format": "webm"})
+
+            assert ws.receive_json()["type"] == "transcription"
+            response = ws.receive_json()
+
+            assert response["type"] == "audio_response"
+            assert base64.b64decode(response["data"]).startswith(b"mp3:You have two trips")
+            ws.send_json({"type": "close"})
+
+    def test_cancel_aborts_reply_in_progress(self, voice_client, monkeypatch):
+        import asyncio
+        finished = []
+
+        async def hanging_reply(session_id, user_text, context_page):
+            yield {"type": "token", "content": "Let me check "}
+            await asyncio.sleep(30)
+            finished.append(True)
+            yield {"type": "token", "content": "never sent."}
+
+        monkeypatch.setattr(voice, "stream_agent_reply", hanging_reply)
+
+        with voice_client.websocket_connect("/movi/voice") as ws:
+            ws.send_json({"type": "init", "session_id": "voice-cancel"})
+            ws.receive_json()
+            ws.send_json({"type": "audio_start", "format": "webm"})
+            ws.send_bytes(b"chunk")
+            ws.send_json({"type": "audio_end"})
+            assert ws.receive_json()["type"] == "transcription"
+            assert ws.receive_json() == {"type": "token", "content": "Let me check "}
+
+            ws.send_json({"type": "cancel"})
+
+            assert ws.receive_json() == {"type": "cancelled", "reason": "cancel"}
+            ws.send_json({"type": "close"})
+        assert finished == []
+
+    def test_new_utterance_barges_in(self, voice_client, monkeypatch):
+        import asyncio
+        calls = []
+
+        async def reply(session_id, user_text, context_page):
+            calls.append(user_text)
+            if len(calls) == 1:
+                yield {"type": "token", "content": "This is a long answer. "}
+                await asyncio.sleep(30)
+            yield {"type": "token", "content": "Okay, stopping."}
+
+        monkeypatch.setattr(voice, "stream_agent_reply", reply)
+
+        with voice_client.websocket_connect("/movi/voice") as ws:
+            ws.send_json({"type": "init", "session_id": "voice-barge"})
+            ws.receive_json()
+            ws.send_json({"type": "audio_start", "format": "webm"})
+            ws.send_bytes(b"first")
+            ws.send_json({"type": "audio_end"})
+            ws.receive_json()
+            assert ws.receive_json()["type"] == "token"
+
+            # User starts talking over the reply
+            ws.send_json({"type": "audio_start", "format": "webm"})
+            assert ws.receive_json() == {"type": "cancelled", "reason": "barge_in"}
+            ws.send_bytes(b"second")
+            ws.send_json({"type": "audio_end"})
+
+            types = []
+            while "response_end" not in types:
+                message = ws.receive()
+                if message.get("text"):
+                    types.append(voice.json.loads(message["text"])["type"])
+            ws.send_json({"type": "close"})
+
+        assert len(calls) == 2
+        assert types[0] == "transcription"
+
+    def test_binary_frame_without_audio_start_is_rejected(self, voice_client):
+        with voice_client.websocket_connect("/movi/voice") as ws:
+            ws.send_json({"type": "init", "session_id": "voice-bad"})
+            ws.receive_json()
+            ws.send_bytes(b"orphan")
+
+            assert ws.receive_json()["type"] == "error"
+            ws.send_json({"type": "close"})